@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 # Python 3.6
 
+# Heavy modules (NumPy, model weights) are loaded in a background thread while the initial map is processed,
+#   so importing them doesn't delay reading the game or calling ready. The rest of hlt is standard library only.
+from hlt.lazy import Preloader
+preloader = Preloader().add_module("numpy").start()
+
 # Import the Halite SDK, which will let you interact with the game.
 import hlt
 
@@ -24,6 +29,14 @@ game = hlt.Game()
 # At this point "game" variable is populated with initial map data.
 # This is a good place to do computationally expensive start-up pre-processing.
 # As soon as you call "ready" function below, the 2 second per turn timer will start.
+
+# Make sure everything being preloaded is available before the turn timer starts.
+preloader.wait()
+# Distance tables, halite density and candidate dropoff sites for the initial map (cached across games on the same seed).
+#   Uses NumPy, so only once the preloader has imported it.
+game.game_map.precompute([player.shipyard.position for player in game.players.values()])
+# Fleet-wide mining targets (uses NumPy, so imported once it's loaded).
+from hlt.assignment import assign_targets
 game.ready("MyPythonBot")
 
 # Now that your bot is initialized, save a message to yourself in the log file with some important information.
@@ -44,13 +57,20 @@ while True:
     #   end of the turn.
     command_queue = []
 
+    # Mining targets are assigned to the whole fleet at once, so ships don't all head for the same halite.
+    targets = assign_targets(game_map, me, game.players.values())
+
     for ship in me.get_ships():
-        # For each of your ships, move randomly if the ship is on a low halite location or the ship is full.
-        #   Else, collect halite.
+        # For each of your ships, move towards its target (randomly if it has none) if the ship is on a low halite
+        #   location or the ship is full. Else, collect halite.
         if game_map[ship.position].halite_amount < constants.MAX_HALITE / 10 or ship.is_full:
-            command_queue.append(
-                ship.move(
-                    random.choice([ Direction.North, Direction.South, Direction.East, Direction.West ])))
+            target = None if ship.is_full else targets.get(ship.id)
+            if target is not None:
+                command_queue.append(ship.move(game_map.naive_navigate(ship, target)))
+            else:
+                command_queue.append(
+                    ship.move(
+                        random.choice([ Direction.North, Direction.South, Direction.East, Direction.West ])))
         else:
             command_queue.append(ship.stay_still())
 
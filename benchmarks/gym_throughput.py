@@ -0,0 +1,63 @@
+""" Gym evaluation throughput (games/hour) for a range of worker counts.
+
+	Games are played by a stand-in engine that sleeps for --game-seconds and reports random ranks,
+	so the benchmark measures scheduling and database writes rather than bots.
+
+	python -m benchmarks.gym_throughput --games 200 --workers 1 4 16
+"""
+
+import os
+import sys
+import stat
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hlt_client"))
+from hlt_client import gym, output
+
+FAKE_ENGINE = """#!{python}
+import json, random, sys, time
+time.sleep({game_seconds})
+num_players = sys.argv.count("-o")
+ranks = random.sample(range(1, num_players + 1), num_players)
+print(json.dumps({{"stats": {{str(i): {{"rank": ranks[i]}} for i in range(num_players)}},
+	"map_width": 32, "map_height": 32, "replay": "replay.hlt", "final_snapshot": {{}}}}))
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-g", "--games", action="store", dest="games", type=int, default=200, help="games per run")
+parser.add_argument("-w", "--workers", action="store", dest="workers", type=int, nargs="+", default=[1, 4, 16], help="worker counts to compare")
+parser.add_argument("-b", "--bots", action="store", dest="bots", type=int, default=20, help="number of registered bots")
+parser.add_argument("-s", "--game-seconds", action="store", dest="game_seconds", type=float, default=0.05, help="duration of a stand-in game")
+
+def main(args):
+	output.set_mode(output.JSON)
+	directory = tempfile.mkdtemp()
+	engine = os.path.join(directory, "halite")
+	with open(engine, "w") as f:
+		f.write(FAKE_ENGINE.format(python=sys.executable, game_seconds=args.game_seconds))
+	os.chmod(engine, os.stat(engine).st_mode | stat.S_IEXEC)
+
+	results = []
+	for workers in args.workers:
+		db_path = os.path.join(directory, "gym-{}.db".format(workers))
+		with gym.connect(db_path) as conn:
+			for bot in range(args.bots):
+				gym.register_bot(conn, "bot-{}".format(bot), "bot-{}".format(bot))
+		devnull = open(os.devnull, "w")
+		stdout, sys.stdout = sys.stdout, devnull
+		start = time.time()
+		try:
+			gym.run_matches(db_path, engine, None, args.games, workers)
+		finally:
+			sys.stdout = stdout
+			devnull.close()
+		elapsed = time.time() - start
+		results.append((workers, args.games / elapsed * 3600))
+
+	for workers, games_per_hour in results:
+		print("{:>4} workers: {:>12.0f} games/hour".format(workers, games_per_hour))
+
+if __name__ == "__main__":
+	main(parser.parse_args())
@@ -0,0 +1,279 @@
+""" Throughput and allocations of the hlt hot paths on synthetic games, with a local baseline to catch regressions.
+
+	Games are played by random bots on the in-process simulator (hlt.sim) for every map size and player count,
+	giving both the engine input stream a bot reads every turn and the replay the encoders and generators read.
+	Every function is timed over several windows for ops/sec, keeping the best, then run under tracemalloc for its
+	peak traced memory (which includes temporaries) and the memory blocks it leaves allocated per call.
+
+	Timings depend on the machine, so baselines aren't committed: save one on the machine comparing against it
+	(by default to benchmarks/hot_paths.json, ignored by git). Every timed window of a function is surrounded by
+	windows of a fixed calibration loop, and functions are compared in ops per calibration loop (the median over
+	the windows), so changes in the speed of the machine during a run (load, frequency scaling) mostly cancel out.
+
+	python -m benchmarks.hot_paths run
+	python -m benchmarks.hot_paths run --sizes 32 64 --players 2 --save
+	python -m benchmarks.hot_paths compare --sizes 32 64 --players 2 --threshold 0.2
+"""
+
+import os
+import sys
+import json
+import shutil
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+from hlt import replay
+from hlt.positionals import Direction, Position
+from hlt.encoders.historic import HistoricEncoder
+from hlt.encoders.utils import roll_and_crop
+from hlt.sim import rules
+from hlt.sim.local import LocalGames, RandomBot, frame_lines, initial_lines, _feed
+from hlt.networking import Game
+
+MAP_SIZES = (32, 40, 48, 56, 64)
+NUM_PLAYERS = (2, 4)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hot_paths.json")
+
+parser = argparse.ArgumentParser()
+subparsers = parser.add_subparsers(dest="command")
+run_parser = subparsers.add_parser("run", help="run the benchmarks")
+compare_parser = subparsers.add_parser("compare", help="run the benchmarks and compare them to a baseline")
+compare_parser.add_argument("baseline", nargs="?", default=BASELINE_PATH, help="baseline saved by run --save on this machine")
+compare_parser.add_argument("-t", "--threshold", action="store", dest="threshold", type=float, default=0.2, help="slowdown flagged as a regression (0.2 is 20%% fewer ops/sec)")
+for subparser in (run_parser, compare_parser):
+	subparser.add_argument("-z", "--sizes", action="store", dest="sizes", type=int, nargs="+", default=list(MAP_SIZES), help="map sizes")
+	subparser.add_argument("-p", "--players", action="store", dest="players", type=int, nargs="+", default=list(NUM_PLAYERS), help="player counts")
+	subparser.add_argument("-n", "--turns", action="store", dest="turns", type=int, default=100, help="turns of the synthetic games")
+	subparser.add_argument("-m", "--min-time", action="store", dest="min_time", type=float, default=0.2, help="seconds each repeat of a function is timed for")
+	subparser.add_argument("-r", "--repeats", action="store", dest="repeats", type=int, default=5, help="timed repeats of each function, the best one is kept")
+	subparser.add_argument("-f", "--functions", action="store", dest="functions", type=str, nargs="+", default=None, help="only run these functions")
+run_parser.add_argument("-s", "--save", action="store", dest="save", type=str, nargs="?", const=BASELINE_PATH, default=None, help="save the results as a baseline (default: %s)" % BASELINE_PATH)
+
+class SyntheticGame:
+	def __init__(self, size: int, num_players: int, turns: int, seed: int = 0):
+		""" A game of random bots: the engine input stream of player 0 and the replay
+			inputs:
+				size (int):			map width and height
+				num_players (int):	2 or 4
+				turns (int):		number of turns played
+				seed (int):			map and bots seed
+		"""
+		self.size = size
+		self.num_players = num_players
+		self.replay_dir = tempfile.mkdtemp()
+		constants = rules.game_constants(size, size, MAX_TURNS=turns)
+		games = LocalGames([lambda player=player: RandomBot(seed + player) for player in range(num_players)],
+			width=size, height=size, seed=seed, constants=constants, replay_dir=self.replay_dir)
+		self.initial_lines = initial_lines(games.state, 0, 0)
+		self.frames = []
+		while not games.done:
+			self.frames.append(frame_lines(games.state, 0))
+			games.play_turn()
+		self.replay_path = os.path.join(self.replay_dir, os.listdir(self.replay_dir)[0])
+		self.replay = replay.load_replay(self.replay_path)
+
+	def new_game(self) -> Game:
+		""" A bot's Game at the last turn of the stream """
+		game = _feed(self.initial_lines, Game)
+		_feed(self.frames[-1], game.update_frame)
+		return game
+
+def bench_update_frame(case: SyntheticGame):
+	""" Game.update_frame (players and GameMap._update) on the successive frames of the stream, all of them
+		per op so every timed window covers the same frames
+	"""
+	game = _feed(case.initial_lines, Game)
+	def op():
+		for lines in case.frames:
+			_feed(lines, game.update_frame)
+	return op, len(case.frames)
+
+def bench_calculate_distance(case: SyntheticGame):
+	game_map = case.new_game().game_map
+	rng = random.Random(0)
+	pairs = [(Position(rng.randrange(case.size), rng.randrange(case.size)), Position(rng.randrange(case.size), rng.randrange(case.size))) for _ in range(1024)]
+	def op():
+		for source, target in pairs:
+			game_map.calculate_distance(source, target)
+	return op, len(pairs)
+
+def bench_naive_navigate(case: SyntheticGame):
+	game = case.new_game()
+	game_map = game.game_map
+	ships = [ship for player in game.players.values() for ship in player.get_ships()]
+	if not ships:
+		return None
+	rng = random.Random(0)
+	moves = [(ships[i % len(ships)], Position(rng.randrange(case.size), rng.randrange(case.size))) for i in range(256)]
+	def op():
+		for ship, target in moves:
+			direction = game_map.naive_navigate(ship, target)
+			# unmark the cell so every call sees the same map
+			if direction != Direction.Still:
+				game_map[ship.position.directional_offset(direction)].ship = None
+	return op, len(moves)
+
+def bench_roll_and_crop(case: SyntheticGame):
+	halite = np.random.RandomState(0).rand(case.size, case.size, 1)
+	rng = random.Random(0)
+	points = [(rng.randrange(case.size), rng.randrange(case.size)) for _ in range(64)]
+	def op():
+		for x, y in points:
+			roll_and_crop(arr=halite, x=x, y=y, radius=10)
+	return op, len(points)
+
+def bench_encode_from_dict(case: SyntheticGame):
+	encoder = HistoricEncoder()
+	return lambda: encoder.encode_from_dict(case.replay)
+
+def bench_generator_next(case: SyntheticGame):
+	from hlt.data.generator import Generator
+	from hlt.data.selectors import by_rank
+	np.random.seed(0)
+	generator = Generator(encoder_name="historic", replay_folder=case.replay_dir, player_name=by_rank(case.num_players), radius=10, batch_size=32)
+	return lambda: next(generator)
+
+FUNCTIONS = {
+	"Game.update_frame": bench_update_frame,
+	"GameMap.calculate_distance": bench_calculate_distance,
+	"GameMap.naive_navigate": bench_naive_navigate,
+	"roll_and_crop": bench_roll_and_crop,
+	"HistoricEncoder.encode_from_dict": bench_encode_from_dict,
+	"Generator.__next__": bench_generator_next,
+}
+
+def _time(op, min_time: float) -> float:
+	""" Calls op for at least min_time seconds
+		outputs:
+			calls per second
+	"""
+	calls = 0
+	start = time.perf_counter()
+	while True:
+		op()
+		calls += 1
+		elapsed = time.perf_counter() - start
+		if elapsed >= min_time:
+			return calls / elapsed
+
+_calibration_arr = np.random.RandomState(0).rand(64, 64)
+
+def calibration_op():
+	""" A fixed mix of interpreter and NumPy work, timed next to every function as the speed of the machine """
+	total = 0
+	for i in range(2000):
+		total += i * i % 7
+	np.roll(_calibration_arr, 3, axis=0).sum()
+
+def measure(op, calls_per_op: int = 1, min_time: float = 0.2, repeats: int = 5) -> dict:
+	""" Times op for repeats windows of at least min_time seconds, each between two windows of calibration_op,
+		then traces the allocations of two more calls
+		outputs:
+			{"ops_per_sec", "relative_speed", "blocks_per_op", "peak_kib_per_op"} where an op is a call of the
+			function, ops_per_sec is the fastest window (the others measure interference from the rest of the
+			machine more than op), relative_speed the median over the windows of ops per calibration_op call
+			around it and blocks_per_op the memory blocks still allocated after a call
+	"""
+	op() # warm up
+	calibration_op()
+	windows = []
+	calibration = _time(calibration_op, min_time / 2)
+	for _ in range(max(1, repeats)):
+		ops = _time(op, min_time)
+		next_calibration = _time(calibration_op, min_time / 2)
+		windows.append((ops, ops / ((calibration + next_calibration) / 2.0)))
+		calibration = next_calibration
+
+	# The peak of a call traced from the start (tracemalloc.reset_peak needs Python 3.9),
+	#   then the blocks left allocated by another one between snapshots
+	tracemalloc.start()
+	op()
+	_, peak = tracemalloc.get_traced_memory()
+	before = tracemalloc.take_snapshot()
+	op()
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+	return {
+		"ops_per_sec": max(ops for ops, _ in windows) * calls_per_op,
+		"relative_speed": float(np.median([speed for _, speed in windows])) * calls_per_op,
+		"blocks_per_op": blocks / float(calls_per_op),
+		"peak_kib_per_op": peak / 1024.0 / calls_per_op,
+	}
+
+def run(sizes, players, turns: int, min_time: float, functions=None, verbose: bool = True, repeats: int = 5) -> dict:
+	""" Runs the benchmarks
+		outputs:
+			{"<function> <size>x<size> <players>p": measure(...)}
+	"""
+	results = {}
+	for size in sizes:
+		for num_players in players:
+			case = SyntheticGame(size, num_players, turns)
+			for name, bench in FUNCTIONS.items():
+				if functions and name not in functions:
+					continue
+				key = "{} {}x{} {}p".format(name, size, size, num_players)
+				setup = bench(case)
+				if setup is None:
+					continue
+				op, calls_per_op = setup if isinstance(setup, tuple) else (setup, 1)
+				results[key] = measure(op, calls_per_op, min_time, repeats)
+				if verbose:
+					report(key, results[key])
+			shutil.rmtree(case.replay_dir)
+	return results
+
+def report(key: str, result: dict, baseline: dict = None, threshold: float = None) -> bool:
+	""" Prints a result, and its change from the baseline in relative speed (ops per calibration_op, so
+		independent of the speed of the machine when each was measured)
+		outputs:
+			regressed (bool): whether ops/sec dropped by more than threshold
+	"""
+	line = "{:<48} {:>12.1f} ops/s {:>10.1f} blocks {:>10.1f} KiB".format(key, result["ops_per_sec"], result["blocks_per_op"], result["peak_kib_per_op"])
+	regressed = False
+	if baseline is not None:
+		change = result["relative_speed"] / baseline["relative_speed"] - 1.0
+		regressed = change < -threshold
+		line += " {:>+8.1%}{}".format(change, "  SLOWER" if regressed else "")
+	print(line)
+	return regressed
+
+def compare(results: dict, baselines: dict, threshold: float) -> [str]:
+	""" Prints every result against its baseline
+		outputs:
+			the keys of the regressed functions
+	"""
+	regressions = []
+	for key, result in results.items():
+		if report(key, result, baselines.get(key), threshold):
+			regressions.append(key)
+	return regressions
+
+def main(args):
+	if args.command == "compare":
+		if not os.path.exists(args.baseline):
+			print("No baseline at {}, save one on this machine first: python -m benchmarks.hot_paths run --save".format(args.baseline))
+			sys.exit(2)
+		with open(args.baseline, "r") as f:
+			baselines = json.load(f)
+		results = run(args.sizes, args.players, args.turns, args.min_time, args.functions, verbose=False, repeats=args.repeats)
+		regressions = compare(results, baselines, args.threshold)
+		if regressions:
+			print("{} of {} benchmarks are more than {:.0%} slower than the baseline".format(len(regressions), len(results), args.threshold))
+			sys.exit(1)
+		return
+	results = run(args.sizes, args.players, args.turns, args.min_time, args.functions, repeats=args.repeats)
+	if args.save:
+		with open(args.save, "w") as f:
+			json.dump(results, f, indent=1, sort_keys=True)
+
+if __name__ == "__main__":
+	args = parser.parse_args()
+	if args.command is None:
+		parser.print_help()
+	else:
+		main(args)
@@ -0,0 +1,114 @@
+""" Per-turn latency and peak memory of two versions of a bot on a fixed corpus of map seeds and sizes.
+
+	The two versions play each other on every seed and size of the corpus, each measuring its own turns from inside
+	hlt.networking.Game (see hlt.timing). Games are played by the engine binary when given, otherwise by the
+	stand-in of hlt.sim.engine. The report compares p50/p99/max turn times and peak RSS per map size, flags the
+	turns over the time budget, and exits with an error when the candidate regressed.
+
+	python -m benchmarks.latency "python3 /path/to/old/MyBot.py" "python3 /path/to/MyBot.py"
+	python -m benchmarks.latency "python3 old/MyBot.py" "python3 MyBot.py" --binary ./halite --sizes 32 64 --seeds 1 2 3
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from hlt.timing import TIMINGS_ENV, TIMINGS_FILE, read_timings, summarize_turns
+from hlt.sim import engine
+
+MAP_SIZES = (32, 40, 48, 56, 64)
+SEEDS = (1, 2, 3)
+VERSIONS = ("baseline", "candidate")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("baseline", type=str, help="command running the baseline bot (use absolute paths)")
+parser.add_argument("candidate", type=str, help="command running the candidate bot (use absolute paths)")
+parser.add_argument("-b", "--binary", action="store", dest="binary", type=str, default=None, help="halite engine binary (default: the hlt.sim stand-in)")
+parser.add_argument("-z", "--sizes", action="store", dest="sizes", type=int, nargs="+", default=list(MAP_SIZES), help="map sizes")
+parser.add_argument("-s", "--seeds", action="store", dest="seeds", type=int, nargs="+", default=list(SEEDS), help="map seeds")
+parser.add_argument("-p", "--players", action="store", dest="players", type=int, default=2, choices=[2, 4], help="players per game, the versions alternating seats")
+parser.add_argument("--budget", action="store", dest="budget", type=float, default=2000.0, help="turn time budget in ms")
+parser.add_argument("-t", "--threshold", action="store", dest="threshold", type=float, default=0.2, help="p99 slowdown flagged as a regression (0.2 is 20%% slower)")
+parser.add_argument("-o", "--output", action="store", dest="output", type=str, default=None, help="save the report as JSON")
+
+def play_game(commands: [str], size: int, seed: int, directory: str, binary: str = None) -> None:
+	""" Plays a game, every bot appending its turns to <directory>/bot-<player id>.timings.jsonl """
+	env = dict(os.environ)
+	env[TIMINGS_ENV] = directory
+	if binary is None:
+		engine.play(commands, size, size, seed, cwd=directory, env=env)
+		return
+	command = [binary, "--results-as-json", "--no-replay", "--no-logs", "--seed", str(seed), "--width", str(size), "--height", str(size)] + commands
+	subprocess.check_output(command, cwd=directory, env=env)
+
+def run(bots: dict, sizes: [int], seeds: [int], num_players: int = 2, binary: str = None, verbose: bool = True) -> dict:
+	""" Plays the corpus
+		inputs:
+			bots (dict):	{version: command}
+		outputs:
+			{version: {size: [turns, ...]}} with turns as read by hlt.timing.read_timings
+	"""
+	versions = list(bots)
+	seats = [versions[seat % len(versions)] for seat in range(num_players)]
+	turns = {version: {size: [] for size in sizes} for version in versions}
+	for size in sizes:
+		for seed in seeds:
+			directory = tempfile.mkdtemp()
+			play_game([bots[version] for version in seats], size, seed, directory, binary)
+			for player, version in enumerate(seats):
+				turns[version][size].extend(read_timings(os.path.join(directory, TIMINGS_FILE.format(player))))
+			shutil.rmtree(directory)
+			if verbose:
+				print("{}x{} seed {}: done".format(size, size, seed))
+	return turns
+
+def summarize_corpus(turns: dict) -> dict:
+	""" {version: {size or "all": summarize_turns(...)}} """
+	summary = {}
+	for version, by_size in turns.items():
+		summary[version] = {str(size): summarize_turns(size_turns) for size, size_turns in by_size.items()}
+		summary[version]["all"] = summarize_turns([turn for size_turns in by_size.values() for turn in size_turns])
+	return summary
+
+def report(summary: dict, budget: float, threshold: float) -> [str]:
+	""" Prints the comparison
+		outputs:
+			the problems found: candidate turns over the budget and p99 regressions
+	"""
+	problems = []
+	print("{:<10} {:<10} {:>7} {:>10} {:>10} {:>10} {:>10}".format("size", "version", "turns", "p50 ms", "p99 ms", "max ms", "rss MiB"))
+	for size in summary["candidate"]:
+		for version in VERSIONS:
+			s = summary[version][size]
+			if not s["turns"]:
+				print("{:<10} {:<10} {:>7}".format(size, version, 0))
+				continue
+			rss = "-" if s["peak_rss_kib"] is None else "{:.1f}".format(s["peak_rss_kib"] / 1024.0)
+			print("{:<10} {:<10} {:>7} {:>10.2f} {:>10.2f} {:>10.2f} {:>10}".format(size, version, s["turns"], s["p50_ms"], s["p99_ms"], s["max_ms"], rss))
+		baseline, candidate = summary["baseline"][size], summary["candidate"][size]
+		if not candidate["turns"]:
+			problems.append("{}: the candidate played no turns".format(size))
+			continue
+		if candidate["max_ms"] > budget:
+			problems.append("{}: candidate turn of {:.0f} ms over the {:.0f} ms budget".format(size, candidate["max_ms"], budget))
+		if baseline["turns"] and candidate["p99_ms"] > baseline["p99_ms"] * (1 + threshold):
+			problems.append("{}: candidate p99 {:.2f} ms vs {:.2f} ms".format(size, candidate["p99_ms"], baseline["p99_ms"]))
+	for problem in problems:
+		print("REGRESSION " + problem)
+	return problems
+
+def main(args):
+	bots = {"baseline": args.baseline, "candidate": args.candidate}
+	summary = summarize_corpus(run(bots, args.sizes, args.seeds, args.players, args.binary))
+	problems = report(summary, args.budget, args.threshold)
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump({"bots": bots, "sizes": args.sizes, "seeds": args.seeds, "summary": summary, "problems": problems}, f, indent=1)
+	if problems:
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main(parser.parse_args())
@@ -0,0 +1,97 @@
+""" Per-turn latency of hlt.runtime against Keras predict for the hlt.models networks.
+
+	python -m benchmarks.runtime --model small --radius 10 --ships 150
+	python -m benchmarks.runtime --model dense --size 64
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from hlt import runtime
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-m", "--model", action="store", dest="model", type=str, default="small", choices=["small", "dense"], help="network to benchmark")
+parser.add_argument("-r", "--radius", action="store", dest="radius", type=int, default=10, help="crop radius of the small network")
+parser.add_argument("-s", "--ships", action="store", dest="ships", type=int, default=150, help="ships per turn (batch size of the small network)")
+parser.add_argument("-z", "--size", action="store", dest="size", type=int, default=64, help="map size of the dense network")
+parser.add_argument("-t", "--turns", action="store", dest="turns", type=int, default=50, help="number of timed turns")
+parser.add_argument("--no-keras", action="store_true", dest="no_keras", help="only time the runtime on randomly initialized weights")
+
+def random_graph(num_planes: int, crop_shape: tuple = None, seed: int = 0) -> runtime.Model:
+	""" Randomly initialized runtime graph with the topology of hlt.models.small.get_model (given the crop shape)
+		or of hlt.models.dense.get_model (crop_shape of None)
+	"""
+	flatten = crop_shape is not None
+	rng = np.random.RandomState(seed)
+	ops = [{"name": "maps", "op": "input"}]
+	weights = {}
+	x, channels = "maps", num_planes
+	for idx, (filters, kernel_size) in enumerate([(24, 5)] * 10 + [(128, 1)] * 2):
+		name = "conv_{}".format(idx)
+		inputs = [x]
+		if not flatten and kernel_size > 1:
+			ops.append({"name": name + "_pad", "op": "wrap_pad", "inputs": [x], "pad": kernel_size // 2})
+			inputs = [name + "_pad"]
+		ops.append({"name": name, "op": "conv2d", "inputs": inputs, "padding": "same" if flatten else "valid", "alpha": 0.3, "shift": True})
+		weights[name + "/kernel"] = rng.randn(kernel_size, kernel_size, channels, filters) * 0.1
+		weights[name + "/bias"] = rng.randn(filters) * 0.1
+		weights[name + "/shift"] = rng.randn(filters) * 0.1
+		ops.append({"name": name + "_concat", "op": "concat", "inputs": [name, "maps"], "axis": -1})
+		x, channels = name + "_concat", filters + num_planes
+	if flatten:
+		ops.append({"name": "flatten", "op": "flatten", "inputs": [x]})
+		ops.append({"name": "dense", "op": "dense", "inputs": ["flatten"]})
+		weights["dense/kernel"] = rng.randn(crop_shape[0] * crop_shape[1] * channels, 5) * 0.01
+	else:
+		ops.append({"name": "dense", "op": "conv2d", "inputs": [x], "padding": "valid"})
+		weights["dense/kernel"] = rng.randn(1, 1, channels, 5) * 0.1
+	weights["dense/bias"] = np.zeros(5)
+	ops.append({"name": "softmax", "op": "softmax", "inputs": ["dense"], "axis": -1})
+	return runtime.Model(ops, weights)
+
+def time_turns(predict, inputs: np.array, turns: int) -> np.array:
+	predict(inputs) # warm up
+	timings = []
+	for _ in range(turns):
+		start = time.perf_counter()
+		predict(inputs)
+		timings.append(time.perf_counter() - start)
+	return np.array(timings) * 1000.0
+
+def report(name: str, timings: np.array):
+	print("{:>10}: mean {:8.2f} ms  p50 {:8.2f} ms  p99 {:8.2f} ms  max {:8.2f} ms".format(
+		name, timings.mean(), np.percentile(timings, 50), np.percentile(timings, 99), timings.max()))
+
+def main(args):
+	num_planes = 4
+	if args.model == "small":
+		map_shape = (args.radius * 2 + 1, args.radius * 2 + 1, num_planes)
+		inputs = np.random.rand(args.ships, *map_shape).astype(np.float32)
+	else:
+		inputs = np.random.rand(1, args.size, args.size, num_planes).astype(np.float32)
+
+	if args.no_keras:
+		model = random_graph(num_planes=num_planes, crop_shape=map_shape[:2] if args.model == "small" else None)
+		report("runtime", time_turns(model.predict, inputs, args.turns))
+		return
+
+	from hlt.models.export import export_model
+	if args.model == "small":
+		from hlt.models.small import get_model
+		keras_model = get_model(map_shape)
+	else:
+		from hlt.models.dense import get_model
+		keras_model = get_model(num_planes)
+
+	path = os.path.join(tempfile.mkdtemp(), "model.npz")
+	export_model(keras_model, path)
+	model = runtime.load(path)
+
+	np.testing.assert_allclose(model.predict(inputs), keras_model.predict(inputs), rtol=1e-3, atol=1e-4)
+	report("keras", time_turns(keras_model.predict, inputs, args.turns))
+	report("runtime", time_turns(model.predict, inputs, args.turns))
+
+if __name__ == "__main__":
+	main(parser.parse_args())
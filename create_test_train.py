@@ -2,15 +2,26 @@ import shutil
 import os
 import numpy as np
 import argparse
+from hlt.data.index import GameIndex
+from hlt.data.splits import SplitManifest, BY_GAME, BY_PLAYER
 
 parser = argparse.ArgumentParser()
-parser.add_argument("-p", "--path", action="store", dest="path", type=str, required=True, help="path of files to move")
-parser.add_argument("-t", "--train", action="store", dest="train", type=str, required=True, help="path of train directory")
-parser.add_argument("-v", "--val", action="store", dest="val", type=str, required=True, help="path of validation directory")
-parser.add_argument("-e", "--perc-train", action="store", dest="perc", type=float, required=True, help="percentage of train")
-parser.add_argument("-x", "--ext", action="store", dest="ext", type=str, required=True, help="file extension")
+parser.add_argument("-p", "--path", action="store", dest="path", type=str, required=True, help="path of files to split")
+parser.add_argument("-e", "--perc-train", action="store", dest="perc", type=float, default=None, help="percentage of train")
+parser.add_argument("-x", "--ext", action="store", dest="ext", type=str, default=".json", help="file extension")
+parser.add_argument("-k", "--folds", action="store", dest="folds", type=int, default=None, help="number of folds (instead of a percentage of train)")
+parser.add_argument("-b", "--by", action="store", dest="by", choices=[BY_GAME, BY_PLAYER], default=BY_GAME, help="split whole games or players")
+parser.add_argument("-s", "--salt", action="store", dest="salt", type=str, default="", help="salt of the hash, for another split of the same games")
+parser.add_argument("-m", "--manifest", action="store", dest="manifest", type=str, default=None, help="path of the split manifest (default: <path>/splits.manifest)")
+parser.add_argument("--move", action="store_true", dest="move", help="move the files to the train and validation directories instead of writing a manifest")
+parser.add_argument("-t", "--train", action="store", dest="train", type=str, help="path of train directory (with --move)")
+parser.add_argument("-v", "--val", action="store", dest="val", type=str, help="path of validation directory (with --move)")
 
 args = parser.parse_args()
+if args.move:
+	missing = [option for option, value in (("-e/--perc-train", args.perc), ("-t/--train", args.train), ("-v/--val", args.val)) if value is None]
+	if missing:
+		parser.error("--move requires {}".format(", ".join(missing)))
 
 def split_test_train(path: str, file_ext: str, perc_train: float, train_path: str, val_path: str):
 	assert perc_train <= 100, "perc train must be less than or equal to 100"
@@ -32,6 +43,32 @@ def split_test_train(path: str, file_ext: str, perc_train: float, train_path: st
 	print("Done!")
 	print("Train files: {}\n Validation files: {}".format(num_train, num_val))
 
+def write_split_manifest(path: str, file_ext: str, perc_train: float = None, num_folds: int = None, by: str = BY_GAME, salt: str = "", manifest_path: str = None) -> SplitManifest:
+	""" Records a hash-based split of the games of a folder without moving them (see hlt.data.splits).
+		With perc_train, the first folds (100 by default) holding that percentage of the games are for training
+	"""
+	if perc_train is not None:
+		if perc_train <= 1.0:
+			perc_train = perc_train * 100.0
+		assert 0 <= perc_train <= 100, "perc train must be between 0 and 100"
+	num_folds = num_folds or 100
+	if by == BY_GAME:
+		split = SplitManifest.from_folder(path, num_folds=num_folds, salt=salt, file_ext=file_ext)
+	else:
+		split = SplitManifest.from_index(GameIndex(path).build(), num_folds=num_folds, by=by, salt=salt)
+	split.save(manifest_path)
+	print("Done! Split written to {}".format(split.path))
+	if perc_train is not None:
+		train_folds = list(range(int(round(perc_train / 100.0 * num_folds))))
+		print("Train folds: 0-{}\n Validation folds: {}-{}".format(len(train_folds) - 1, len(train_folds), num_folds - 1))
+		print("Train files: {}\n Validation files: {}".format(len(split.files(train_folds)), len(split.files(split.other_folds(*train_folds)))))
+	else:
+		for fold in range(num_folds):
+			print("Fold {}: {} files".format(fold, len(split.files([fold]))))
+	return split
+
 if __name__ == "__main__":
-	split_test_train(path=args.path, file_ext=args.ext, perc_train=args.perc, train_path=args.train, val_path=args.val)
-	
\ No newline at end of file
+	if args.move:
+		split_test_train(path=args.path, file_ext=args.ext, perc_train=args.perc, train_path=args.train, val_path=args.val)
+	else:
+		write_split_manifest(path=args.path, file_ext=args.ext, perc_train=args.perc, num_folds=args.folds, by=args.by, salt=args.salt, manifest_path=args.manifest)
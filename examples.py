@@ -37,6 +37,36 @@ sample_gen = Generator(
     replay_folder=sample_folder,
     radius=radius)
 
+# Players can also be picked with a selector, resolved against a per-game metadata index
+# (built once into <replay_folder>/index.jsonl, so later selections don't reopen any replay)
+from hlt.data.index import GameIndex
+from hlt.data.selectors import winner
+index = GameIndex(sample_folder).build()
+winner_gen = Generator(
+    player_name=winner(),
+    index=index,
+    map_width=48,
+    batch_size=128,
+    encoder_name="historic",
+    replay_folder=sample_folder,
+    radius=radius)
+
+# Replays can also be encoded while they download, straight into training shards (no replay files on disk),
+# and a Generator given the ShardIndex samples the already encoded games
+from hlt_client.hlt_client.download_game import DatedGameDownloader
+from hlt.data.pipeline import download_to_shards
+from hlt.data.shards import ShardIndex
+shard_folder = "hlt/games/shards"
+downloader = DatedGameDownloader(download_path, "20181201")
+download_to_shards(downloader.objects, downloader.fetch, shard_folder, encoder_name="historic", game_id=downloader._parse_id_from_url)
+shard_gen = Generator(
+    player_name=winner(),
+    index=ShardIndex(shard_folder).build(),
+    batch_size=128,
+    encoder_name="historic",
+    replay_folder=shard_folder,
+    radius=radius)
+
 # Review output of a generator
 (inp, out) = next(sample_gen)
 inp["maps"].shape # 128, 5, 5, 4 => batch_size, radius * 2 + 1, radius * 2 + 1, 4
@@ -74,3 +104,14 @@ model.summary()
 
 # Train a model
 model.fit_generator(generator=sample_gen, steps_per_epoch=1)
+
+# Full-map training: one sample per frame with the moves of every ship of the player,
+# so live inference is a single forward pass per turn regardless of fleet size
+from hlt.data.dense_generator import DenseGenerator
+from hlt.models.dense import get_model as get_dense_model
+dense_gen = DenseGenerator(player_name=player_name, replay_folder=sample_folder, batch_size=16)
+(dense_inp, dense_out) = next(dense_gen)
+dense_inp["maps"].shape # 16, 48, 48, 4 => batch_size, map_height, map_width, 4
+dense_out.shape         # 16, 48, 48, 5 => one-hot moves on the player's ships, zeros elsewhere
+dense_model = get_dense_model(num_planes=dense_inp["maps"].shape[-1])
+dense_model.fit_generator(generator=dense_gen, steps_per_epoch=1)
@@ -0,0 +1,181 @@
+"""
+Fleet-wide assignment of mining targets, so ships don't all head for the same halite (see assign_targets).
+
+The value of a cell for a ship is the halite per turn it would bring back by going there, mining for the
+best number of turns up to max_mining_turns, and returning to our closest structure:
+    mined:      the halite collected over the turns (hlt.yields), inspired where enough enemy ships are
+                within INSPIRATION_RADIUS, capped by the room left in the ship
+    moving:     (distance there + distance back) * mean halite of the map / MOVE_COST_RATIO
+    value:      (mined - moving) / (distance there + turns mining + distance back)
+Values are computed for every ship on the cells with the most halite (several per ship), then every ship keeps
+its num_candidates best cells. Ships are assigned to cells, at most capacity ships per cell, by an auction
+(Bertsekas), which maximizes the total value to within a fraction of the best single value. When the time
+budget runs out the auction stops where it is, and the ships left over take their best free cell greedily.
+"""
+
+import collections
+import time
+
+import numpy as np
+
+from . import constants
+from .positionals import Position
+from .precompute import distance_table, distances_from, offsets_within, spread
+from .yields import yield_tables
+
+DEFAULT_BUDGET = 0.1
+NUM_CANDIDATES = 16
+MAX_MINING_TURNS = 8
+# Cells valued per ship, before keeping the best NUM_CANDIDATES
+CELLS_PER_SHIP = 4
+MIN_CELLS = 256
+
+
+def inspired_cells(table, enemy_ships):
+    """
+    :param table: As returned by distance_table
+    :param enemy_ships: The ships of the other players
+    :return: Whether a ship on each cell would be inspired, a bool array of shape (height, width)
+    """
+    if not constants.INSPIRATION_ENABLED or not enemy_ships:
+        return np.zeros(table.shape, dtype=bool)
+    counts = spread(table.shape, offsets_within(table, constants.INSPIRATION_RADIUS),
+                    [ship.position.y for ship in enemy_ships], [ship.position.x for ship in enemy_ships],
+                    np.ones(len(enemy_ships)))
+    return counts >= constants.INSPIRATION_SHIP_COUNT
+
+
+def mining_values(game_map, me, players, max_mining_turns=MAX_MINING_TURNS, num_cells=None):
+    """
+    Values of the cells for our ships, see the module docstring
+    :param game_map: The game map
+    :param me: Our Player
+    :param players: All Players, including me
+    :param max_mining_turns: The most turns a ship would mine a cell
+    :param num_cells: The number of cells valued, those with the most halite
+    :return: (ships, cells, values) with cells the (ys, xs) int arrays of the valued cells and values
+        an array of shape (ships, cells) of halite per turn
+    """
+    ships = me.get_ships()
+    cells_halite = game_map.halite_sums().halite
+    halite = cells_halite.astype(np.float32)
+    table = distance_table(game_map.width, game_map.height)
+    structures = [me.shipyard.position] + [dropoff.position for dropoff in me.get_dropoffs()]
+    enemy_ships = [ship for player in players if player.id != me.id for ship in player.get_ships()]
+
+    inspired = inspired_cells(table, enemy_ships)
+    bonus = np.where(inspired, 1.0 + constants.INSPIRED_BONUS_MULTIPLIER, 1.0).astype(np.float32)
+
+    num_cells = min(num_cells or max(CELLS_PER_SHIP * len(ships), MIN_CELLS), halite.size)
+    best = np.argpartition(-(halite * bonus).ravel(), num_cells - 1)[:num_cells]
+    ys, xs = np.unravel_index(best, halite.shape)
+    if not ships:
+        return ships, (ys, xs), np.zeros((0, num_cells))
+
+    ship_ys = np.array([ship.position.y for ship in ships])
+    ship_xs = np.array([ship.position.x for ship in ships])
+    room = constants.MAX_HALITE - np.array([ship.halite_amount for ship in ships], dtype=np.float32)
+    there = table.astype(np.float32)[(ys[None, :] - ship_ys[:, None]) % game_map.height, (xs[None, :] - ship_xs[:, None]) % game_map.width]
+    back = distances_from(table, structures)[ys, xs].astype(np.float32)
+    trip = there + back[None, :]
+    moving = trip * (halite.mean() / constants.MOVE_COST_RATIO)
+
+    collected = yield_tables().collected_by_turns(cells_halite[ys, xs], max_mining_turns, inspired[ys, xs])
+    values = np.full(trip.shape, -np.inf, dtype=np.float32)
+    # One (ships, cells) pass per number of turns mining, keeping the best
+    for turns in range(1, max_mining_turns + 1):
+        mined = np.minimum(collected[turns].astype(np.float32), room[:, None]) - moving
+        np.maximum(values, mined / (trip + turns), out=values)
+    return ships, (ys, xs), values
+
+
+def auction(values, candidates, num_objects, epsilon=None, deadline=None):
+    """
+    Assigns every row (ship) to at most one of its candidate objects (cells), each object to at most one row,
+    maximizing the total value; a row stays unassigned rather than taking a value below zero
+    :param values: Value of each candidate of each row, an array of shape (rows, candidates)
+    :param candidates: Object index of each candidate, an int array of shape (rows, candidates)
+    :param num_objects: The number of objects
+    :param epsilon: The bid increment, the total is optimal to within rows * epsilon
+    :param deadline: time.perf_counter() at which to stop
+    :return: (assigned, complete), the object of each row (-1 for none) and whether the auction finished
+    """
+    num_rows = len(values)
+    scale = values.max() if values.size else 0.0
+    step = epsilon or scale / (4.0 * max(num_rows, 1))
+    prices = np.zeros(num_objects)
+    owners = np.full(num_objects, -1, dtype=np.int64)
+    assigned = np.full(num_rows, -1, dtype=np.int64)
+    # Epsilon scaling would raise prices past the values of the rows that then opt out for good,
+    #   so bids use the final increment from the start
+    queue = collections.deque(range(num_rows) if scale > 0 else ())
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            return assigned, False
+        row = queue.popleft()
+        net = values[row] - prices[candidates[row]]
+        best = int(np.argmax(net))
+        first = net[best]
+        if first <= 0:
+            # Prices only rise, so no candidate will ever be worth it
+            continue
+        net[best] = -np.inf
+        second = max(net.max(), 0.0)
+        target = candidates[row, best]
+        prices[target] += first - second + step
+        if owners[target] >= 0:
+            assigned[owners[target]] = -1
+            queue.append(owners[target])
+        owners[target] = row
+        assigned[row] = target
+    return assigned, True
+
+
+def _fill_greedily(assigned, values, candidates, num_objects):
+    """
+    Gives the unassigned rows their best free candidate of positive value, best values first
+    """
+    taken = np.zeros(num_objects, dtype=bool)
+    taken[assigned[assigned >= 0]] = True
+    rows = np.flatnonzero(assigned < 0)
+    for row in rows[np.argsort(-values[rows].max(axis=1))]:
+        for index in np.argsort(-values[row]):
+            if values[row, index] <= 0:
+                break
+            if not taken[candidates[row, index]]:
+                taken[candidates[row, index]] = True
+                assigned[row] = candidates[row, index]
+                break
+    return assigned
+
+
+def assign_targets(game_map, me, players, budget=DEFAULT_BUDGET, num_candidates=NUM_CANDIDATES, capacity=1,
+                   max_mining_turns=MAX_MINING_TURNS):
+    """
+    Assigns mining targets to our ships, see the module docstring
+    :param game_map: The game map
+    :param me: Our Player
+    :param players: All Players, e.g. game.players.values()
+    :param budget: Seconds the assignment may take, after computing the values
+    :param num_candidates: Cells each ship may be assigned to, its most valuable ones
+    :param capacity: The most ships assigned to a cell
+    :param max_mining_turns: The most turns a ship would mine a cell
+    :return: {ship id: Position} for the ships with a target worth going to
+    """
+    ships, (ys, xs), values = mining_values(game_map, me, players, max_mining_turns)
+    if not ships:
+        return {}
+    deadline = time.perf_counter() + budget
+    num_candidates = min(num_candidates, values.shape[1])
+    cells = np.argpartition(-values, num_candidates - 1, axis=1)[:, :num_candidates]
+    values = np.take_along_axis(values, cells, axis=1)
+    # Every cell is capacity objects, each ship bidding for all of them
+    candidates = (cells[:, :, None] * capacity + np.arange(capacity)[None, None, :]).reshape(len(ships), -1)
+    values = np.repeat(values, capacity, axis=1)
+
+    num_objects = len(ys) * capacity
+    assigned, complete = auction(values, candidates, num_objects, deadline=deadline)
+    if not complete:
+        assigned = _fill_greedily(assigned, values, candidates, num_objects)
+    return {ship.id: Position(int(xs[target // capacity]), int(ys[target // capacity]))
+            for ship, target in zip(ships, assigned) if target >= 0}
@@ -0,0 +1,237 @@
+"""
+Capture of the engine input a bot reads, and offline replay of it into Game.
+
+Capturing tees every line read through hlt.common.read_input to a gzip file, the raw stream as the
+engine sent it. Set the HLT_CAPTURE environment variable to a directory for every Game to write
+<directory>/bot-<player id>.input.gz, or call start(path) before creating the Game. The file is flushed
+at the end of every turn, so it stays readable when the engine kills the bot at the end of the game.
+
+Replaying feeds a captured stream back into a Game at full speed, discarding the commands sent, so the
+per-turn pipeline can be profiled and benchmarked deterministically without the engine:
+
+    python -m hlt.capture MyBot.py bot-0.input.gz --repeat 5 --profile mybot.prof
+
+Only the bot's own code is deterministic under replay: the frames don't depend on its commands.
+"""
+
+import atexit
+import contextlib
+import gzip
+import os
+import sys
+import time
+
+from . import common
+
+CAPTURE_ENV = "HLT_CAPTURE"
+CAPTURE_FILE = "bot-{}.input.gz"
+COMPRESSION_LEVEL = 6
+
+# The capture installed as the input source, and whether a replay is feeding the input
+_active = None
+_replaying = False
+
+
+class InputCapture:
+    """
+    An input source for hlt.common.set_input, writing every line read from the previous source to a gzip file
+    """
+    def __init__(self, path=None, directory=None):
+        """
+        :param path: The capture file, None to keep the lines in memory until for_player names it
+        :param directory: Where for_player writes the capture when no path is given
+        """
+        self.path = None
+        self.directory = directory
+        self.source = None
+        self._lines = []
+        self._file = None
+        if path is not None:
+            self.open(path)
+
+    def __call__(self):
+        line = self.source()
+        if self._file is None:
+            self._lines.append(line)
+        else:
+            self._file.write(line + "\n")
+        return line
+
+    def open(self, path):
+        """
+        Starts writing to path, with the lines read so far
+        """
+        self.path = path
+        self._file = gzip.open(path, "wt", compresslevel=COMPRESSION_LEVEL)
+        self._file.writelines(line + "\n" for line in self._lines)
+        self._lines = []
+        atexit.register(self.close)
+
+    def for_player(self, player_id):
+        """
+        Called by Game once it knows its player id, opens <directory>/bot-<player id>.input.gz if no path was given
+        """
+        if self._file is None and self.directory is not None:
+            self.open(os.path.join(self.directory, CAPTURE_FILE.format(player_id)))
+
+    def flush(self):
+        """
+        Makes everything captured so far readable, called by Game.end_turn
+        """
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+def start(path=None, directory=None):
+    """
+    Captures the input read from now on, call before creating the Game
+    :param path: The capture file
+    :param directory: Where the Game writes bot-<player id>.input.gz when no path is given
+    :return: The InputCapture, None when replaying a capture
+    """
+    global _active
+    if _replaying:
+        return None
+    capture = InputCapture(path, directory)
+    capture.source = common.set_input(capture)
+    _active = capture
+    return capture
+
+
+def from_environment():
+    """
+    :return: The capture started by the bot, else one writing to the HLT_CAPTURE directory if set, else None
+    """
+    if _active is not None or _replaying:
+        return _active
+    directory = os.environ.get(CAPTURE_ENV)
+    return start(directory=directory) if directory else None
+
+
+def read_capture(path):
+    """
+    :param path: A capture file
+    :return: Its lines, up to the last complete one if the file was cut short
+    """
+    lines = []
+    with gzip.open(path, "rt") as capture:
+        try:
+            for line in capture:
+                if line.endswith("\n"):
+                    lines.append(line[:-1])
+        except EOFError:
+            pass
+    return lines
+
+
+@contextlib.contextmanager
+def replaying(lines):
+    """
+    Feeds lines to read_input and discards what the bot prints, for the duration of the block
+    :return: The input source, whose remaining() tells how many lines are left
+    """
+    global _replaying
+    source = common.InputLines(lines)
+    previous = common.set_input(source)
+    _replaying = True
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield source
+    finally:
+        _replaying = False
+        common.set_input(previous)
+
+
+def replay(path, play_turn, setup=None, name="replay"):
+    """
+    Plays a captured game with a bot written as functions, at full speed
+    :param path: A capture file
+    :param play_turn: Called with the Game every turn, returns the commands (which are discarded)
+    :param setup: Called with the Game before ready, if given
+    :param name: The name given to ready
+    :return: The Game at the last turn, whose timer holds the time of every turn
+    """
+    from .networking import Game
+    with replaying(read_capture(path)) as source:
+        game = Game()
+        if setup is not None:
+            setup(game)
+        game.ready(name)
+        try:
+            while source.remaining():
+                game.update_frame()
+                game.end_turn(play_turn(game))
+        except SystemExit:
+            # The last frame was cut short
+            pass
+    return game
+
+
+def replay_script(path, bot_path, argv=()):
+    """
+    Plays a captured game with a bot script (e.g. MyBot.py), run as __main__ until it runs out of input
+    :param path: A capture file
+    :param bot_path: The bot script
+    :param argv: Arguments of the bot (its sys.argv[1:])
+    :return: The wall time of the game in seconds
+    """
+    import runpy
+    lines = read_capture(path)
+    previous_argv = sys.argv
+    sys.argv = [bot_path] + list(argv)
+    start_time = time.perf_counter()
+    try:
+        with replaying(lines):
+            runpy.run_path(bot_path, run_name="__main__")
+    except SystemExit:
+        pass
+    finally:
+        sys.argv = previous_argv
+    return time.perf_counter() - start_time
+
+
+def main(argv=None):
+    import argparse
+    import tempfile
+    from .timing import TIMINGS_ENV, TIMINGS_FILE, read_timings, summarize_turns
+    parser = argparse.ArgumentParser(description="Replay a captured engine input into a bot, without the engine.")
+    parser.add_argument("bot_path", help="the bot script, e.g. MyBot.py")
+    parser.add_argument("capture_path", help="the capture, e.g. bot-0.input.gz")
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="times the game is replayed")
+    parser.add_argument("--profile", default=None, help="write cProfile stats of the replays to this file")
+    args = parser.parse_args(argv)
+
+    player_id = int(read_capture(args.capture_path)[1].split()[1])
+    os.environ.pop(CAPTURE_ENV, None)
+    timings = tempfile.mkdtemp()
+    os.environ[TIMINGS_ENV] = timings
+    profile = None
+    if args.profile:
+        import cProfile
+        profile = cProfile.Profile()
+    for game in range(args.repeat):
+        if profile is not None:
+            profile.enable()
+        seconds = replay_script(args.capture_path, args.bot_path)
+        if profile is not None:
+            profile.disable()
+        timings_path = os.path.join(timings, TIMINGS_FILE.format(player_id))
+        summary = summarize_turns(read_timings(timings_path))
+        os.remove(timings_path)
+        print("game {}: {:.2f} s, {} turns, p50 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms".format(
+            game, seconds, summary["turns"], summary["p50_ms"] or 0, summary["p99_ms"] or 0, summary["max_ms"] or 0))
+    os.rmdir(timings)
+    if profile is not None:
+        import pstats
+        profile.dump_stats(args.profile)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+
+
+if __name__ == "__main__":
+    # The bot's Game sees hlt.capture, not this copy run as __main__
+    from hlt.capture import main
+    main()
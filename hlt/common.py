@@ -1,5 +1,44 @@
 import logging
 
+# Where read_input gets lines from: standard input, unless replaced with set_input (e.g. by hlt.sim)
+_input = input
+
+
+def set_input(source=None):
+    """
+    Replaces the source of the engine input read by the Game objects
+    :param source: Callable returning the next line and raising EOFError when there are none left,
+        None to read from standard input again
+    :return: The previous source
+    """
+    global _input
+    previous = _input
+    _input = source or input
+    return previous
+
+
+class InputLines:
+    """
+    An input source for set_input reading from a list of lines, e.g. the engine input of a simulated or
+    captured game
+    """
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.index = 0
+
+    def __call__(self):
+        if self.index >= len(self.lines):
+            raise EOFError("No more input")
+        self.index += 1
+        return self.lines[self.index - 1]
+
+    def remaining(self):
+        """
+        :return: The number of lines not read yet
+        """
+        return len(self.lines) - self.index
+
+
 # Placed here to avoid circular imports
 def read_input():
     """
@@ -7,7 +46,7 @@ def read_input():
     :return: input read
     """
     try:
-        return input()
+        return _input()
     except EOFError as eof:
         logging.shutdown()
         raise SystemExit(eof)
@@ -9,7 +9,7 @@ def load_constants(constants):
     """
     Load constants from JSON given by the game engine.
     """
-    global SHIP_COST, DROPOFF_COST, MAX_HALITE, MAX_TURNS
+    global SHIP_COST, DROPOFF_COST, MAX_HALITE, MAX_CELL_PRODUCTION, MAX_TURNS
     global EXTRACT_RATIO, MOVE_COST_RATIO
     global INSPIRATION_ENABLED, INSPIRATION_RADIUS, INSPIRATION_SHIP_COUNT
     global INSPIRED_EXTRACT_RATIO, INSPIRED_BONUS_MULTIPLIER, INSPIRED_MOVE_COST_RATIO
@@ -23,6 +23,9 @@ def load_constants(constants):
     """The maximum amount of halite a ship can carry."""
     MAX_HALITE = constants['MAX_ENERGY']
 
+    """The maximum amount of halite a cell is generated with."""
+    MAX_CELL_PRODUCTION = constants['MAX_CELL_PRODUCTION']
+
     """
     The maximum number of turns a game can last. This reflects the fact
     that smaller maps play for fewer turns.
@@ -1,2 +1,6 @@
 from hlt.data.utils import *
 from hlt.data.generator import *
+from hlt.data.index import *
+from hlt.data.dense_generator import *
+from hlt.data.shards import *
+from hlt.data.splits import *
@@ -0,0 +1,118 @@
+import numpy as np
+from hlt.data.generator import Generator
+from hlt.data.utils import get_rotated_direction
+from hlt.encoders.dense import MOVE_MAPPING
+from json.decoder import JSONDecodeError
+
+def rotate_dense(maps: np.array, targets: np.array, num_rotations: int) -> (np.array, np.array):
+	""" Rotates a full-map input and its targets by num_rotations 90-degree counter-clockwise rotations,
+		relabeling the moves so they stay consistent with the rotated map
+	"""
+	maps = np.rot90(maps, k=num_rotations, axes=(0, 1))
+	rotated = np.rot90(targets, k=num_rotations, axes=(0, 1))
+	targets = np.zeros_like(rotated)
+	for move, idx in MOVE_MAPPING.items():
+		targets[:, :, MOVE_MAPPING[get_rotated_direction(move, num_rotations)]] = rotated[:, :, idx]
+	return maps, targets
+
+class DenseGenerator(Generator):
+	def __init__(
+		self,
+		replay_folder: str,
+		player_name,
+		prob_include_frame:float=0.2,
+		batch_size:int=16,
+		start_frame_perc:float=0.0,
+		end_frame_perc:float=1.0,
+		rotate:bool=True,
+		index=None,
+		map_width:int=None,
+		map_height:int=None,
+		split=None,
+		folds:[int]=None,) -> (dict, np.array):
+		""""
+			Full-map input generator for training a fully convolutional network (see hlt.models.dense).
+			Every sample is a whole frame with the moves of all of the player's ships, so a batch holds
+			batch_size frames rather than batch_size ships. Frames are bucketed by map size so each batch has one shape.
+			inputs:
+				replay_folder (str): 						directory that stores .json games
+				player_name (str or callable): 				name of the player or a player selector (see hlt.data.selectors)
+				prob_include_frame (float - default 0.2): 	probability to include a frame when aggregating frames
+				batch_size (int - default 16):				number of frames in a training batch
+				start_frame_perc (float - default 0.0):   	the frame percent to start on (e.g. 0.2 means start 20% through the game)
+				end_frame_perc (float - default 1.0):     	the frame percent to end on (e.g. 0.9 means end after 90% of game is through)
+				rotate (boolean - default True):			randomly rotate frames (and their moves)
+				index (GameIndex - optional):				prebuilt metadata index used to resolve player_name
+				map_width (int - optional):					only sample games with this map width
+				map_height (int - optional):				only sample games with this map height
+				split (SplitManifest - optional):			train/validation split of the games (see hlt.data.splits)
+				folds (list - optional):					only sample the games (or players) of these folds of the split
+
+			outputs:
+				[{"maps"}, outs]
+
+				maps:	(None, height, width, 4)	[halite, ships, structures, cargos] (see hlt.encoders.dense.DenseEncoder)
+				outs:	(None, height, width, 5)	one-hot move (north, south, east, west, still) on the player's ships, zeros elsewhere
+		"""
+		super().__init__(
+			encoder_name="dense",
+			replay_folder=replay_folder,
+			player_name=player_name,
+			radius=0,
+			prob_include_frame=prob_include_frame,
+			batch_size=batch_size,
+			start_frame_perc=start_frame_perc,
+			end_frame_perc=end_frame_perc,
+			equal_move_prob=False,
+			rotate=rotate,
+			index=index,
+			map_width=map_width,
+			map_height=map_height,
+			split=split,
+			folds=folds)
+		self.buckets = {} # map shape -> [(maps, targets), ...]
+
+	@property
+	def output_shape(self):
+		return (None, None, self.encoder.num_planes)
+
+	def __next__(self):
+		while True:
+			file_path, player_ids = self.games[np.random.randint(len(self.games))]
+
+			try:
+				encoded = self._encode(file_path)
+			except JSONDecodeError:
+				continue
+
+			if player_ids is None:
+				player_id = encoded["players"][self.player_name]
+			else:
+				player_id = player_ids[np.random.randint(len(player_ids))]
+			num_frames = encoded["num_frames"]
+
+			for num_frame in range(num_frames):
+				perc_frame = num_frame / float(num_frames)
+				if perc_frame < self.start_frame_perc:
+					continue
+				elif perc_frame > self.end_frame_perc:
+					break
+
+				if np.random.random() > self.prob_include_frame:
+					continue
+
+				maps, targets = self.encoder.encode_frame(encoded=encoded, num_frame=num_frame, player_id=player_id)
+				if not targets.any():
+					continue
+
+				if self.rotate:
+					maps, targets = rotate_dense(maps=maps, targets=targets, num_rotations=np.random.randint(4))
+
+				bucket = self.buckets.setdefault(maps.shape, [])
+				bucket.append((maps, targets))
+
+				if len(bucket) == self.batch_size:
+					del self.buckets[maps.shape]
+					inputs = {"maps": np.stack([m for m, _ in bucket], axis=0)}
+					outputs = np.stack([t for _, t in bucket], axis=0)
+					return inputs, outputs
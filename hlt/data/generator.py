@@ -1,8 +1,13 @@
 import os
+import re
 import numpy as np
 from hlt.data.utils import one_hot, create_arr, get_move_counts, get_rotated_direction
 from hlt.encoders.base import get_encoder_by_name
 from hlt.encoders.utils import roll_and_crop
+from hlt.data.index import GameIndex
+from hlt.data.shards import ShardIndex
+from hlt.data.splits import SplitManifest, BY_PLAYER
+from hlt.data.selectors import by_name
 from json.decoder import JSONDecodeError
 
 class Generator:
@@ -10,7 +15,7 @@ class Generator:
 		self,
 		encoder_name: str,
 		replay_folder: str, 
-		player_name: str,
+		player_name,
 		radius: int,
 		prob_include_frame:float=0.2,
 		prob_include_ship:float=0.2,
@@ -18,13 +23,18 @@ class Generator:
 		start_frame_perc:float=0.0,
 		end_frame_perc:float=1.0,
 		equal_move_prob:bool=True,
-		rotate:bool=True,) -> (dict, np.array):
+		rotate:bool=True,
+		index:GameIndex=None,
+		map_width:int=None,
+		map_height:int=None,
+		split:SplitManifest=None,
+		folds:[int]=None,) -> (dict, np.array):
 		""""
 			Input generator for training a neural network
 			inputs:
 				encoder_name (str):							name of the encoder to use
 				replay_folder (str): 						directory that stores .hlt games
-				player_name (str): 							name of the player you want to create a training set for
+				player_name (str or callable): 				name of the player you want to create a training set for or a player selector (see hlt.data.selectors)
 				radius (int): 								how many squares to consider in each direction
 				prob_include_frame (float - default 0.2): 	probability to include a frame when aggregating frames 
 				prob_include_ship (float - default 0.2):  	probability to include a ship when aggregating ships from frames 
@@ -32,6 +42,12 @@ class Generator:
 				start_frame_perc (float - default 0.0):   	the frame percent to start on (e.g. 0.2 means start 20% through the game)	
 				end_frame_perc (float - default 1.0):     	the frame percent to start on (e.g. 0.9 means end after 90% of game is through)
 				equal_move_prob (boolean):					if True, this provided an equal sampling of all possible moves
+				index (GameIndex - optional):				prebuilt metadata index used to resolve player_name, built on demand for selectors.
+															A ShardIndex (see hlt.data.shards) samples already encoded games from its shards
+				map_width (int - optional):					only sample games with this map width (requires an index)
+				map_height (int - optional):				only sample games with this map height (requires an index)
+				split (SplitManifest - optional):			train/validation split of the games (see hlt.data.splits)
+				folds (list - optional):					only sample the games (or players) of these folds of the split
 			
 			outputs:
 				[{"maps", "move_costs", "halites", "ships", "dropoffs", "cargos"}, outs]
@@ -45,7 +61,6 @@ class Generator:
 				outs:     	(None, 5),			   			                one-hot vector of move (north, south, east, west, still)
 				
 		"""
-		# TODO: Make player_name into a lambda to allow for things like winning player
 		# TODO: Implement lookback
 		
 		# user defined specs
@@ -65,38 +80,64 @@ class Generator:
 		self.num_move_types = len(self.move_mapping)
 		self.equal_move_prob = equal_move_prob
 		self.rotate = rotate
+
+		# games to sample from as (file_path, [player_id, ...]); player ids of None are resolved by name once encoded
+		per_player_split = split is not None and split.by == BY_PLAYER
+		if index is None and (callable(player_name) or map_width is not None or map_height is not None or per_player_split):
+			index = GameIndex(replay_folder).build()
+		self.index = index
+		if isinstance(index, ShardIndex) and index.encoder_name not in (None, encoder_name):
+			# shards hold the output of encode_from_dict, which subclasses of the shard encoder inherit
+			if not isinstance(self.encoder, type(get_encoder_by_name(index.encoder_name))):
+				raise ValueError("Shards in {} were encoded with {}, not {}".format(index.replay_folder, index.encoder_name, encoder_name))
+		if index is not None:
+			selector = player_name if callable(player_name) else by_name(re.escape(player_name))
+			self.games = index.select(selector, width=map_width, height=map_height)
+		else:
+			self.games = [("{}/{}".format(replay_folder, f), None) for f in os.listdir(replay_folder) if f.endswith(".json")]
+		if split is not None:
+			self.games = split.select(self.games, folds if folds is not None else range(split.num_folds))
+		if not self.games:
+			raise ValueError("No games found in {} for the selected players".format(replay_folder))
 	
 	@property
 	def output_shape(self):
 		return (self.radius * 2 + 1, self.radius * 2 + 1, 4)
+
+	def _encode(self, file_path: str) -> dict:
+		""" Encodes a sampled game, or loads it from its shard """
+		if isinstance(self.index, ShardIndex):
+			return self.index.load_game(file_path)
+		return self.encoder.encode_from_file(path=file_path)
 		
 	def __next__(self):
 		# TODO: encode inspired pane
 		map_shape = self.radius * 2 + 1, self.radius * 2 + 1
 		num_classes = 5
 
-		out_cargos   	= np.zeros(shape=(self.batch_size, 1), dtype=np.float)
-		# out_num_move   	= np.zeros(shape=(self.batch_size, 1), dtype=np.float)
-		out_moves    	= np.zeros(shape=(self.batch_size, num_classes), dtype=np.float)
-		out_halites  	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float)
-		out_ships    	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float)
-		out_dropoffs 	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float)
-		out_move_costs 	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float)
-		out_maps	 	= np.zeros(shape=(self.batch_size, *map_shape, 4), dtype=np.float)
+		out_cargos   	= np.zeros(shape=(self.batch_size, 1), dtype=np.float64)
+		# out_num_move   	= np.zeros(shape=(self.batch_size, 1), dtype=np.float64)
+		out_moves    	= np.zeros(shape=(self.batch_size, num_classes), dtype=np.float64)
+		out_halites  	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float64)
+		out_ships    	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float64)
+		out_dropoffs 	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float64)
+		out_move_costs 	= np.zeros(shape=(self.batch_size, *map_shape, 1), dtype=np.float64)
+		out_maps	 	= np.zeros(shape=(self.batch_size, *map_shape, 4), dtype=np.float64)
 
 		ct = 0
-		available_files = [f for f in os.listdir(self.replay_folder) if f.endswith(".json")]
 
 		while True:
-			file_name = np.random.choice(available_files, size=1)[0]
-			file_path = "{}/{}".format(self.replay_folder, file_name)
+			file_path, player_ids = self.games[np.random.randint(len(self.games))]
 			
 			try:
-				encoded = self.encoder.encode_from_file(path=file_path)
+				encoded = self._encode(file_path)
 			except JSONDecodeError:
 				continue
 
-			player_id = encoded["players"][self.player_name]
+			if player_ids is None:
+				player_id = encoded["players"][self.player_name]
+			else:
+				player_id = player_ids[np.random.randint(len(player_ids))]
 			num_frames = encoded["num_frames"]
 			constants = encoded["constants"]
 
@@ -0,0 +1,133 @@
+import os
+import json
+from json.decoder import JSONDecodeError
+
+INDEX_FILE_NAME = "index.jsonl"
+
+def get_player_name(name: str) -> str:
+	""" Strips the version suffix from an engine player name (e.g. "teccles v5" -> "teccles").
+		Mirrors the naming used by HistoricEncoder so names resolve the same way in both places
+	"""
+	return " ".join(name.split()[:-1])
+
+def get_game_metadata(historic: dict) -> dict:
+	""" Extracts the per-game metadata stored in the index from a parsed replay
+		inputs:
+			historic (dict):	replay as loaded from the engine json
+		outputs:
+			metadata (dict):	{"width", "height", "num_players", "num_turns", "seed", "players"}
+								where players is a list of {"player_id", "name", "full_name", "rank", "final_halite"}
+	"""
+	production_map = historic["production_map"]
+	statistics = {str(s["player_id"]): s for s in historic.get("game_statistics", {}).get("player_statistics", [])}
+
+	players = []
+	for player in historic["players"]:
+		player_id = str(player["player_id"])
+		player_statistics = statistics.get(player_id, {})
+		players.append({
+			"player_id": 	player_id,
+			"name": 		get_player_name(player["name"]),
+			"full_name": 	player["name"],
+			"rank": 		player_statistics.get("rank"),
+			"final_halite": player_statistics.get("final_production")
+		})
+
+	return {
+		"width": 		production_map["width"],
+		"height": 		production_map["height"],
+		"num_players": 	len(players),
+		"num_turns": 	len(historic["full_frames"]),
+		"seed": 		historic.get("map_generator_seed"),
+		"players": 		players
+	}
+
+class GameIndex:
+	def __init__(self, replay_folder: str, index_path: str = None):
+		""" Per-game metadata index for a folder of replays. Each replay is opened once when the index is
+			built and afterwards players can be selected (see hlt.data.selectors) without parsing any replay.
+			inputs:
+				replay_folder (str): 	directory that stores .json games
+				index_path (str): 		where the index is persisted (default: <replay_folder>/index.jsonl)
+		"""
+		self.replay_folder = replay_folder
+		self.index_path = index_path or os.path.join(replay_folder, INDEX_FILE_NAME)
+		self.entries = {}
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __iter__(self):
+		return iter(self.entries.values())
+
+	def load(self) -> "GameIndex":
+		""" Loads a previously saved index, if any """
+		self.entries = {}
+		if os.path.exists(self.index_path):
+			with open(self.index_path, "r") as f:
+				for line in f:
+					line = line.strip()
+					if line:
+						entry = json.loads(line)
+						self.entries[entry["file"]] = entry
+		return self
+
+	def save(self) -> None:
+		with open(self.index_path, "w") as f:
+			for entry in self.entries.values():
+				f.write(json.dumps(entry) + "\n")
+
+	def build(self, save: bool = True, verbose: bool = False) -> "GameIndex":
+		""" Incrementally (re)builds the index. Only replays that are new or changed since the last build are opened
+			inputs:
+				save (bool - default True): 	persist the index once built
+				verbose (bool - default False):	print progress
+		"""
+		if not self.entries:
+			self.load()
+
+		available_files = sorted(f for f in os.listdir(self.replay_folder) if f.endswith(".json"))
+		entries = {}
+		num_files = len(available_files)
+		for num_file, file_name in enumerate(available_files):
+			stat = os.stat(os.path.join(self.replay_folder, file_name))
+			entry = self.entries.get(file_name)
+			if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+				try:
+					with open(os.path.join(self.replay_folder, file_name), "r") as f:
+						entry = get_game_metadata(json.load(f))
+				except (JSONDecodeError, KeyError):
+					continue
+				entry.update({"file": file_name, "size": stat.st_size, "mtime": stat.st_mtime})
+			entries[file_name] = entry
+			if verbose:
+				print("\r{} / {}".format(num_file + 1, num_files), end="")
+		if verbose:
+			print()
+
+		self.entries = entries
+		if save:
+			self.save()
+		return self
+
+	def filter(self, width: int = None, height: int = None, num_players: int = None) -> [dict]:
+		""" Returns the index entries matching the given map size and/or number of players """
+		return [e for e in self.entries.values()
+				if (width is None or e["width"] == width)
+				and (height is None or e["height"] == height)
+				and (num_players is None or e["num_players"] == num_players)]
+
+	def select(self, selector, width: int = None, height: int = None, num_players: int = None) -> [(str, [str])]:
+		""" Resolves a player selector against the index
+			inputs:
+				selector (callable): 	function taking an index entry and returning the selected player ids (see hlt.data.selectors)
+				width, height, num_players (int - optional): restricts the games considered
+			outputs:
+				[(file_path, [player_id, ...]), ...] for every game with at least one selected player
+		"""
+		selected = []
+		for entry in self.filter(width=width, height=height, num_players=num_players):
+			player_ids = selector(entry)
+			if player_ids:
+				selected.append((os.path.join(self.replay_folder, entry["file"]), player_ids))
+		return selected
@@ -0,0 +1,113 @@
+""" Download to shard pipeline: replays are fetched, decoded and encoded in flight and appended to training shards
+	(see hlt.data.shards), without writing replays to disk.
+	Network threads fetch the compressed replays, decode worker processes decompress, parse and encode them,
+	and a single writer (the calling thread) appends them to the shards. At most max_in_flight replays are
+	fetched or being decoded at once, so memory stays bounded whatever the number of replays.
+	e.g.
+		from hlt_client.download_game import DatedGameDownloader
+		downloader = DatedGameDownloader(destination, "20181201")
+		download_to_shards(downloader.objects, downloader.fetch, "hlt/games/shards", game_id=downloader._parse_id_from_url)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from hlt.data.index import get_game_metadata
+from hlt.data.shards import ShardWriter
+from hlt.encoders.base import get_encoder_by_name
+from hlt.replay import decode_replay
+
+def decode(game_id: str, payload: bytes, encoder_name: str) -> (str, dict, dict):
+	""" Decompresses, parses and encodes a replay (runs in the decode workers)
+		inputs:
+			game_id (str):			unique name of the game
+			payload (bytes):		the replay, zstd compressed or not
+			encoder_name (str):		name of the encoder to use
+		outputs:
+			(game_id, metadata, encoded) with metadata as stored in a GameIndex
+	"""
+	historic = decode_replay(payload)
+	return game_id, get_game_metadata(historic), get_encoder_by_name(encoder_name).encode_from_dict(historic)
+
+def download_to_shards(
+	urls: [str],
+	fetch,
+	shard_folder: str,
+	encoder_name: str = "historic",
+	game_id = os.path.basename,
+	fetch_workers: int = 16,
+	decode_workers: int = None,
+	max_in_flight: int = None,
+	games_per_shard: int = 256,
+	verbose: bool = True) -> ([str], [str]):
+	""" Fetches replays and appends them encoded to shards, skipping the games already in the shards
+		inputs:
+			urls (list):							urls of the replays
+			fetch (callable):						returns the bytes of the replay at a url (e.g. GameDownloader.fetch)
+			shard_folder (str):						directory of the shards
+			encoder_name (str - default historic):	name of the encoder to use
+			game_id (callable):						returns the unique name of the game at a url
+			fetch_workers (int - default 16):		number of network threads
+			decode_workers (int - optional):		number of decode processes (default: number of cores), 0 to decode in the writer
+			max_in_flight (int - optional):			replays fetched or decoded at once (default: 2 * (fetch_workers + decode_workers))
+			games_per_shard (int - default 256):	games in a shard before the next one is started
+			verbose (bool - default True):			print progress
+		outputs:
+			(written, failed) game ids of the games added to the shards and of the games that could not be fetched or decoded
+	"""
+	decode_workers = os.cpu_count() if decode_workers is None else decode_workers
+	max_in_flight = max_in_flight or 2 * (fetch_workers + max(decode_workers, 1))
+	written, failed = [], []
+
+	with ShardWriter(shard_folder, encoder_name, games_per_shard) as writer, \
+			ThreadPoolExecutor(max_workers=fetch_workers) as fetchers, \
+			ProcessPoolExecutor(max_workers=max(decode_workers, 1)) as decoders:
+		todo = [(game_id(url), url) for url in urls if game_id(url) not in writer]
+		pending = iter(todo)
+		num_games = len(urls)
+		num_done = num_games - len(todo)
+		fetching, decoding = {}, {}
+
+		def fill():
+			if len(fetching) + len(decoding) >= max_in_flight:
+				return
+			for name, url in pending:
+				fetching[fetchers.submit(fetch, url)] = name
+				if len(fetching) + len(decoding) >= max_in_flight:
+					return
+
+		def finish(name, result):
+			nonlocal num_done
+			if result is None:
+				failed.append(name)
+			else:
+				writer.add(*result)
+				written.append(name)
+			num_done += 1
+			if verbose:
+				print("\r{} / {}".format(num_done, num_games), end="")
+
+		fill()
+		while fetching or decoding:
+			done, _ = wait(list(fetching) + list(decoding), return_when=FIRST_COMPLETED)
+			for future in done:
+				if future in fetching:
+					name = fetching.pop(future)
+					if future.exception() is not None:
+						finish(name, None)
+					elif decode_workers:
+						decoding[decoders.submit(decode, name, future.result(), encoder_name)] = name
+					else:
+						try:
+							result = decode(name, future.result(), encoder_name)
+						except Exception:
+							result = None
+						finish(name, result)
+				else:
+					name = decoding.pop(future)
+					finish(name, None if future.exception() is not None else future.result())
+			fill()
+	if verbose:
+		print()
+		if failed:
+			print("{} replays could not be fetched or decoded, run again to retry them".format(len(failed)))
+	return written, failed
@@ -0,0 +1,57 @@
+""" Player selectors used to pick which players of a game to build a training set for.
+	A selector is a function taking a GameIndex entry (see hlt.data.index) and returning a list of player ids.
+	e.g.
+		all_of(winner(), by_name("teccles|nastybit"))
+"""
+
+import re
+
+def by_name(pattern: str):
+	""" Selects players whose name (version suffix stripped) fully matches a regex """
+	regex = re.compile(pattern)
+	def selector(game: dict) -> [str]:
+		return [p["player_id"] for p in game["players"] if regex.fullmatch(p["name"])]
+	return selector
+
+def by_rank(max_rank: int):
+	""" Selects players that finished with a rank of max_rank or better (1 is the winner) """
+	def selector(game: dict) -> [str]:
+		return [p["player_id"] for p in game["players"] if p["rank"] is not None and p["rank"] <= max_rank]
+	return selector
+
+def winner():
+	""" Selects the winning player """
+	return by_rank(1)
+
+def top_k(k: int):
+	""" Selects the k players with the most final halite """
+	def selector(game: dict) -> [str]:
+		players = [p for p in game["players"] if p["final_halite"] is not None]
+		players.sort(key=lambda p: p["final_halite"], reverse=True)
+		return [p["player_id"] for p in players[:k]]
+	return selector
+
+def min_halite(amount: int):
+	""" Selects players that finished with at least amount halite """
+	def selector(game: dict) -> [str]:
+		return [p["player_id"] for p in game["players"] if p["final_halite"] is not None and p["final_halite"] >= amount]
+	return selector
+
+def all_of(*selectors):
+	""" Selects players picked by every one of the given selectors """
+	def selector(game: dict) -> [str]:
+		selected = None
+		for s in selectors:
+			player_ids = s(game)
+			selected = player_ids if selected is None else [p for p in selected if p in player_ids]
+		return selected or []
+	return selector
+
+def any_of(*selectors):
+	""" Selects players picked by at least one of the given selectors """
+	def selector(game: dict) -> [str]:
+		selected = []
+		for s in selectors:
+			selected.extend(p for p in s(game) if p not in selected)
+		return selected
+	return selector
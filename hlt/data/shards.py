@@ -0,0 +1,113 @@
+import os
+import json
+import pickle
+from hlt.data.index import GameIndex
+
+SHARD_INDEX_FILE_NAME = "shards.jsonl"
+SHARD_FILE_FORMAT = "shard-{:05d}.pkl"
+
+class ShardWriter:
+	def __init__(self, shard_folder: str, encoder_name: str, games_per_shard: int = 256):
+		""" Appends encoded games to shard files, each holding games_per_shard pickled games one after the other,
+			and records every game in a shard index (see ShardIndex). Writing to an existing folder continues
+			in a new shard, so interrupted runs resume without rewriting anything.
+			inputs:
+				shard_folder (str): 					directory of the shards and their index
+				encoder_name (str): 					encoder the games were encoded with
+				games_per_shard (int - default 256):	games in a shard before the next one is started
+		"""
+		os.makedirs(shard_folder, exist_ok=True)
+		self.shard_folder = shard_folder
+		self.encoder_name = encoder_name
+		self.games_per_shard = games_per_shard
+		self.index = ShardIndex(shard_folder).load()
+		self.num_shards = len(set(e["shard"] for e in self.index))
+		self._shard = None
+		self._shard_name = None
+		self._shard_games = 0
+		self._index_file = open(self.index.index_path, "a")
+
+	def __contains__(self, game_id: str) -> bool:
+		return game_id in self.index.entries
+
+	def add(self, game_id: str, metadata: dict, encoded: dict) -> dict:
+		""" Appends an encoded game to the current shard
+			inputs:
+				game_id (str): 		unique name of the game (e.g. the replay file name)
+				metadata (dict):	index metadata of the game (see hlt.data.index.get_game_metadata)
+				encoded (dict):		the encoded game
+			outputs:
+				entry (dict):		the game's index entry
+		"""
+		if self._shard is None or self._shard_games == self.games_per_shard:
+			self._next_shard()
+		entry = dict(metadata, file=game_id, shard=self._shard_name, offset=self._shard.tell(), encoder=self.encoder_name)
+		pickle.dump(encoded, self._shard, protocol=pickle.HIGHEST_PROTOCOL)
+		self._shard.flush()
+		self._shard_games += 1
+		# the index line is written once the game is in the shard, so the index never points past a shard's end
+		self._index_file.write(json.dumps(entry) + "\n")
+		self._index_file.flush()
+		self.index.entries[game_id] = entry
+		return entry
+
+	def _next_shard(self):
+		if self._shard is not None:
+			self._shard.close()
+		self._shard_name = SHARD_FILE_FORMAT.format(self.num_shards)
+		self._shard = open(os.path.join(self.shard_folder, self._shard_name), "wb")
+		self._shard_games = 0
+		self.num_shards += 1
+
+	def close(self) -> None:
+		if self._shard is not None:
+			self._shard.close()
+			self._shard = None
+		self._index_file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+class ShardIndex(GameIndex):
+	def __init__(self, shard_folder: str, index_path: str = None):
+		""" Index of the games written by a ShardWriter. Entries are GameIndex entries with where the game is stored,
+			so players are selected the same way (see hlt.data.selectors) and a Generator given a ShardIndex
+			samples encoded games from the shards instead of encoding replays.
+			inputs:
+				shard_folder (str): 	directory of the shards
+				index_path (str): 		where the index is persisted (default: <shard_folder>/shards.jsonl)
+		"""
+		super().__init__(shard_folder, index_path or os.path.join(shard_folder, SHARD_INDEX_FILE_NAME))
+
+	@property
+	def encoder_name(self) -> str:
+		""" Encoder the games were encoded with, None for an empty index """
+		return next((e["encoder"] for e in self), None)
+
+	def build(self, save: bool = False, verbose: bool = False) -> "ShardIndex":
+		""" Shards are indexed as they are written, building only loads the index """
+		return self.load()
+
+	def load_game(self, file_path: str) -> dict:
+		""" Loads an encoded game
+			inputs:
+				file_path (str):	the game's path as returned by select, or its game id
+			outputs:
+				encoded (dict):		the game as encoded by the shard's encoder
+		"""
+		entry = self.entries[os.path.basename(file_path)]
+		with open(os.path.join(self.replay_folder, entry["shard"]), "rb") as f:
+			f.seek(entry["offset"])
+			return pickle.load(f)
+
+def iter_shard(path: str):
+	""" Iterates over the encoded games of a shard file in order """
+	with open(path, "rb") as f:
+		while True:
+			try:
+				yield pickle.load(f)
+			except EOFError:
+				return
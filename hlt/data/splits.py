@@ -0,0 +1,109 @@
+""" Train/validation splits recorded in a manifest instead of moving files.
+	Every game (or every player, for per-player splits) is assigned to a fold by a hash of its name, so a split is
+	deterministic, stable as games are added, and computed from the file names (or a GameIndex) without opening
+	or moving any replay. A Generator given a split only samples the games of the folds it is asked for.
+	e.g.
+		split = SplitManifest.from_folder("hlt/games/all", num_folds=5).save()
+		train_gen = Generator(..., split=split, folds=split.other_folds(0))
+		val_gen = Generator(..., split=split, folds=[0])
+"""
+
+import os
+import json
+import hashlib
+
+# Not ending with .json, so listings of the replays in the same folder leave it out
+SPLIT_FILE_NAME = "splits.manifest"
+BY_GAME = "game"
+BY_PLAYER = "player"
+
+def hash_fold(key: str, num_folds: int, salt: str = "") -> int:
+	""" Deterministic fold of a key, uniform over the folds whatever the key looks like """
+	digest = hashlib.sha1((salt + key).encode("utf-8")).digest()
+	return int.from_bytes(digest[:8], "big") % num_folds
+
+class SplitManifest:
+	def __init__(self, num_folds: int = 5, by: str = BY_GAME, salt: str = "", folds: dict = None, path: str = None):
+		""" Assignment of games (or of the players of games) to folds
+			inputs:
+				num_folds (int - default 5):	number of folds, e.g. 5 for k-fold or 10 for a 90/10 split
+				by (str - default "game"):		"game" to assign whole games to a fold, "player" to assign every player (by name)
+												to a fold, so validation players are never seen in training
+				salt (str - default ""):		changes the assignment, for another split of the same games
+				folds (dict - optional):		the assignment, {file: fold} by game or {file: {player_id: fold}} by player
+				path (str - optional):			where the manifest is saved
+		"""
+		if by not in (BY_GAME, BY_PLAYER):
+			raise ValueError("Unknown split {}, expected {} or {}".format(by, BY_GAME, BY_PLAYER))
+		self.num_folds = num_folds
+		self.by = by
+		self.salt = salt
+		self.folds = folds or {}
+		self.path = path
+
+	@classmethod
+	def from_folder(cls, replay_folder: str, num_folds: int = 5, salt: str = "", file_ext: str = ".json") -> "SplitManifest":
+		""" Splits the games of a folder by game, from the file names only """
+		files = sorted(f for f in os.listdir(replay_folder) if f.lower().endswith(file_ext.lower()))
+		split = cls(num_folds=num_folds, by=BY_GAME, salt=salt, path=os.path.join(replay_folder, SPLIT_FILE_NAME))
+		split.folds = {f: hash_fold(f, num_folds, salt) for f in files}
+		return split
+
+	@classmethod
+	def from_index(cls, index, num_folds: int = 5, by: str = BY_GAME, salt: str = "") -> "SplitManifest":
+		""" Splits the games of a GameIndex (or a ShardIndex), by game or by player name """
+		split = cls(num_folds=num_folds, by=by, salt=salt, path=os.path.join(index.replay_folder, SPLIT_FILE_NAME))
+		for entry in index:
+			if by == BY_GAME:
+				split.folds[entry["file"]] = hash_fold(entry["file"], num_folds, salt)
+			else:
+				split.folds[entry["file"]] = {p["player_id"]: hash_fold(p["name"], num_folds, salt) for p in entry["players"]}
+		return split
+
+	@classmethod
+	def load(cls, path: str) -> "SplitManifest":
+		with open(path, "r") as f:
+			manifest = json.load(f)
+		return cls(num_folds=manifest["num_folds"], by=manifest["by"], salt=manifest["salt"], folds=manifest["folds"], path=path)
+
+	def save(self, path: str = None) -> "SplitManifest":
+		self.path = path or self.path
+		with open(self.path, "w") as f:
+			json.dump({"num_folds": self.num_folds, "by": self.by, "salt": self.salt, "folds": self.folds}, f)
+		return self
+
+	def other_folds(self, *folds: int) -> [int]:
+		""" The folds other than the given ones, e.g. the training folds of a validation fold """
+		return [fold for fold in range(self.num_folds) if fold not in folds]
+
+	def files(self, folds: [int]) -> [str]:
+		""" Files with at least one game (or player) in the given folds """
+		folds = set(folds)
+		if self.by == BY_GAME:
+			return [f for f, fold in self.folds.items() if fold in folds]
+		return [f for f, player_folds in self.folds.items() if folds.intersection(player_folds.values())]
+
+	def select(self, games: [(str, [str])], folds: [int]) -> [(str, [str])]:
+		""" Restricts games as sampled by a Generator to the given folds
+			inputs:
+				games (list):	[(file_path, [player_id, ...] or None), ...]
+				folds (list):	the folds to keep
+			outputs:
+				the games (and players, for per-player splits) in the folds. Games missing from the manifest are dropped
+		"""
+		folds = set(folds)
+		selected = []
+		for file_path, player_ids in games:
+			file_folds = self.folds.get(os.path.basename(file_path))
+			if file_folds is None:
+				continue
+			if self.by == BY_GAME:
+				if file_folds in folds:
+					selected.append((file_path, player_ids))
+				continue
+			if player_ids is None:
+				raise ValueError("Per-player splits need the players of every game, use a GameIndex")
+			player_ids = [p for p in player_ids if file_folds.get(p) in folds]
+			if player_ids:
+				selected.append((file_path, player_ids))
+		return selected
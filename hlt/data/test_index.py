@@ -0,0 +1,51 @@
+#test_index.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from hlt.data.index import GameIndex, get_player_name
+from hlt.data.selectors import by_name, by_rank, winner, top_k, min_halite, all_of, any_of
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(__file__), "..", "games", "sample")
+
+class GameIndexTestCase(unittest.TestCase):
+	""" Tests for data.index and data.selectors """
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		for f in os.listdir(SAMPLE_FOLDER):
+			shutil.copy(os.path.join(SAMPLE_FOLDER, f), self.folder)
+		self.index = GameIndex(self.folder).build()
+		self.game = next(iter(self.index))
+
+	def tearDown(self):
+		shutil.rmtree(self.folder)
+
+	def test_player_name(self):
+		self.assertEqual(get_player_name("teccles v5"), "teccles")
+
+	def test_metadata(self):
+		self.assertEqual(len(self.index), 1)
+		self.assertEqual((self.game["width"], self.game["height"]), (48, 48))
+		self.assertEqual(self.game["num_players"], 2)
+
+	def test_persisted(self):
+		loaded = GameIndex(self.folder).load()
+		self.assertDictEqual(loaded.entries, self.index.entries)
+
+	def test_selectors(self):
+		self.assertListEqual(by_name("teccles")(self.game), ["0"])
+		self.assertListEqual(by_name("tec")(self.game), [])
+		self.assertListEqual(winner()(self.game), ["1"])
+		self.assertListEqual(by_rank(2)(self.game), ["0", "1"])
+		self.assertListEqual(top_k(1)(self.game), ["1"])
+		self.assertListEqual(min_halite(19000)(self.game), ["1"])
+		self.assertListEqual(all_of(winner(), by_name("teccles"))(self.game), [])
+		self.assertListEqual(any_of(winner(), by_name("teccles"))(self.game), ["1", "0"])
+
+	def test_select_filters(self):
+		self.assertEqual(len(self.index.select(winner(), width=48)), 1)
+		self.assertEqual(len(self.index.select(winner(), width=64)), 0)
+
+if __name__ == "__main__":
+	unittest.main()
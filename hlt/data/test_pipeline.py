@@ -0,0 +1,74 @@
+#test_pipeline.py
+
+import os
+import shutil
+import tempfile
+import unittest
+import zstd
+import numpy as np
+from hlt.data.pipeline import download_to_shards
+from hlt.data.shards import ShardIndex, iter_shard
+from hlt.data.generator import Generator
+from hlt.data.selectors import winner
+from hlt.encoders.historic import HistoricEncoder
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(__file__), "..", "games", "sample")
+SAMPLE_FILE = os.path.join(SAMPLE_FOLDER, os.listdir(SAMPLE_FOLDER)[0])
+
+class PipelineTestCase(unittest.TestCase):
+	""" Tests for data.pipeline and data.shards, fetching copies of the sample replay from memory """
+	@classmethod
+	def setUpClass(cls):
+		with open(SAMPLE_FILE, "rb") as f:
+			cls.payload = zstd.compress(f.read())
+		cls.expected = HistoricEncoder().encode_from_file(SAMPLE_FILE)
+
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		self.fetched = []
+
+	def tearDown(self):
+		shutil.rmtree(self.folder)
+
+	def fetch(self, url):
+		self.fetched.append(url)
+		if url.endswith("missing"):
+			raise IOError("404")
+		return self.payload
+
+	def test_shards(self):
+		urls = ["bucket/game-{}".format(i) for i in range(5)] + ["bucket/missing"]
+		written, failed = download_to_shards(urls, self.fetch, self.folder, decode_workers=2, max_in_flight=3, games_per_shard=2, verbose=False)
+		self.assertEqual(sorted(written), ["game-{}".format(i) for i in range(5)])
+		self.assertEqual(failed, ["missing"])
+		self.assertEqual(sorted(f for f in os.listdir(self.folder) if f.endswith(".pkl")), ["shard-00000.pkl", "shard-00001.pkl", "shard-00002.pkl"])
+		self.assertEqual(len(list(iter_shard(os.path.join(self.folder, "shard-00000.pkl")))), 2)
+
+		index = ShardIndex(self.folder).build()
+		self.assertEqual(len(index), 5)
+		self.assertEqual(index.encoder_name, "historic")
+		encoded = index.load_game("game-3")
+		np.testing.assert_array_equal(encoded["halites"], self.expected["halites"])
+		self.assertEqual(encoded["moves"], self.expected["moves"])
+
+		# a second run only fetches what is missing
+		self.fetched = []
+		written, failed = download_to_shards(urls, self.fetch, self.folder, decode_workers=0, verbose=False)
+		self.assertEqual((written, failed, self.fetched), ([], ["missing"], ["bucket/missing"]))
+
+	def test_generator_reads_shards(self):
+		download_to_shards(["game-0"], self.fetch, self.folder, decode_workers=0, verbose=False)
+		index = ShardIndex(self.folder).build()
+		generator = Generator(encoder_name="historic", replay_folder=self.folder, player_name=winner(), radius=2, batch_size=8, index=index)
+		self.assertEqual(generator.games, [(os.path.join(self.folder, "game-0"), ["1"])])
+		self.assertEqual(generator._encode(generator.games[0][0])["moves"], self.expected["moves"])
+		# DenseEncoder inherits the historic encoding, so it reads historic shards but not the other way round
+		dense = Generator(encoder_name="dense", replay_folder=self.folder, player_name=winner(), radius=2, index=index)
+		self.assertEqual(dense._encode(dense.games[0][0])["moves"], self.expected["moves"])
+		dense_folder = os.path.join(self.folder, "dense")
+		download_to_shards(["game-0"], self.fetch, dense_folder, encoder_name="dense", decode_workers=0, verbose=False)
+		with self.assertRaises(ValueError):
+			Generator(encoder_name="historic", replay_folder=dense_folder, player_name=winner(), radius=2, index=ShardIndex(dense_folder).build())
+
+if __name__ == "__main__":
+	unittest.main()
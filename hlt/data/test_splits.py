@@ -0,0 +1,63 @@
+#test_splits.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from hlt.data.index import GameIndex
+from hlt.data.splits import SplitManifest, hash_fold, BY_PLAYER
+from hlt.data.generator import Generator
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(__file__), "..", "games", "sample")
+
+class SplitsTestCase(unittest.TestCase):
+	""" Tests for data.splits """
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		sample = os.listdir(SAMPLE_FOLDER)[0]
+		for i in range(3):
+			shutil.copy(os.path.join(SAMPLE_FOLDER, sample), os.path.join(self.folder, "{}-{}".format(i, sample)))
+		self.files = sorted(os.listdir(self.folder))
+
+	def tearDown(self):
+		shutil.rmtree(self.folder)
+
+	def test_hash_fold(self):
+		folds = [hash_fold("game-{}".format(i), 5) for i in range(1000)]
+		self.assertEqual(folds, [hash_fold("game-{}".format(i), 5) for i in range(1000)])
+		self.assertTrue(all(150 < folds.count(fold) < 250 for fold in range(5)))
+		self.assertNotEqual(folds, [hash_fold("game-{}".format(i), 5, salt="other") for i in range(1000)])
+
+	def test_by_game(self):
+		split = SplitManifest.from_folder(self.folder, num_folds=2).save()
+		loaded = SplitManifest.load(split.path)
+		self.assertEqual(loaded.folds, split.folds)
+		self.assertEqual(sorted(split.files([0]) + split.files([1])), self.files)
+		games = [(os.path.join(self.folder, f), None) for f in self.files]
+		self.assertEqual(len(split.select(games, [0])) + len(split.select(games, split.other_folds(0))), 3)
+
+	def test_resplit(self):
+		# the manifest saved in the replay folder is neither split nor sampled as a game
+		SplitManifest.from_folder(self.folder, num_folds=2).save()
+		split = SplitManifest.from_folder(self.folder, num_folds=2).save()
+		self.assertEqual(sorted(split.folds), self.files)
+		for generator in (Generator(encoder_name="historic", replay_folder=self.folder, player_name="teccles", radius=2, batch_size=4, split=split),
+				Generator(encoder_name="historic", replay_folder=self.folder, player_name="teccles", radius=2, batch_size=4)):
+			self.assertEqual(len(generator.games), 3)
+			inputs, moves = next(generator)
+			self.assertEqual(inputs["maps"].shape, (4, 5, 5, 4))
+			self.assertEqual(moves.shape, (4, 5))
+
+	def test_by_player(self):
+		split = SplitManifest.from_index(GameIndex(self.folder).build(), num_folds=4, by=BY_PLAYER)
+		player_folds = split.folds[self.files[0]]
+		# every game has the same players, so each player is in the same fold in every game
+		self.assertTrue(all(folds == player_folds for folds in split.folds.values()))
+		val_fold = player_folds["0"]
+		generator = Generator(encoder_name="historic", replay_folder=self.folder, player_name="teccles", radius=2, split=split, folds=[val_fold])
+		self.assertEqual(len(generator.games), 3)
+		with self.assertRaises(ValueError):
+			Generator(encoder_name="historic", replay_folder=self.folder, player_name="teccles", radius=2, split=split, folds=split.other_folds(val_fold))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,124 @@
+"""
+Scoring of every cell of the map as a dropoff site, in one vectorized pass (see GameMap.score_dropoffs).
+
+A dropoff at a cell saves the ships mining around it the trip back to the closest of our structures. For
+every cell, with d its distance to our closest structure and the halite within radius of it:
+    rate:       halite a ship mines per turn there, the mean halite within radius / EXTRACT_RATIO
+    saved:      share of a ship's time the dropoff saves, 2d / (2d + the turns to fill up at that rate)
+    gain:       halite per turn the dropoff brings, rate * saved for each of our ships within radius (at least
+                one, the builder), halved where an enemy structure is within radius as the halite is contested
+    cost:       DROPOFF_COST less the halite on the cell, which the builder collects
+    payback:    turns for the gain to cover the cost
+    score:      gain over the remaining turns less the cost, -inf on structures and within
+                MIN_DROPOFF_DISTANCE of our structures
+
+The halite within radius of every cell is kept across turns: only the cells within radius of a cell whose
+halite changed are updated. Distances to structures are recomputed only when structures are built.
+"""
+
+import numpy as np
+
+from . import constants
+from .precompute import DROPOFF_RADIUS, MIN_DROPOFF_DISTANCE, distance_table, distances_from, offsets_within, spread
+
+CONTESTED_FACTOR = 0.5
+
+
+class DropoffScorer:
+    """
+    Dropoff scores of every cell of a map, see the module docstring
+    """
+    def __init__(self, game_map, radius=DROPOFF_RADIUS):
+        """
+        :param game_map: The game map, whose halite is read from GameMap.halite_sums
+        :param radius: The distance from a dropoff of the halite it collects
+        """
+        self.game_map = game_map
+        self.radius = radius
+        self.distance_table = distance_table(game_map.width, game_map.height)
+        self._offsets = offsets_within(self.distance_table, radius)
+        self._halite = None
+        self._structures = None
+        self.halite = None
+        self.own_distance = None
+        self.enemy_distance = None
+        self.ships = None
+        self.gain = None
+        self.payback = None
+        self.scores = None
+
+    def _spread(self, ys, xs, values):
+        """
+        :return: The sum of values over the cells within radius of each (x, y), an array of shape (height, width)
+        """
+        return spread(self.distance_table.shape, self._offsets, ys, xs, values)
+
+    def _update_halite(self):
+        """
+        Updates the halite within radius around the cells whose halite changed since the last call
+        """
+        sums = self.game_map.halite_sums()
+        if self._halite is None:
+            self.halite = sums.diamond_sums(self.radius)
+            self._halite = sums.halite.copy()
+            return
+        ys, xs = np.nonzero(sums.halite != self._halite)
+        if len(ys):
+            self.halite += self._spread(ys, xs, sums.halite[ys, xs] - self._halite[ys, xs]).astype(np.int64)
+            self._halite[ys, xs] = sums.halite[ys, xs]
+
+    def _update_distances(self, me, players):
+        """
+        Distances to our closest structure and to the closest enemy one, recomputed when structures are built
+        """
+        def positions(player):
+            return [player.shipyard.position] + [dropoff.position for dropoff in player.get_dropoffs()]
+        own = positions(me)
+        enemy = [position for player in players if player.id != me.id for position in positions(player)]
+        structures = (tuple((p.x, p.y) for p in own), tuple((p.x, p.y) for p in enemy))
+        if structures != self._structures:
+            self._structures = structures
+            self.own_distance = distances_from(self.distance_table, own)
+            self.enemy_distance = distances_from(self.distance_table, enemy) if enemy \
+                else np.full(self.distance_table.shape, self.distance_table.max() + 1)
+
+    def score(self, me, players, turn_number):
+        """
+        :param me: Our Player
+        :param players: All Players, including me
+        :param turn_number: The current turn
+        :return: The scores, an array of shape (height, width), also stored with every term as attributes
+        """
+        players = list(players)
+        self._update_halite()
+        self._update_distances(me, players)
+        ships = me.get_ships()
+        self.ships = self._spread(np.array([ship.position.y for ship in ships], dtype=np.int64),
+                                  np.array([ship.position.x for ship in ships], dtype=np.int64),
+                                  np.ones(len(ships)))
+
+        rate = self.halite / float(len(self._offsets[0])) / constants.EXTRACT_RATIO
+        fill_turns = constants.MAX_HALITE / np.maximum(rate, 1.0)
+        saved = 2.0 * self.own_distance / (2.0 * self.own_distance + fill_turns)
+        self.gain = np.maximum(self.ships, 1.0) * rate * saved
+        self.gain[self.enemy_distance <= self.radius] *= CONTESTED_FACTOR
+
+        cost = np.maximum(constants.DROPOFF_COST - self.game_map.halite_sums().halite, 0)
+        self.payback = np.where(self.gain > 0, cost / np.maximum(self.gain, 1e-9), np.inf)
+        self.scores = self.gain * max(constants.MAX_TURNS - turn_number, 0) - cost
+        self.scores[(self.own_distance < MIN_DROPOFF_DISTANCE) | (self.enemy_distance == 0)] = -np.inf
+        return self.scores
+
+    def best(self, count=1, spacing=MIN_DROPOFF_DISTANCE):
+        """
+        :param count: The number of sites
+        :param spacing: The minimum distance between two sites
+        :return: The (x, y) of the best scored sites with a positive score, best first
+        """
+        remaining = self.scores.copy()
+        sites = []
+        while len(sites) < count and remaining.max() > 0:
+            y, x = np.unravel_index(np.argmax(remaining), remaining.shape)
+            sites.append((int(x), int(y)))
+            remaining[np.roll(self.distance_table, (y, x), axis=(0, 1)) < spacing] = -np.inf
+        return sites
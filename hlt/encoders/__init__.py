@@ -1,3 +1,4 @@
 from hlt.encoders.base import *
 from hlt.encoders.historic import *
 from hlt.encoders.utils import *
+from hlt.encoders.dense import *
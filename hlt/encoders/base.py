@@ -1,16 +1,14 @@
 import importlib
 import numpy as np
-import json
 
 class Encoder():
 	def name(self):
 		raise NotImplementedError()
 	
 	def encode_from_file(self, path: str) -> None:
-		with open(path,"r") as f:
-			raw = f.read()
-			game = json.loads(raw)
-		return self.encode_from_dict(game)
+		""" Encodes a replay, a .json or a zstd compressed .hlt from the engine or hlt.replay """
+		from hlt.replay import load_replay
+		return self.encode_from_dict(load_replay(path))
 
 	def encode_from_dict(self, game: dict) -> None:
 		raise NotImplementedError()
@@ -0,0 +1,88 @@
+import numpy as np
+
+from hlt.encoders.historic import HistoricEncoder
+
+MOVE_MAPPING = {"n": 0, "s": 1, "e": 2, "w": 3, "o": 4}
+MOVES = sorted(MOVE_MAPPING, key=MOVE_MAPPING.get)
+
+class DenseEncoder(HistoricEncoder):
+	""" Full-map encoder: a whole frame becomes a single [height, width, num_planes] input and the moves of all of
+		a player's ships become a [height, width, num_moves] target, so a model sees every ship in one forward pass.
+		Planes are [halite, ships, structures, cargos]:
+			halite:		halite on each cell normalized by MAX_CELL_PRODUCTION
+			ships:		1 for the player's ships, -1 for enemy ships
+			structures:	1 for the player's shipyard/dropoffs, -1 for enemy structures
+			cargos:		halite carried by the ship on each cell normalized by MAX_ENERGY
+		Targets are one-hot moves (see MOVE_MAPPING) on cells holding one of the player's ships and all zeros elsewhere,
+		so a categorical crossentropy over every cell only counts the player's ships.
+	"""
+	num_planes = 4
+	num_moves = len(MOVE_MAPPING)
+
+	def encode_frame(self, encoded: dict, num_frame: int, player_id: str) -> (np.array, np.array):
+		""" Encodes a single frame of a game encoded with encode_from_dict
+			inputs:
+				encoded (dict):		output of encode_from_dict
+				num_frame (int):	frame to encode
+				player_id (str):	player to encode the frame for
+			outputs:
+				maps (np.array):	shape of (height, width, num_planes)
+				targets (np.array):	shape of (height, width, num_moves)
+		"""
+		constants = encoded["constants"]
+		halites = encoded["halites"][num_frame][:, :, 0]
+		frame_ships = encoded["ships"][num_frame]
+		frame_structures = encoded["structures"][num_frame]
+		frame_moves = encoded["moves"][num_frame].get(str(player_id), {})
+
+		maps = np.zeros(shape=(*halites.shape, self.num_planes), dtype=np.float32)
+		targets = np.zeros(shape=(*halites.shape, self.num_moves), dtype=np.float32)
+
+		maps[:, :, 0] = halites / float(constants["MAX_CELL_PRODUCTION"])
+		for owner, structures in frame_structures.items():
+			for structure in structures.values():
+				maps[structure["y"], structure["x"], 2] = 1 if owner == str(player_id) else -1
+		for owner, ships in frame_ships.items():
+			for ship_id, ship in ships.items():
+				maps[ship["y"], ship["x"], 1] = 1 if owner == str(player_id) else -1
+				maps[ship["y"], ship["x"], 3] = ship["energy"] / float(constants["MAX_ENERGY"])
+				if owner == str(player_id) and ship_id in frame_moves:
+					targets[ship["y"], ship["x"], MOVE_MAPPING[frame_moves[ship_id]]] = 1.0
+		return maps, targets
+
+	def encode_from_gamemap(self, game) -> np.array:
+		""" Encodes the current state of a live hlt.Game from the point of view of game.me,
+			normalized as in encode_frame (MAX_HALITE being the engine's MAX_ENERGY)
+			outputs:
+				maps (np.array):	shape of (height, width, num_planes)
+		"""
+		from hlt import constants
+		game_map = game.game_map
+		maps = np.zeros(shape=(game_map.height, game_map.width, self.num_planes), dtype=np.float32)
+		maps[:, :, 0] = [[cell.halite_amount for cell in row] for row in game_map._cells]
+		maps[:, :, 0] /= float(constants.MAX_CELL_PRODUCTION)
+		for player in game.players.values():
+			sign = 1 if player.id == game.my_id else -1
+			for structure in [player.shipyard] + player.get_dropoffs():
+				maps[structure.position.y, structure.position.x, 2] = sign
+			for ship in player.get_ships():
+				maps[ship.position.y, ship.position.x, 1] = sign
+				maps[ship.position.y, ship.position.x, 3] = ship.halite_amount / float(constants.MAX_HALITE)
+		return maps
+
+	def decode_moves(self, probs: np.array, ships: list) -> list:
+		""" Turns a model output into one command per ship
+			inputs:
+				probs (np.array):	shape of (height, width, num_moves), e.g. model.predict(maps[None])[0]
+				ships (list):		hlt.entity.Ship objects to issue commands for
+			outputs:
+				commands (list):	a move command per ship
+		"""
+		return [ship.move(MOVES[int(np.argmax(probs[ship.position.y, ship.position.x]))]) for ship in ships]
+
+	@property
+	def name(self) -> str:
+		return "dense"
+
+def create():
+	return DenseEncoder()
@@ -0,0 +1,69 @@
+#test_dense.py
+
+import os
+import types
+import unittest
+import numpy as np
+from hlt import constants
+from hlt.data.dense_generator import DenseGenerator
+from hlt.encoders.dense import DenseEncoder
+from hlt.entity import Dropoff, Ship, Shipyard
+from hlt.game_map import GameMap, MapCell
+from hlt.player import Player
+from hlt.positionals import Position
+from hlt.sim import rules
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(__file__), "..", "games", "sample")
+
+def game_from_frame(encoded: dict, num_frame: int, player_id: int):
+	""" A live-game stand-in (game_map, players, my_id) holding a frame of an encoded replay """
+	halites = encoded["halites"][num_frame][:, :, 0]
+	height, width = halites.shape
+	game_map = GameMap([[MapCell(Position(x, y), int(halites[y, x])) for x in range(width)] for y in range(height)], width, height)
+	players = {}
+	for owner, structures in encoded["structures"][num_frame].items():
+		positions = [Position(structure["x"], structure["y"]) for structure in structures.values()]
+		player = Player(int(owner), Shipyard(int(owner), -1, positions[0]))
+		player._dropoffs = {i: Dropoff(int(owner), i, position) for i, position in enumerate(positions[1:])}
+		players[int(owner)] = player
+	for owner, ships in encoded["ships"][num_frame].items():
+		players[int(owner)]._ships = {int(ship_id): Ship(int(owner), int(ship_id), Position(ship["x"], ship["y"]), ship["energy"])
+			for ship_id, ship in ships.items()}
+	return types.SimpleNamespace(game_map=game_map, players=players, my_id=player_id)
+
+class DenseTestCase(unittest.TestCase):
+	""" Tests for encoders.dense and data.dense_generator """
+	def setUp(self):
+		self.encoder = DenseEncoder()
+		self.encoded = self.encoder.encode_from_file(path=os.path.join(SAMPLE_FOLDER, os.listdir(SAMPLE_FOLDER)[0]))
+		# Cells and cargos normalized differently, so swapping the constants shows
+		self.encoded["constants"] = dict(self.encoded["constants"], MAX_CELL_PRODUCTION=2000)
+		constants.load_constants(self.encoded["constants"])
+
+	def tearDown(self):
+		constants.load_constants(rules.game_constants(32, 32))
+
+	def test_encode_from_gamemap(self):
+		for num_frame in (self.encoded["num_frames"] // 4, self.encoded["num_frames"] // 2, self.encoded["num_frames"] - 1):
+			for player_id in (0, 1):
+				maps, _ = self.encoder.encode_frame(encoded=self.encoded, num_frame=num_frame, player_id=player_id)
+				live = self.encoder.encode_from_gamemap(game_from_frame(self.encoded, num_frame, player_id))
+				self.assertTrue((maps[:, :, 1] != 0).any())
+				np.testing.assert_allclose(live, maps)
+
+	def test_generator(self):
+		np.random.seed(0)
+		generator = DenseGenerator(replay_folder=SAMPLE_FOLDER, player_name="teccles", batch_size=4)
+		inputs, outputs = next(generator)
+		height, width = self.encoded["halites"][0].shape[:2]
+		self.assertEqual(inputs["maps"].shape, (4, height, width, self.encoder.num_planes))
+		self.assertEqual(outputs.shape, (4, height, width, self.encoder.num_moves))
+		# One move on each of the player's ships, none elsewhere
+		moves = outputs.sum(axis=-1)
+		self.assertTrue(set(np.unique(outputs)) <= {0.0, 1.0})
+		self.assertTrue(set(np.unique(moves)) <= {0.0, 1.0})
+		self.assertTrue((inputs["maps"][:, :, :, 1][moves == 1] == 1).all())
+		self.assertTrue(moves.any(axis=(1, 2)).all())
+
+if __name__ == "__main__":
+	unittest.main()
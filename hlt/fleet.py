@@ -0,0 +1,126 @@
+"""
+The ships of a player as aligned NumPy columns, for vectorized queries over the fleet (see Player.fleet).
+
+Columns, one row per ship sorted by ship id:
+    id, x, y, cargo:    as in the Ship objects
+    inspired:           whether the ship is inspired, from the other players' ships (see inspire)
+    age:                turns since the ship spawned, or since the fleet was created for older ships
+
+For example, the ships full enough to come back that are within 10 of one of our dropoffs:
+    fleet = game.me.fleet
+    ids = fleet.ids((fleet.cargo > 900) & fleet.within(dropoff_positions, 10, game.game_map))
+
+This module imports NumPy, so Player only imports it when a fleet is first asked for.
+"""
+
+import numpy as np
+
+from . import constants
+from .precompute import distance_table, offsets_within, spread
+
+
+class Fleet:
+    """
+    The ships of a player as columns, updated by Player._update every turn
+    """
+    def __init__(self, player):
+        """
+        :param player: The Player whose ships are in the fleet
+        """
+        self.player = player
+        self.turn = 0
+        self.id = np.zeros(0, dtype=np.int64)
+        self.x = np.zeros(0, dtype=np.int64)
+        self.y = np.zeros(0, dtype=np.int64)
+        self.cargo = np.zeros(0, dtype=np.int64)
+        self.inspired = np.zeros(0, dtype=bool)
+        self._spawn_turn = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+        self.update(player._ships)
+
+    def update(self, ships):
+        """
+        Reads the ships of a new turn, carrying the spawn turns of the ships still alive over
+        :param ships: {ship id: Ship} as in Player._ships
+        """
+        self.turn += 1
+        ids = np.fromiter(ships, dtype=np.int64, count=len(ships))
+        order = np.argsort(ids)
+        ships = list(ships.values())
+        ids = ids[order]
+        self.x = np.fromiter((ships[row].position.x for row in order), dtype=np.int64, count=len(ships))
+        self.y = np.fromiter((ships[row].position.y for row in order), dtype=np.int64, count=len(ships))
+        self.cargo = np.fromiter((ships[row].halite_amount for row in order), dtype=np.int64, count=len(ships))
+        self.inspired = np.zeros(len(ships), dtype=bool)
+
+        previous = np.minimum(np.searchsorted(self.id, ids), max(len(self.id) - 1, 0))
+        known = (self.id[previous] == ids) if len(self.id) else np.zeros(len(ids), dtype=bool)
+        self._spawn_turn = np.where(known, self._spawn_turn[previous] if len(self.id) else 0, self.turn)
+        self.id = ids
+        self._rows = {ship_id: row for row, ship_id in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.id)
+
+    @property
+    def age(self):
+        return self.turn - self._spawn_turn
+
+    def row(self, ship_id):
+        """
+        :return: The row of a ship in the columns, None if the player has no such ship
+        """
+        return self._rows.get(ship_id)
+
+    def ids(self, mask):
+        """
+        :param mask: A bool array over the rows, e.g. fleet.cargo > 900
+        :return: The ids of the ships selected by mask, a list
+        """
+        return self.id[mask].tolist()
+
+    def ships(self, mask):
+        """
+        :param mask: A bool array over the rows
+        :return: The Ship objects selected by mask, a list
+        """
+        return [self.player._ships[ship_id] for ship_id in self.ids(mask)]
+
+    def distances_to(self, positions, game_map):
+        """
+        :param positions: Positions, e.g. of our dropoffs
+        :param game_map: The game map, for its size
+        :return: The wrap-around distance of every ship to the closest of positions, an int array over the rows
+        """
+        distances = np.full(len(self), game_map.width + game_map.height, dtype=np.int64)
+        for position in positions:
+            dx = np.abs(self.x - position.x % game_map.width)
+            dy = np.abs(self.y - position.y % game_map.height)
+            np.minimum(distances, np.minimum(dx, game_map.width - dx) + np.minimum(dy, game_map.height - dy),
+                       out=distances)
+        return distances
+
+    def within(self, positions, radius, game_map):
+        """
+        :return: Whether every ship is within radius of one of positions, a bool array over the rows
+        """
+        return self.distances_to(positions, game_map) <= radius
+
+
+def inspire(players, game_map):
+    """
+    Sets whether the ships of every player's fleet are inspired, called by Game.update_frame once fleets are used
+    :param players: All Players, whose fleets are created if need be
+    :param game_map: The game map
+    """
+    fleets = [player.fleet for player in players]
+    if not constants.INSPIRATION_ENABLED:
+        for fleet in fleets:
+            fleet.inspired = np.zeros(len(fleet), dtype=bool)
+        return
+    shape = (game_map.height, game_map.width)
+    offsets = offsets_within(distance_table(game_map.width, game_map.height), constants.INSPIRATION_RADIUS)
+    counts = [spread(shape, offsets, fleet.y, fleet.x, np.ones(len(fleet))) for fleet in fleets]
+    total = sum(counts)
+    for fleet, own in zip(fleets, counts):
+        fleet.inspired = (total - own)[fleet.y, fleet.x] >= constants.INSPIRATION_SHIP_COUNT
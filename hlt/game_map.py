@@ -1,5 +1,3 @@
-import queue
-
 from . import constants
 from .entity import Entity, Shipyard, Ship, Dropoff
 from .player import Player
@@ -72,6 +70,9 @@ class GameMap:
         self.width = width
         self.height = height
         self._cells = cells
+        self.precomputed = None
+        self._halite_sums = None
+        self._dropoff_scorer = None
 
     def __getitem__(self, location):
         """
@@ -164,6 +165,47 @@ class GameMap:
 
         return Direction.Still
 
+    def precompute(self, shipyards=(), cache_dir=None, use_cache=True):
+        """
+        Builds distance tables, halite density pyramids and candidate dropoff scores for this map
+        (see hlt.precompute.Precomputed). Meant to run on the initial map, before calling ready.
+        Results are cached on disk keyed by the initial halite grid, so repeated games on a seed are instant.
+        :param shipyards: Positions of the players' shipyards
+        :param cache_dir: Where to cache results (defaults to $HLT_CACHE_DIR or ~/.cache/hlt)
+        :param use_cache: Whether to read and write the cache
+        :return: The precomputed tables, also stored as self.precomputed
+        """
+        from . import precompute
+        self.precomputed = precompute.precompute(self, shipyards, cache_dir=cache_dir, use_cache=use_cache)
+        return self.precomputed
+
+    def halite_sums(self):
+        """
+        Summed-area tables of the halite, answering box and diamond sums around any cell in O(1)
+        (see hlt.summed_area.HaliteSums). Built on the first call, then kept up to date by every update.
+        :return: The HaliteSums of this map
+        """
+        if self._halite_sums is None:
+            from .summed_area import HaliteSums
+            self._halite_sums = HaliteSums.from_map(self)
+        return self._halite_sums
+
+    def score_dropoffs(self, me, players, turn_number):
+        """
+        Scores every cell as a site for our next dropoff (see hlt.dropoffs.DropoffScorer), keeping the
+        halite around each cell across calls and only updating it where the halite changed.
+        :param me: Our Player
+        :param players: All Players, e.g. game.players.values()
+        :param turn_number: The current turn
+        :return: The DropoffScorer, with the scores and their terms as arrays of shape (height, width)
+            and best() for the sites
+        """
+        if self._dropoff_scorer is None:
+            from .dropoffs import DropoffScorer
+            self._dropoff_scorer = DropoffScorer(self)
+        self._dropoff_scorer.score(me, players, turn_number)
+        return self._dropoff_scorer
+
     @staticmethod
     def _generate():
         """
@@ -190,7 +232,10 @@ class GameMap:
             for x in range(self.width):
                 self[Position(x, y)].ship = None
 
+        sums = self._halite_sums
         for _ in range(int(read_input())):
             cell_x, cell_y, cell_energy = map(int, read_input().split())
             self[Position(cell_x, cell_y)].halite_amount = cell_energy
+            if sums is not None:
+                sums.set(cell_x, cell_y, cell_energy)
     
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Deferred loading of heavy modules (NumPy, model weights) for fast bot startup.
+
+The core of hlt (Game, GameMap, entities) only imports the standard library, so
+a bot can parse the initial map and reach game.ready() without paying for NumPy.
+Heavy modules are loaded by a Preloader in a background thread during the
+pre-ready window, while the initial map is being processed.
+"""
+
+import importlib
+import sys
+import threading
+
+# Objects loaded before this process was forked from a warm bot server (see hlt.warm), keyed by
+#   (name, loader arguments). Preloaders reuse them instead of loading again.
+_warm = {}
+
+
+class Preloader:
+    """
+    Loads modules and models in a background thread.
+
+    Usage:
+        preloader = Preloader().add_module("numpy").add_model("policy", "model.npz").start()
+        game = hlt.Game()
+        # ... pre-ready preprocessing ...
+        preloader.wait()
+        game.ready("MyBot")
+        policy = preloader["policy"]
+    """
+    def __init__(self):
+        self._tasks = []
+        self._results = {}
+        self._error = None
+        self._thread = None
+
+    def add(self, name, loader, *args):
+        """
+        Schedules loader(*args) to run in the background, its result available as preloader[name]
+        :return: The preloader, for chaining
+        """
+        self._tasks.append((name, loader, args))
+        return self
+
+    def add_module(self, module_name):
+        """
+        Schedules a module import
+        :return: The preloader, for chaining
+        """
+        return self.add(module_name, importlib.import_module, module_name)
+
+    def add_model(self, name, path):
+        """
+        Schedules loading a model exported with hlt.models.export (see hlt.runtime.load)
+        :return: The preloader, for chaining
+        """
+        return self.add(name, _load_model, path)
+
+    def start(self):
+        """
+        Starts loading in a daemon thread
+        :return: The preloader, for chaining
+        """
+        self._thread = threading.Thread(target=self._run, name="hlt-preloader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for name, loader, args in self._tasks:
+                key = (name, args)
+                self._results[name] = _warm[key] if key in _warm else loader(*args)
+        except BaseException as err:
+            self._error = err
+
+    def wait(self, timeout=None):
+        """
+        Blocks until everything is loaded, re-raising any error raised while loading
+        :param timeout: Maximum number of seconds to wait
+        :return: Dict of name to loaded object
+        """
+        if self._thread is None:
+            self.start()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError("Preloading did not finish in {} seconds".format(timeout))
+        if self._error is not None:
+            raise self._error
+        return self._results
+
+    @property
+    def done(self):
+        """
+        :return: Whether loading has finished
+        """
+        return self._thread is not None and not self._thread.is_alive()
+
+    def __getitem__(self, name):
+        return self.wait()[name]
+
+    def keep_warm(self):
+        """
+        Loads everything and makes it available to the Preloaders of processes forked from this one
+        :return: The preloader, for chaining
+        """
+        results = self.wait()
+        for name, _, args in self._tasks:
+            _warm[(name, args)] = results[name]
+        return self
+
+
+def _load_model(path):
+    from . import runtime
+    return runtime.load(path)
+
+
+def import_profile(statement="import hlt", python=sys.executable):
+    """
+    Profiles the imports of a statement in a fresh interpreter using `python -X importtime`
+    :param statement: The python statement to profile
+    :param python: The interpreter to use
+    :return: A list of dicts (module, self_us, cumulative_us, depth) in import order
+    """
+    import subprocess
+    completed = subprocess.run([python, "-X", "importtime", "-c", statement],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    profile = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return profile
+
+
+def format_profile(profile, limit=20):
+    """
+    Formats an import profile as a report of the slowest imports
+    :param profile: As returned by import_profile
+    :param limit: How many modules to report
+    :return: The report
+    """
+    lines = ["{:>12} | {:>12} | {}".format("self [us]", "cumul [us]", "module")]
+    for entry in sorted(profile, key=lambda e: e["cumulative_us"], reverse=True)[:limit]:
+        lines.append("{:>12} | {:>12} | {}".format(entry["self_us"], entry["cumulative_us"], entry["module"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(format_profile(import_profile(" ".join(sys.argv[1:]) or "import hlt")))
@@ -0,0 +1,56 @@
+from keras.layers import Conv2D, Dropout, Input, Concatenate, BatchNormalization, Softmax, Lambda
+from keras.layers.advanced_activations import LeakyReLU
+from keras.models import Model
+import keras.backend as K
+
+def wrap_pad(x, pad: int):
+    """ Pads a [batch, height, width, channels] tensor toroidally so "valid" convolutions wrap around the map edges """
+    x = K.concatenate([x[:, -pad:], x, x[:, :pad]], axis=1)
+    return K.concatenate([x[:, :, -pad:], x, x[:, :, :pad]], axis=2)
+
+def conv_layer(x, num_filters: int, kernel_size: int, dropout: float):
+    pad = kernel_size // 2
+    if pad > 0:
+        x = Lambda(wrap_pad, arguments={"pad": pad}, name="wrap_pad_{}".format(K.get_uid("wrap_pad")))(x)
+    x = Conv2D(filters=num_filters, kernel_size=kernel_size, padding="valid")(x)
+    x = LeakyReLU()(x)
+    x = BatchNormalization()(x)
+    x = Dropout(rate=dropout)(x)
+    return x
+
+def masked_accuracy(y_true, y_pred):
+    """ Move accuracy over the cells holding one of the player's ships (non-zero targets) """
+    mask = K.sum(y_true, axis=-1)
+    correct = K.cast(K.equal(K.argmax(y_true, axis=-1), K.argmax(y_pred, axis=-1)), K.floatx())
+    return K.sum(correct * mask) / K.maximum(K.sum(mask), 1.0)
+
+def get_model(num_planes: int = 4) -> Model:
+    """ Fully convolutional counterpart of hlt.models.small.get_model.
+        Takes a full map of any size (see hlt.data.dense_generator.DenseGenerator) and outputs a move distribution
+        for every cell, so a single forward pass gives the moves of the whole fleet.
+    """
+    num_classes = 5
+
+    maps = Input(shape=(None, None, num_planes), name="maps")
+
+    x = maps
+
+    for _ in range(10):
+        x = conv_layer(x=x, num_filters=24, kernel_size=5, dropout=0.25)
+        # residual layer
+        x = Concatenate(axis=-1)([x, maps])
+
+    x = conv_layer(x=x, num_filters=128, kernel_size=1, dropout=0.25)
+    x = Concatenate()([x, maps])
+    x = conv_layer(x=x, num_filters=128, kernel_size=1, dropout=0.25)
+    x = Concatenate()([x, maps])
+
+    # per-cell dense layer
+    x = Conv2D(filters=num_classes, kernel_size=1)(x)
+    out = Softmax(axis=-1)(x)
+
+    model = Model(maps, out)
+    # cells without one of the player's ships have all-zero targets and so add nothing to the crossentropy
+    model.compile(optimizer="adam", loss="categorical_crossentropy", metrics=[masked_accuracy])
+
+    return model
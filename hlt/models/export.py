@@ -0,0 +1,91 @@
+import numpy as np
+from hlt import runtime
+
+def _inbound_names(layer) -> list:
+    inbound = layer._inbound_nodes[0].inbound_layers
+    if not isinstance(inbound, (list, tuple)):
+        inbound = [inbound]
+    return [l.name for l in inbound]
+
+def _layer_weights(layer) -> dict:
+    return {w.name.split("/")[-1].split(":")[0]: v for w, v in zip(layer.weights, layer.get_weights())}
+
+def _check_linear(layer):
+    activation = getattr(layer.activation, "__name__", "linear")
+    if activation != "linear":
+        raise ValueError("Unsupported activation {} in layer {}".format(activation, layer.name))
+
+def export_graph(model) -> (list, dict):
+    """ Converts a Keras model (e.g. hlt.models.small.get_model or hlt.models.dense.get_model) into the op list and weights
+        evaluated by hlt.runtime. Supported layers are Input, Conv2D (stride 1), Dense, LeakyReLU, BatchNormalization
+        (exported as a per-channel affine), Dropout (skipped), MaxPool2D, Concatenate, Flatten, Softmax and the wrap_pad Lambda
+        of hlt.models.dense.
+    """
+    ops = []
+    weights = {}
+    aliases = {}
+
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        name = layer.name
+        inputs = [aliases.get(n, n) for n in _inbound_names(layer)] if kind != "InputLayer" else []
+
+        if kind == "InputLayer":
+            ops.append({"name": name, "op": "input"})
+        elif kind == "Dropout":
+            aliases[name] = inputs[0]
+        elif kind == "Conv2D":
+            if tuple(layer.strides) != (1, 1) or tuple(layer.dilation_rate) != (1, 1):
+                raise ValueError("Only stride 1, undilated convolutions are supported ({})".format(name))
+            _check_linear(layer)
+            layer_weights = _layer_weights(layer)
+            weights[name + "/kernel"] = layer_weights["kernel"]
+            if layer.use_bias:
+                weights[name + "/bias"] = layer_weights["bias"]
+            ops.append({"name": name, "op": "conv2d", "inputs": inputs, "padding": layer.padding})
+        elif kind == "Dense":
+            _check_linear(layer)
+            layer_weights = _layer_weights(layer)
+            weights[name + "/kernel"] = layer_weights["kernel"]
+            if layer.use_bias:
+                weights[name + "/bias"] = layer_weights["bias"]
+            ops.append({"name": name, "op": "dense", "inputs": inputs})
+        elif kind == "LeakyReLU":
+            ops.append({"name": name, "op": "leaky_relu", "inputs": inputs, "alpha": float(layer.alpha)})
+        elif kind == "BatchNormalization":
+            layer_weights = _layer_weights(layer)
+            mean = layer_weights["moving_mean"]
+            scale = layer_weights.get("gamma", np.ones_like(mean)) / np.sqrt(layer_weights["moving_variance"] + layer.epsilon)
+            weights[name + "/scale"] = scale
+            weights[name + "/shift"] = layer_weights.get("beta", np.zeros_like(mean)) - mean * scale
+            ops.append({"name": name, "op": "affine", "inputs": inputs})
+        elif kind == "MaxPooling2D":
+            ops.append({"name": name, "op": "max_pool", "inputs": inputs, "pool_size": list(layer.pool_size)})
+        elif kind == "Concatenate":
+            ops.append({"name": name, "op": "concat", "inputs": inputs, "axis": layer.axis})
+        elif kind == "Flatten":
+            ops.append({"name": name, "op": "flatten", "inputs": inputs})
+        elif kind == "Softmax":
+            ops.append({"name": name, "op": "softmax", "inputs": inputs, "axis": layer.axis})
+        elif kind == "Lambda" and name.startswith("wrap_pad"):
+            ops.append({"name": name, "op": "wrap_pad", "inputs": inputs, "pad": layer.arguments["pad"]})
+        else:
+            raise ValueError("Unsupported layer {} ({})".format(kind, name))
+
+    return ops, weights
+
+def export_model(model, path: str, optimize: bool = True) -> runtime.Model:
+    """ Exports a trained Keras model to an .npz that hlt.runtime.load can run without Keras
+        inputs:
+            model (keras.models.Model): trained model
+            path (str):                 where to save the .npz
+            optimize (bool):            fuse LeakyReLU and BatchNormalization into the convolutions before saving
+        outputs:
+            the exported hlt.runtime.Model
+    """
+    ops, weights = export_graph(model)
+    if optimize:
+        ops = runtime.fuse(ops, weights)
+    exported = runtime.Model(ops, weights)
+    exported.save(path)
+    return exported
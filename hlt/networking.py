@@ -5,6 +5,7 @@ import sys
 from .common import read_input
 from . import constants
 from .game_map import GameMap, Player
+from .timing import TurnTimer
 
 
 class Game:
@@ -17,12 +18,18 @@ class Game:
         Also sets up basic logging.
         """
         self.turn_number = 0
+        # Tee of the engine input, see hlt.capture
+        from .capture import from_environment
+        self.capture = from_environment()
 
         # Grab constants JSON
         raw_constants = read_input()
-        constants.load_constants(json.loads(raw_constants))
+        self.constants = json.loads(raw_constants)
+        constants.load_constants(self.constants)
 
         num_players, self.my_id = map(int, read_input().split())
+        if self.capture is not None:
+            self.capture.for_player(self.my_id)
 
         logging.basicConfig(
             filename="bot-{}.log".format(self.my_id),
@@ -35,6 +42,9 @@ class Game:
             self.players[player] = Player._generate()
         self.me = self.players[self.my_id]
         self.game_map = GameMap._generate()
+        self.recorder = None
+        # Per-turn wall time and peak memory, see hlt.timing
+        self.timer = TurnTimer.from_environment(self.my_id)
 
     def ready(self, name):
         """
@@ -49,6 +59,7 @@ class Game:
         :returns: nothing.
         """
         self.turn_number = int(read_input())
+        self.timer.start(self.turn_number)
         logging.info("=============== TURN {:03} ================".format(self.turn_number))
 
         for _ in range(len(self.players)):
@@ -57,6 +68,11 @@ class Game:
 
         self.game_map._update()
 
+        # Inspiration of the fleets' ships, once fleets are used (see Player.fleet)
+        if any(player._fleet is not None for player in self.players.values()):
+            from .fleet import inspire
+            inspire(self.players.values(), self.game_map)
+
         # Mark cells with ships as unsafe for navigation
         for player in self.players.values():
             for ship in player.get_ships():
@@ -66,14 +82,35 @@ class Game:
             for dropoff in player.get_dropoffs():
                 self.game_map[dropoff.position].structure = dropoff
 
-    @staticmethod
-    def end_turn(commands):
+        if self.recorder is not None:
+            self.recorder.on_frame()
+
+    def end_turn(self, commands):
         """
         Method to send all commands to the game engine, effectively ending your turn.
         :param commands: Array of commands to send to engine
         :return: nothing.
         """
+        if self.recorder is not None:
+            self.recorder.on_end_turn(commands)
+        self.timer.stop()
+        if self.capture is not None:
+            self.capture.flush()
         send_commands(commands)
+        self.timer.write()
+
+    def record(self, path, name="", compress=None):
+        """
+        Records this game as a replay in the engine's format (see hlt.replay), written as the game goes.
+        Call before the first update_frame.
+        :param path: Where to write the replay, zstd compressed if it ends with .hlt
+        :param name: The name of this bot in the replay
+        :param compress: Whether to compress the replay, by default when path ends with .hlt
+        :return: The GameRecorder, closed automatically when the bot exits
+        """
+        from .replay import GameRecorder
+        self.recorder = GameRecorder(self, path, name, compress)
+        return self.recorder
 
 
 def send_commands(commands):
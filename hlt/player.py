@@ -12,6 +12,7 @@ class Player:
         self.halite_amount = halite
         self._ships = {}
         self._dropoffs = {}
+        self._fleet = None
 
     def get_ship(self, ship_id):
         """
@@ -27,6 +28,18 @@ class Player:
         """
         return list(self._ships.values())
 
+    @property
+    def fleet(self):
+        """
+        The ships as aligned NumPy columns (id, x, y, cargo, inspired, age) for vectorized queries, see hlt.fleet.Fleet.
+        Created on first access, which imports NumPy, then kept up to date every turn.
+        :return: The Fleet
+        """
+        if self._fleet is None:
+            from .fleet import Fleet
+            self._fleet = Fleet(self)
+        return self._fleet
+
     def get_dropoff(self, dropoff_id):
         """
         Returns a singular dropoff mapped by its id
@@ -74,3 +87,5 @@ class Player:
         self.halite_amount = halite
         self._ships = {id: ship for (id, ship) in [Ship._generate(self.id) for _ in range(num_ships)]}
         self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id) for _ in range(num_dropoffs)]}
+        if self._fleet is not None:
+            self._fleet.update(self._ships)
@@ -0,0 +1,201 @@
+"""
+Reusable pre-ready precomputation for the initial map (see GameMap.precompute).
+
+Results are persisted to a local cache keyed by a hash of the initial halite
+grid, the map size and the shipyard positions, so repeated local games on the
+same seeds skip the work entirely.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from .summed_area import box_size, box_sums
+
+CACHE_DIR_ENV = "HLT_CACHE_DIR"
+PYRAMID_RADII = (1, 2, 4, 8)
+DROPOFF_RADIUS = 4
+MIN_DROPOFF_DISTANCE = 8
+NUM_DROPOFF_CANDIDATES = 10
+# Part of the cache key, bumped when the tables computed for a map change
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    """
+    :return: $HLT_CACHE_DIR if set, ~/.cache/hlt otherwise
+    """
+    return os.getenv(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "hlt")
+
+
+def halite_array(game_map):
+    """
+    :param game_map: The game map
+    :return: The halite on each cell as an int array of shape (height, width)
+    """
+    return np.array([[cell.halite_amount for cell in row] for row in game_map._cells], dtype=np.int64)
+
+
+def distance_table(width, height):
+    """
+    Wrap-around Manhattan distance for every offset: the distance between two cells
+    is table[(y2 - y1) % height, (x2 - x1) % width].
+    :return: An int array of shape (height, width)
+    """
+    dy = np.arange(height)
+    dx = np.arange(width)
+    return np.minimum(dy, height - dy)[:, None] + np.minimum(dx, width - dx)[None, :]
+
+
+def distances_from(table, positions):
+    """
+    Distance from every cell to the closest of the given positions
+    :param table: As returned by distance_table
+    :param positions: Iterable of Positions
+    :return: An int array of shape (height, width)
+    """
+    distances = np.full(table.shape, table.sum(), dtype=table.dtype)
+    for position in positions:
+        distances = np.minimum(distances, np.roll(table, (position.y, position.x), axis=(0, 1)))
+    return distances
+
+
+def offsets_within(table, radius):
+    """
+    :param table: As returned by distance_table
+    :param radius: The distance
+    :return: (dy, dx) int arrays of the offsets within radius, each cell once
+    """
+    return np.nonzero(table <= radius)
+
+
+def spread(shape, offsets, ys, xs, values):
+    """
+    Sum of values over the cells around each of the given cells
+    :param shape: (height, width) of the map
+    :param offsets: As returned by offsets_within
+    :param ys: Rows of the cells, an int array
+    :param xs: Columns of the cells, an int array
+    :param values: Value of each cell
+    :return: A float array of the given shape
+    """
+    height, width = shape
+    dy, dx = offsets
+    rows = (np.asarray(ys)[:, None] + dy[None, :]) % height
+    columns = (np.asarray(xs)[:, None] + dx[None, :]) % width
+    weights = np.broadcast_to(np.asarray(values, dtype=np.float64)[:, None], rows.shape)
+    return np.bincount((rows * width + columns).ravel(), weights.ravel(), height * width).reshape(height, width)
+
+
+class Precomputed:
+    """
+    Precomputed tables for an initial map:
+        distance_table:     wrap-around distance per (dy, dx) offset, see distance_table
+        shipyard_distances: distance from every cell to each shipyard, shape (num_shipyards, height, width)
+        pyramid:            mean halite in windows of each of PYRAMID_RADII, shape (len(PYRAMID_RADII), height, width)
+        dropoff_scores:     halite within DROPOFF_RADIUS of each cell, zero within MIN_DROPOFF_DISTANCE of a shipyard
+        dropoff_candidates: (x, y) of the best dropoff scores at least MIN_DROPOFF_DISTANCE apart
+    """
+    _FIELDS = ("distance_table", "shipyard_distances", "pyramid", "dropoff_scores", "dropoff_candidates")
+
+    def __init__(self, key, distance_table, shipyard_distances, pyramid, dropoff_scores, dropoff_candidates):
+        self.key = key
+        self.distance_table = distance_table
+        self.shipyard_distances = shipyard_distances
+        self.pyramid = pyramid
+        self.dropoff_scores = dropoff_scores
+        self.dropoff_candidates = dropoff_candidates
+
+    def distance(self, source, target):
+        """
+        Wrap-around Manhattan distance between two positions, a table lookup
+        """
+        height, width = self.distance_table.shape
+        return int(self.distance_table[(target.y - source.y) % height, (target.x - source.x) % width])
+
+    @staticmethod
+    def compute(key, halite, shipyards):
+        height, width = halite.shape
+        table = distance_table(width, height)
+        shipyard_distances = np.stack([distances_from(table, [shipyard]) for shipyard in shipyards]) \
+            if shipyards else np.zeros((0, height, width), dtype=table.dtype)
+        pyramid = np.stack([box_sums(halite, radius) / float(box_size(halite.shape, radius)) for radius in PYRAMID_RADII])
+
+        dropoff_scores = box_sums(halite, DROPOFF_RADIUS).astype(np.float64)
+        if shipyards:
+            dropoff_scores[shipyard_distances.min(axis=0) < MIN_DROPOFF_DISTANCE] = 0
+
+        candidates = []
+        remaining = dropoff_scores.copy()
+        while len(candidates) < NUM_DROPOFF_CANDIDATES and remaining.max() > 0:
+            y, x = np.unravel_index(np.argmax(remaining), remaining.shape)
+            candidates.append((x, y))
+            remaining[np.roll(table, (y, x), axis=(0, 1)) < MIN_DROPOFF_DISTANCE] = 0
+
+        return Precomputed(key, table, shipyard_distances, pyramid, dropoff_scores,
+                           np.array(candidates, dtype=np.int64).reshape(-1, 2))
+
+    def save(self, path):
+        """
+        Writes to a temporary file moved into place, so concurrent bots computing the same key
+        (both players of a local game, parallel games on a seed) never read a partial file
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **{field: getattr(self, field) for field in self._FIELDS})
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def load(key, path):
+        with np.load(path) as data:
+            return Precomputed(key, **{field: data[field] for field in Precomputed._FIELDS})
+
+
+def cache_key(halite, shipyards):
+    """
+    :return: A hash of the initial halite grid, the map size and the shipyard positions
+    """
+    digest = hashlib.sha1()
+    digest.update(np.array([CACHE_VERSION], dtype=np.int64).tobytes())
+    digest.update(np.array(halite.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(halite, dtype=np.int64).tobytes())
+    digest.update(np.array([(s.x, s.y) for s in shipyards], dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def precompute(game_map, shipyards=(), cache_dir=None, use_cache=True):
+    """
+    Computes (or loads from the cache) the Precomputed tables of a map
+    :param game_map: The initial game map
+    :param shipyards: Positions of the shipyards
+    :param cache_dir: Where to cache results, see default_cache_dir
+    :param use_cache: Whether to read and write the cache
+    :return: The Precomputed tables
+    """
+    shipyards = list(shipyards)
+    halite = halite_array(game_map)
+    key = cache_key(halite, shipyards)
+    path = os.path.join(cache_dir or default_cache_dir(), "precompute-{}.npz".format(key))
+
+    if use_cache and os.path.exists(path):
+        try:
+            return Precomputed.load(key, path)
+        except Exception as err:
+            # A cache miss whatever went wrong (truncated or empty file, other layout), never a crash before ready
+            logging.warning("Ignoring unreadable precompute cache {}: {}".format(path, err))
+
+    precomputed = Precomputed.compute(key, halite, shipyards)
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            precomputed.save(path)
+        except OSError as err:
+            logging.warning("Could not write precompute cache {}: {}".format(path, err))
+    return precomputed
@@ -0,0 +1,314 @@
+"""
+Replays in the engine's format, written by our own games.
+
+A ReplayWriter streams frames to disk as they are played, so memory stays bounded by a single
+frame, and the result loads with load_replay (and so with the encoders) like engine replays.
+Frames follow the engine's semantics: frame 0 is the initial state, then for turn t:
+    entities:   ships at the start of the turn, {owner: {ship id: {x, y, energy, is_inspired}}}
+    moves:      commands issued during the turn, {owner: [{type, id, direction}, ...]}
+    events:     spawns, constructions and shipwrecks that happened during the turn
+    cells:      cells whose halite changed during the turn, [{x, y, production}, ...]
+    energy:     halite banked by each player at the end of the turn, {owner: halite}
+    deposited:  halite deposited by each player so far, {owner: halite}
+
+Replays ending with .hlt are zstd compressed like the engine's, which needs the optional zstandard
+package to write (reading falls back on the zstd package used by hlt_client).
+"""
+
+import atexit
+import io
+import json
+
+from . import commands
+from .positionals import Direction
+
+REPLAY_FILE_VERSION = 3
+ENGINE_VERSION = "hlt-replay"
+COMPRESSION_LEVEL = 3
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def has_zstandard():
+    """
+    :return: Whether compressed replays can be written
+    """
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Writing compressed replays needs the zstandard package (pip install zstandard), "
+                          "or use a .json path for an uncompressed replay")
+    return zstandard
+
+
+def location(x, y):
+    return {"x": int(x), "y": int(y)}
+
+
+def ship_entity(x, y, energy, is_inspired=False):
+    return {"energy": int(energy), "is_inspired": bool(is_inspired), "x": int(x), "y": int(y)}
+
+
+def move(ship_id, direction):
+    return {"direction": direction, "id": int(ship_id), "type": commands.MOVE}
+
+
+def spawn_event(ship_id, owner, x, y):
+    return {"energy": 0, "id": int(ship_id), "location": location(x, y), "owner_id": int(owner), "type": "spawn"}
+
+
+def construct_event(dropoff_id, owner, x, y):
+    return {"id": int(dropoff_id), "location": location(x, y), "owner_id": int(owner), "type": "construct"}
+
+
+def shipwreck_event(ship_ids, x, y):
+    return {"location": location(x, y), "ships": [int(ship_id) for ship_id in ship_ids], "type": "shipwreck"}
+
+
+def parse_command(command):
+    """
+    :param command: A command as sent to the engine, e.g. "m 3 n"
+    :return: The command as stored in replay moves
+    """
+    parts = command.split()
+    if parts[0] == commands.MOVE:
+        return move(parts[1], parts[2])
+    if parts[0] == commands.CONSTRUCT:
+        return {"id": int(parts[1]), "type": commands.CONSTRUCT}
+    return {"type": parts[0]}
+
+
+class ReplayWriter:
+    """
+    Writes a replay incrementally: the header when opened, every frame when written, the statistics when closed
+    Usage:
+        with ReplayWriter(path, constants, players, halite) as writer:
+            writer.write_frame(...)
+            writer.close(ranks)
+    """
+    def __init__(self, path, constants, players, halite, map_generator_seed=None, compress=None):
+        """
+        :param path: Where to write the replay
+        :param constants: The engine constants (GAME_CONSTANTS)
+        :param players: (name, shipyard x, shipyard y) of each player, in player id order
+        :param halite: Initial halite, rows of cells
+        :param map_generator_seed: The map seed, if known
+        :param compress: Whether to zstd compress the replay, by default when path ends with .hlt
+        """
+        self.path = path
+        self.num_players = len(players)
+        self.num_frames = 0
+        self.closed = False
+        self.energy = {str(player): constants.get("INITIAL_ENERGY", 0) for player in range(self.num_players)}
+
+        if compress is None:
+            compress = path.endswith(".hlt")
+        self._file = open(path, "wb")
+        if compress:
+            self._stream = _zstandard().ZstdCompressor(level=COMPRESSION_LEVEL).stream_writer(self._file)
+        else:
+            self._stream = self._file
+
+        height = len(halite)
+        width = len(halite[0])
+        header = {
+            "ENGINE_VERSION": ENGINE_VERSION,
+            "GAME_CONSTANTS": constants,
+            "REPLAY_FILE_VERSION": REPLAY_FILE_VERSION,
+            "map_generator_seed": map_generator_seed,
+            "number_of_players": self.num_players,
+            "players": [{"energy": self.energy[str(player)], "entities": [], "factory_location": location(x, y),
+                         "name": name, "player_id": player} for player, (name, x, y) in enumerate(players)],
+            "production_map": {"grid": [[{"energy": int(energy)} for energy in row] for row in halite],
+                               "height": height, "width": width},
+        }
+        # The frames are streamed into the full_frames list, left open until close
+        self._write(json.dumps(header)[:-1] + ', "full_frames": [')
+        self.write_frame()
+
+    def write_frame(self, entities=None, moves=None, events=None, cells=None, energy=None, deposited=None):
+        """
+        Writes the next frame, see the module docstring for the fields
+        """
+        if energy is not None:
+            self.energy = {str(owner): int(halite) for owner, halite in energy.items()}
+        frame = {
+            "cells": cells or [],
+            "deposited": deposited or {str(player): 0 for player in range(self.num_players)},
+            "energy": self.energy,
+            "entities": entities or {},
+            "events": events or [],
+            "moves": moves or {},
+        }
+        self._write((", " if self.num_frames else "") + json.dumps(frame))
+        self.num_frames += 1
+
+    def close(self, ranks=None):
+        """
+        Writes the statistics and closes the replay
+        :param ranks: 1-based rank of each player, by default by banked halite
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if ranks is None:
+            order = sorted(range(self.num_players), key=lambda player: -self.energy[str(player)])
+            ranks = [order.index(player) + 1 for player in range(self.num_players)]
+        statistics = {"player_statistics": [{"player_id": player, "rank": int(ranks[player]),
+                                             "final_production": self.energy[str(player)]}
+                                            for player in range(self.num_players)]}
+        self._write('], "game_statistics": {}}}'.format(json.dumps(statistics)))
+        # Closing the compressor ends the zstd frame and closes the file
+        self._stream.close()
+
+    def _write(self, text):
+        self._stream.write(text.encode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_replay(path):
+    """
+    Loads a replay, zstd compressed (.hlt, from the engine or a ReplayWriter) or not
+    :param path: The replay path
+    :return: The replay dict
+    """
+    with open(path, "rb") as f:
+        return decode_replay(f.read())
+
+
+def decode_replay(raw):
+    """
+    :param raw: The bytes of a replay, zstd compressed or not
+    :return: The replay dict
+    """
+    if raw[:4] == ZSTD_MAGIC:
+        try:
+            import zstandard
+            raw = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(raw), read_across_frames=True).read()
+        except ImportError:
+            import zstd
+            raw = zstd.decompress(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _direction(width, height, source, target):
+    """
+    :return: The move command taking a ship from source to target (x, y) in a turn, None if there is none
+    """
+    dx = (target[0] - source[0]) % width
+    dy = (target[1] - source[1]) % height
+    offsets = {(0, 0): Direction.Still, (1, 0): Direction.East, (width - 1, 0): Direction.West,
+               (0, 1): Direction.South, (0, height - 1): Direction.North}
+    direction = offsets.get((dx, dy))
+    return None if direction is None else Direction.convert(direction)
+
+
+class GameRecorder:
+    """
+    Records the game a bot plays, see Game.record. The bot only sees its own commands, the moves of the
+    other players are inferred from how their ships moved, so a frame is written once the next one is known.
+    """
+    def __init__(self, game, path, name="", compress=None):
+        self.game = game
+        game_map = game.game_map
+        players = [(name if player == game.my_id else "player {}".format(player),
+                    game.players[player].shipyard.position.x, game.players[player].shipyard.position.y)
+                   for player in sorted(game.players)]
+        self._halite = self._halite_grid()
+        self.writer = ReplayWriter(path, game.constants, players, self._halite, compress=compress)
+        self._previous = None
+        self._commands = []
+        self.width, self.height = game_map.width, game_map.height
+        atexit.register(self.close)
+
+    def _halite_grid(self):
+        game_map = self.game.game_map
+        return [[cell.halite_amount for cell in row] for row in game_map._cells]
+
+    def _snapshot(self):
+        ships = {}
+        dropoffs = {}
+        for player_id, player in self.game.players.items():
+            ships[player_id] = {ship.id: (ship.position.x, ship.position.y, ship.halite_amount) for ship in player.get_ships()}
+            dropoffs[player_id] = {dropoff.id: (dropoff.position.x, dropoff.position.y) for dropoff in player.get_dropoffs()}
+        energy = {str(player_id): player.halite_amount for player_id, player in self.game.players.items()}
+        return ships, dropoffs, energy
+
+    def on_frame(self):
+        """
+        Called by Game.update_frame: completes the previous turn with what happened since
+        """
+        halite = self._halite_grid()
+        snapshot = self._snapshot()
+        if self._previous is not None:
+            cells = [{"production": value, "x": x, "y": y} for y, (row, previous_row) in enumerate(zip(halite, self._halite))
+                     for x, (value, previous_value) in enumerate(zip(row, previous_row)) if value != previous_value]
+            self._write_turn(snapshot, cells)
+        self._halite = halite
+        self._previous = snapshot
+
+    def on_end_turn(self, commands):
+        """
+        Called by Game.end_turn with the bot's commands
+        """
+        self._commands = list(commands)
+
+    def _write_turn(self, current, cells):
+        previous_ships, previous_dropoffs, _ = self._previous
+        ships, dropoffs, energy = current if current is not None else (None, None, None)
+        entities = {str(owner): {str(ship_id): ship_entity(*ship) for ship_id, ship in owner_ships.items()}
+                    for owner, owner_ships in previous_ships.items() if owner_ships}
+        moves = {}
+        events = []
+        if self._commands:
+            moves[str(self.game.my_id)] = [parse_command(command) for command in self._commands]
+
+        if current is not None:
+            for owner, owner_ships in ships.items():
+                shipyard = self.game.players[owner].shipyard.position
+                for ship_id, (x, y, _) in owner_ships.items():
+                    if ship_id not in previous_ships[owner]:
+                        events.append(spawn_event(ship_id, owner, x, y))
+                        if owner != self.game.my_id:
+                            moves.setdefault(str(owner), []).append({"type": commands.GENERATE})
+                new_dropoffs = {position: dropoff_id for dropoff_id, position in dropoffs[owner].items()
+                                if dropoff_id not in previous_dropoffs[owner]}
+                for position, dropoff_id in new_dropoffs.items():
+                    events.append(construct_event(dropoff_id, owner, *position))
+                wrecks = {}
+                for ship_id, (x, y, _) in previous_ships[owner].items():
+                    if ship_id in owner_ships:
+                        direction = _direction(self.width, self.height, (x, y), owner_ships[ship_id][:2])
+                        if owner != self.game.my_id and direction is not None:
+                            moves.setdefault(str(owner), []).append(move(ship_id, direction))
+                    elif (x, y) in new_dropoffs:
+                        if owner != self.game.my_id:
+                            moves.setdefault(str(owner), []).append({"id": ship_id, "type": commands.CONSTRUCT})
+                    else:
+                        wrecks.setdefault((x, y), []).append(ship_id)
+                # Only the position before the collision is known
+                events.extend(shipwreck_event(ship_ids, x, y) for (x, y), ship_ids in wrecks.items())
+        self.writer.write_frame(entities, moves, events, cells, energy)
+        self._commands = []
+
+    def close(self):
+        """
+        Writes the last turn and closes the replay (also called at exit)
+        """
+        if self.writer.closed:
+            return
+        if self._previous is not None and self._commands:
+            self._write_turn(None, [])
+        self.writer.close()
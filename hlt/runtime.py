@@ -0,0 +1,219 @@
+"""
+A NumPy-only forward pass for networks exported with hlt.models.export,
+so bots can run trained models without importing Keras/TensorFlow.
+
+Usage:
+    model = runtime.load("model.npz")
+    probs = model.predict(maps)
+"""
+
+import json
+
+import numpy as np
+
+_GRAPH_KEY = "__graph__"
+
+
+def conv2d(x, kernel, bias=None, padding="valid"):
+    """
+    Batched 2d convolution (stride 1) using im2col and a single matrix product.
+    :param x: Input of shape (batch, height, width, in_channels)
+    :param kernel: Kernel of shape (kernel_height, kernel_width, in_channels, out_channels)
+    :param bias: Optional bias of shape (out_channels,)
+    :param padding: "valid" or "same" (zero padded, as in Keras)
+    :return: Output of shape (batch, out_height, out_width, out_channels)
+    """
+    kernel_height, kernel_width, in_channels, out_channels = kernel.shape
+    if padding == "same" and (kernel_height > 1 or kernel_width > 1):
+        top, left = (kernel_height - 1) // 2, (kernel_width - 1) // 2
+        x = np.pad(x, ((0, 0),
+                       (top, kernel_height - 1 - top),
+                       (left, kernel_width - 1 - left),
+                       (0, 0)), mode="constant")
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    batch, height, width, _ = x.shape
+    out_height, out_width = height - kernel_height + 1, width - kernel_width + 1
+
+    if kernel_height == 1 and kernel_width == 1:
+        cols = x.reshape(-1, in_channels)
+    else:
+        s_batch, s_height, s_width, s_channel = x.strides
+        windows = np.lib.stride_tricks.as_strided(
+            x,
+            shape=(batch, out_height, out_width, kernel_height, kernel_width, in_channels),
+            strides=(s_batch, s_height, s_width, s_height, s_width, s_channel),
+            writeable=False)
+        cols = windows.reshape(-1, kernel_height * kernel_width * in_channels)
+
+    out = cols @ kernel.reshape(-1, out_channels)
+    if bias is not None:
+        out += bias
+    return out.reshape(batch, out_height, out_width, out_channels)
+
+
+def leaky_relu(x, alpha):
+    return np.where(x > 0, x, x * alpha)
+
+
+def softmax(x, axis=-1):
+    e = np.exp(x - np.max(x, axis=axis, keepdims=True))
+    return e / np.sum(e, axis=axis, keepdims=True)
+
+
+def wrap_pad(x, pad):
+    """
+    Toroidal padding of a (batch, height, width, channels) array, see hlt.models.dense.wrap_pad
+    """
+    return np.pad(x, ((0, 0), (pad, pad), (pad, pad), (0, 0)), mode="wrap")
+
+
+def max_pool(x, pool_size):
+    batch, height, width, channels = x.shape
+    pool_height, pool_width = pool_size
+    height, width = height // pool_height * pool_height, width // pool_width * pool_width
+    x = x[:, :height, :width].reshape(batch, height // pool_height, pool_height, width // pool_width, pool_width, channels)
+    return x.max(axis=(2, 4))
+
+
+def _activate(op, x, weights):
+    """Applies the activation and post-activation shift fused into a conv2d/dense op."""
+    if op.get("alpha") is not None:
+        x = leaky_relu(x, op["alpha"])
+    if op.get("shift"):
+        x = x + weights[op["name"] + "/shift"]
+    return x
+
+
+def _run_op(op, inputs, weights):
+    kind = op["op"]
+    name = op["name"]
+    if kind == "conv2d":
+        x = conv2d(inputs[0], weights[name + "/kernel"], weights.get(name + "/bias"), op.get("padding", "valid"))
+        return _activate(op, x, weights)
+    if kind == "dense":
+        x = inputs[0] @ weights[name + "/kernel"]
+        if name + "/bias" in weights:
+            x = x + weights[name + "/bias"]
+        return _activate(op, x, weights)
+    if kind == "leaky_relu":
+        return leaky_relu(inputs[0], op["alpha"])
+    if kind == "affine":
+        return inputs[0] * weights[name + "/scale"] + weights[name + "/shift"]
+    if kind == "concat":
+        return np.concatenate(inputs, axis=op.get("axis", -1))
+    if kind == "flatten":
+        return inputs[0].reshape(inputs[0].shape[0], -1)
+    if kind == "softmax":
+        return softmax(inputs[0], axis=op.get("axis", -1))
+    if kind == "wrap_pad":
+        return wrap_pad(inputs[0], op["pad"])
+    if kind == "max_pool":
+        return max_pool(inputs[0], op.get("pool_size", (2, 2)))
+    if kind == "identity":
+        return inputs[0]
+    raise ValueError("Unsupported op {} ({})".format(kind, name))
+
+
+def fuse(ops, weights):
+    """
+    Fuses element-wise ops into the conv2d/dense op producing their input:
+    * affine (folded batch normalization) directly after a conv2d/dense is folded into its kernel and bias
+    * leaky_relu becomes the conv2d/dense activation
+    * affine after a fused leaky_relu is folded into the kernel and bias when all scales are positive
+      (leaky_relu(s * x) = s * leaky_relu(x)), leaving only a per-channel shift after the activation
+    :param ops: The graph, a list of op dicts in topological order
+    :param weights: Dict of weight arrays, updated in place
+    :return: The fused list of ops
+    """
+    ops = [dict(op, inputs=list(op.get("inputs", []))) for op in ops]
+    by_name = {op["name"]: op for op in ops}
+    consumers = {op["name"]: [] for op in ops}
+    for op in ops:
+        for name in op["inputs"]:
+            consumers[name].append(op["name"])
+    removed = set()
+
+    for op in ops:
+        if op["op"] not in ("affine", "leaky_relu"):
+            continue
+        producer = by_name[op["inputs"][0]]
+        if producer["op"] not in ("conv2d", "dense") or consumers[producer["name"]] != [op["name"]] \
+                or producer.get("shift"):
+            continue
+
+        kernel_key, bias_key = producer["name"] + "/kernel", producer["name"] + "/bias"
+        if op["op"] == "leaky_relu":
+            if producer.get("alpha") is not None:
+                continue
+            producer["alpha"] = op["alpha"]
+        else:
+            scale, shift = weights[op["name"] + "/scale"], weights[op["name"] + "/shift"]
+            bias = weights.get(bias_key, np.zeros_like(scale))
+            if producer.get("alpha") is None:
+                weights[kernel_key] = weights[kernel_key] * scale
+                weights[bias_key] = bias * scale + shift
+            elif np.all(scale > 0):
+                weights[kernel_key] = weights[kernel_key] * scale
+                weights[bias_key] = bias * scale
+                weights[producer["name"] + "/shift"] = shift
+                producer["shift"] = True
+            else:
+                continue
+            del weights[op["name"] + "/scale"], weights[op["name"] + "/shift"]
+
+        # point the consumers of op at its producer
+        removed.add(op["name"])
+        consumers[producer["name"]] = consumers.pop(op["name"])
+        for name in consumers[producer["name"]]:
+            consumer = by_name[name]
+            consumer["inputs"] = [producer["name"] if i == op["name"] else i for i in consumer["inputs"]]
+
+    return [op for op in ops if op["name"] not in removed]
+
+
+class Model:
+    """
+    A network exported by hlt.models.export, evaluated with NumPy only.
+    """
+    def __init__(self, ops, weights):
+        self.ops = ops
+        self.weights = {name: np.asarray(value, dtype=np.float32) for name, value in weights.items()}
+        self.inputs = [op["name"] for op in ops if op["op"] == "input"]
+        self.output = ops[-1]["name"]
+
+    def predict(self, inputs):
+        """
+        Runs a forward pass.
+        :param inputs: An array for single input networks, or a dict of input name to array
+        :return: The output of the network
+        """
+        if not isinstance(inputs, dict):
+            inputs = {self.inputs[0]: inputs}
+        values = {name: np.asarray(value, dtype=np.float32) for name, value in inputs.items()}
+        for op in self.ops:
+            if op["op"] == "input":
+                continue
+            values[op["name"]] = _run_op(op, [values[name] for name in op["inputs"]], self.weights)
+        return values[self.output]
+
+    def save(self, path):
+        """
+        Saves the model as an .npz holding the graph (as json) and its weights
+        :param path: Where to save the model
+        """
+        np.savez(path, **{_GRAPH_KEY: np.array(json.dumps(self.ops))}, **self.weights)
+
+
+def load(path, optimize=True):
+    """
+    Loads a model saved by hlt.models.export or Model.save
+    :param path: The .npz path
+    :param optimize: Whether to fuse element-wise ops into the convolutions
+    :return: The model
+    """
+    with np.load(path) as data:
+        ops = json.loads(str(data[_GRAPH_KEY]))
+        weights = {name: data[name] for name in data.files if name != _GRAPH_KEY}
+    if optimize:
+        ops = fuse(ops, weights)
+    return Model(ops, weights)
@@ -0,0 +1,5 @@
+from hlt.sim.rules import *
+from hlt.sim.mapgen import *
+from hlt.sim.local import *
+from hlt.sim.env import *
+from hlt.sim.engine import *
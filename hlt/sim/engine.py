@@ -0,0 +1,111 @@
+"""
+A stand-in for the engine binary: plays bot programs (e.g. "python3 MyBot.py") against each other on the
+rules of hlt.sim.rules, talking to them over their standard input and output like the engine does.
+
+Bots run as they would under the engine, so their own timing (hlt.timing) and memory are those of a real
+game; the engine's turn time limit is not enforced. Useful where the engine binary isn't available.
+"""
+
+import subprocess
+
+import numpy as np
+
+from .. import commands
+from . import rules
+from .local import initial_lines, frame_lines, parse_commands
+from .mapgen import generate_map
+
+
+class BotProcess:
+    """
+    A bot program, started with a shell command in its own process
+    """
+    def __init__(self, command, cwd=None, env=None):
+        """
+        :param command: The shell command running the bot
+        :param cwd: The bot's working directory (where its logs are written)
+        :param env: The bot's environment, None to inherit this process's
+        """
+        self.command = command
+        self.process = subprocess.Popen(command, shell=True, cwd=cwd, env=env, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, universal_newlines=True, bufsize=1)
+
+    def send(self, lines):
+        self.process.stdin.write("\n".join(lines) + "\n")
+        self.process.stdin.flush()
+
+    def receive(self):
+        """
+        :return: The next line the bot printed, without the line break
+        """
+        line = self.process.stdout.readline()
+        if not line:
+            raise EOFError("Bot {!r} exited with code {}".format(self.command, self.process.wait()))
+        return line.rstrip("\n")
+
+    def close(self, timeout=10):
+        """
+        Closes the bot's input, so it exits when reading its next frame, and waits for it
+        """
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def split_commands(line):
+    """
+    :param line: The commands a bot sent, space separated like Game.end_turn sends them, e.g. "m 3 n c 4 g"
+    :return: The commands, e.g. ["m 3 n", "c 4", "g"]
+    """
+    tokens = line.split()
+    arguments = {commands.MOVE: 2, commands.CONSTRUCT: 1}
+    issued = []
+    index = 0
+    while index < len(tokens):
+        length = 1 + arguments.get(tokens[index], 0)
+        issued.append(" ".join(tokens[index:index + length]))
+        index += length
+    return issued
+
+
+def play(bot_commands, width=32, height=32, seed=0, constants=None, cwd=None, env=None):
+    """
+    Plays a game between bot programs
+    :param bot_commands: The shell command running each bot, 2 or 4 of them
+    :param width: Map width
+    :param height: Map height
+    :param seed: Map seed
+    :param constants: Engine constants, rules.game_constants(width, height) by default
+    :param cwd: The bots' working directory
+    :param env: The bots' environment, None to inherit this process's
+    :return: (ranks, names) the final 1-based rank of each player and the names the bots gave in ready
+    """
+    num_players = len(bot_commands)
+    halite, shipyards = generate_map(width, height, num_players, seed)
+    state = rules.BatchState(halite[None], np.array([shipyards]), constants or rules.game_constants(width, height))
+
+    bots = [BotProcess(command, cwd, env) for command in bot_commands]
+    try:
+        for player, bot in enumerate(bots):
+            bot.send(initial_lines(state, 0, player))
+        names = [bot.receive() for bot in bots]
+        while not state.done[0]:
+            actions = np.full((1, state.num_slots), rules.STAY, dtype=np.int64)
+            spawn = np.zeros((1, num_players), dtype=bool)
+            lines = frame_lines(state, 0)
+            # Every bot gets the frame before any answers, so they think at the same time like under the engine
+            for bot in bots:
+                bot.send(lines)
+            for player, bot in enumerate(bots):
+                parse_commands(state, 0, player, split_commands(bot.receive()), actions, spawn)
+            rules.step(state, actions, spawn)
+    finally:
+        for bot in bots:
+            bot.close()
+    return state.ranks()[0].tolist(), names
@@ -0,0 +1,181 @@
+"""
+Batched environment for training and evaluating policies on many simultaneous games.
+
+Games are grouped into buckets of the same map size, each bucket a rules.BatchState stepped with
+one NumPy pass per turn. Observations and actions are map tensors with a leading game axis:
+    actions:    the action of the ship on each cell (rules.STAY, NORTH, SOUTH, EAST, WEST or CONSTRUCT),
+                (num_games, height, width) int; cells without a ship are ignored. Each cell holds at most one
+                ship after collisions, so this covers the ships of every player.
+    spawn:      whether each player spawns a ship, (num_games, num_players) bool
+    observation: dict of
+                halite:     (num_games, height, width) int
+                ships:      owner of the ship on each cell, -1 for none, (num_games, height, width) int
+                cargo:      halite carried by the ship on each cell, (num_games, height, width) int
+                structures: owner of the shipyard or dropoff on each cell, -1 for none, (num_games, height, width) int
+                energy:     halite banked by each player, (num_games, num_players) int
+                turns:      turns played in each game, (num_games,) int
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import rules
+from .mapgen import generate_map
+
+MAP_SIZES = (32, 40, 48, 56, 64)
+# Buckets draw map seeds from ranges this far apart
+SEED_STRIDE = 1 << 20
+
+
+class Bucket:
+    """
+    num_games games on maps of the same size, each game seeded with its own map seed
+    """
+    def __init__(self, width, height, num_players=2, num_games=64, seed=0, constants=None):
+        """
+        :param width: Map width
+        :param height: Map height
+        :param num_players: 2 or 4
+        :param num_games: Number of simultaneous games
+        :param seed: Seed of the first map, every new game taking the next seed
+        :param constants: Engine constants, rules.game_constants(width, height) by default
+        """
+        self.width = width
+        self.height = height
+        self.num_players = num_players
+        self.num_games = num_games
+        self.constants = constants or rules.game_constants(width, height)
+        self.seeds = np.zeros(num_games, dtype=np.int64)
+        self._next_seed = seed
+        self.state = None
+
+    def _new_maps(self, count):
+        seeds = np.arange(self._next_seed, self._next_seed + count)
+        self._next_seed += count
+        maps = [generate_map(self.width, self.height, self.num_players, int(seed),
+                             self.constants["MAX_CELL_PRODUCTION"]) for seed in seeds]
+        return seeds, np.stack([halite for halite, _ in maps]), np.array([shipyards for _, shipyards in maps])
+
+    def reset(self, games=None):
+        """
+        Starts new games
+        :param games: Indices of the games to restart, None for all of them
+        :return: The observation
+        """
+        if self.state is None or games is None:
+            self.seeds, halite, shipyards = self._new_maps(self.num_games)
+            self.state = rules.BatchState(halite, shipyards, self.constants)
+        else:
+            games = np.asarray(games, dtype=np.int64)
+            if len(games):
+                self.seeds[games], halite, shipyards = self._new_maps(len(games))
+                self.state.reset_games(games, halite, shipyards)
+        return self.observation()
+
+    def step(self, actions, spawn, auto_reset=False):
+        """
+        Plays a turn of every game that isn't over
+        :param actions: Action of the ship on each cell, (num_games, height, width)
+        :param spawn: Whether each player spawns a ship, (num_games, num_players)
+        :param auto_reset: Restart the games that end, returning the first observation of the new game for them
+        :return: (observation, rewards, done) with rewards the halite each player banked this turn
+            (num_games, num_players) and done the games that ended this turn or before (num_games,)
+        """
+        state = self.state
+        energy = state.energy.copy()
+        games = np.broadcast_to(np.arange(state.num_games)[:, None], state.alive.shape)
+        ship_actions = np.asarray(actions)[games, state.y, state.x]
+        rules.step(state, np.where(state.alive, ship_actions, rules.STAY), spawn)
+
+        rewards = state.energy - energy
+        done = state.done.copy()
+        if auto_reset and done.any():
+            self.reset(np.flatnonzero(done))
+        return self.observation(), rewards, done
+
+    def observation(self):
+        state = self.state
+        ships = np.full(state.halite.shape, -1, dtype=np.int64)
+        cargo = np.zeros(state.halite.shape, dtype=np.int64)
+        games = np.broadcast_to(np.arange(state.num_games)[:, None], state.alive.shape)[state.alive]
+        ys, xs = state.y[state.alive], state.x[state.alive]
+        ships[games, ys, xs] = state.owner[state.alive]
+        cargo[games, ys, xs] = state.cargo[state.alive]
+        return {
+            "halite": state.halite.copy(),
+            "ships": ships,
+            "cargo": cargo,
+            "structures": state.structures.copy(),
+            "energy": state.energy.copy(),
+            "turns": state.turns.copy(),
+        }
+
+
+def player_planes(observation, player, constants=rules.DEFAULT_CONSTANTS):
+    """
+    Converts an observation to the input planes of hlt.encoders.dense.DenseEncoder for a player, so the
+    dense models (and their hlt.runtime exports) can play in the environment
+    :param observation: As returned by Bucket.reset or Bucket.step
+    :param player: The player to encode the observation for
+    :return: Float32 array of shape (num_games, height, width, 4): halite, ships, structures, cargo
+    """
+    def relative(owners):
+        return np.where(owners < 0, 0.0, np.where(owners == player, 1.0, -1.0))
+
+    return np.stack([
+        observation["halite"] / float(constants["MAX_CELL_PRODUCTION"]),
+        relative(observation["ships"]),
+        relative(observation["structures"]),
+        observation["cargo"] / float(constants["MAX_ENERGY"]),
+    ], axis=-1).astype(np.float32)
+
+
+class BatchEnv:
+    """
+    Buckets of simultaneous games on several map sizes
+    Usage:
+        env = BatchEnv(map_sizes=(32, 48), games_per_size=128, seed=0)
+        observations = env.reset()
+        while True:
+            actions = [(policy(obs), spawn(obs)) for obs in observations]
+            observations, rewards, done = env.step(actions)
+    """
+    def __init__(self, map_sizes=MAP_SIZES, games_per_size=64, num_players=2, seed=0, workers=1, auto_reset=True):
+        """
+        :param map_sizes: Size of the square maps of each bucket
+        :param games_per_size: Number of simultaneous games in each bucket
+        :param num_players: 2 or 4
+        :param seed: Base map seed, buckets draw their seeds from disjoint ranges
+        :param workers: Number of threads stepping buckets (NumPy releases the GIL in its array operations)
+        :param auto_reset: Restart games as they end
+        """
+        self.buckets = [Bucket(size, size, num_players, games_per_size, seed + index * SEED_STRIDE)
+                        for index, size in enumerate(map_sizes)]
+        self.auto_reset = auto_reset
+        self._executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def _map(self, function, *iterables):
+        if self._executor is None:
+            return list(map(function, *iterables))
+        return list(self._executor.map(function, *iterables))
+
+    def reset(self):
+        """
+        :return: The observation of each bucket
+        """
+        return self._map(lambda bucket: bucket.reset(), self.buckets)
+
+    def step(self, actions):
+        """
+        :param actions: (actions, spawn) for each bucket, see Bucket.step
+        :return: (observations, rewards, done), each a list with one entry per bucket
+        """
+        results = self._map(lambda bucket, action: bucket.step(action[0], action[1], self.auto_reset),
+                            self.buckets, actions)
+        observations, rewards, done = zip(*results)
+        return list(observations), list(rewards), list(done)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
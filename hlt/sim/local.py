@@ -0,0 +1,258 @@
+"""
+Local games between in-process bots, without the engine binary.
+
+Bots see the same hlt.Game objects as when playing through the engine: every turn, the frame each
+player would receive from the engine is fed to its Game through hlt.common.set_input, and the
+commands the bot returns are applied to the batched rules of hlt.sim.rules. Many games are
+stepped in lockstep, so the rules cost one NumPy pass per turn for all of them.
+"""
+
+import json
+import logging
+import os
+import random
+
+import numpy as np
+
+from .. import commands, common, constants, replay
+from ..positionals import Direction
+from ..networking import Game
+from . import rules
+from .mapgen import generate_map
+
+
+class Bot:
+    """
+    A bot playing in-process: setup is called with the initial Game, before ready, then play_turn every
+    turn after Game.update_frame, returning the commands to send (what the bot would pass to Game.end_turn).
+    Bots must not call Game.ready or Game.end_turn, which write to the engine's standard output.
+    """
+    name = "Bot"
+
+    def setup(self, game):
+        pass
+
+    def play_turn(self, game):
+        raise NotImplementedError
+
+
+class RandomBot(Bot):
+    """
+    The starter bot (MyBot.py): ships mine until the cell is poor or they are full, then move randomly
+    """
+    name = "RandomBot"
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def play_turn(self, game):
+        me = game.me
+        game_map = game.game_map
+        command_queue = []
+        for ship in me.get_ships():
+            if game_map[ship.position].halite_amount < constants.MAX_HALITE / 10 or ship.is_full:
+                command_queue.append(ship.move(self.random.choice(Direction.get_all_cardinals())))
+            else:
+                command_queue.append(ship.stay_still())
+        if game.turn_number <= 200 and me.halite_amount >= constants.SHIP_COST and not game_map[me.shipyard].is_occupied:
+            command_queue.append(me.shipyard.spawn())
+        return command_queue
+
+
+def initial_lines(state, game, player):
+    """
+    :return: The lines the engine sends a player before the first turn
+    """
+    lines = [json.dumps(state.constants), "{} {}".format(state.num_players, player)]
+    lines.extend("{} {} {}".format(p, x, y) for p, (x, y) in enumerate(state.shipyards[game]))
+    lines.append("{} {}".format(state.width, state.height))
+    lines.extend(" ".join(map(str, row)) for row in state.halite[game])
+    return lines
+
+
+def frame_lines(state, game):
+    """
+    :return: The lines the engine sends every player at the start of the next turn
+    """
+    lines = [str(state.turns[game] + 1)]
+    alive = np.flatnonzero(state.alive[game])
+    for player in range(state.num_players):
+        ships = alive[state.owner[game, alive] == player]
+        dropoffs = [dropoff for dropoff in state.dropoffs[game] if dropoff[1] == player]
+        lines.append("{} {} {} {}".format(player, len(ships), len(dropoffs), state.energy[game, player]))
+        lines.extend("{} {} {} {}".format(state.ids[game, slot], state.x[game, slot], state.y[game, slot],
+                                          state.cargo[game, slot]) for slot in ships)
+        lines.extend("{} {} {}".format(id, x, y) for id, _, x, y in dropoffs)
+    ys, xs = np.nonzero(state.changed[game])
+    lines.append(str(len(xs)))
+    lines.extend("{} {} {}".format(x, y, state.halite[game, y, x]) for y, x in zip(ys, xs))
+    return lines
+
+
+def _feed(lines, read):
+    previous = common.set_input(common.InputLines(lines))
+    try:
+        return read()
+    finally:
+        common.set_input(previous)
+
+
+def parse_commands(state, game, player, issued, actions, spawn):
+    """
+    Applies a player's commands to the action arrays given to rules.step, ignoring commands for ships the
+    player doesn't own, like the engine does (without the strict errors)
+    """
+    slots = {state.ids[game, slot]: slot for slot in np.flatnonzero(state.alive[game] & (state.owner[game] == player))}
+    for command in issued:
+        parts = command.split()
+        if parts[0] == commands.GENERATE:
+            spawn[game, player] = True
+        elif parts[0] == commands.MOVE and len(parts) == 3 and int(parts[1]) in slots:
+            actions[game, slots[int(parts[1])]] = rules.ACTIONS.get(parts[2], rules.STAY)
+        elif parts[0] == commands.CONSTRUCT and len(parts) == 2 and int(parts[1]) in slots:
+            actions[game, slots[int(parts[1])]] = rules.CONSTRUCT
+        else:
+            logging.debug("Ignoring command {!r} of player {} in game {}".format(command, player, game))
+
+
+class _GameReplay:
+    """
+    Records a game of a BatchState with a replay.ReplayWriter, with the exact moves and events
+    """
+    def __init__(self, state, game, path, names, seed):
+        self.state = state
+        self.game = game
+        players = [(name, x, y) for name, (x, y) in zip(names, state.shipyards[game])]
+        self.writer = replay.ReplayWriter(path, state.constants, players, state.halite[game].tolist(), seed)
+
+    def start_turn(self, issued):
+        """
+        :param issued: The commands of each player
+        """
+        state, game = self.state, self.game
+        self.entities = {}
+        for slot in np.flatnonzero(state.alive[game]):
+            ships = self.entities.setdefault(str(state.owner[game, slot]), {})
+            ships[str(state.ids[game, slot])] = replay.ship_entity(state.x[game, slot], state.y[game, slot],
+                                                                   state.cargo[game, slot], state.inspired[game, slot])
+        self.moves = {str(player): [replay.parse_command(command) for command in player_commands]
+                      for player, player_commands in enumerate(issued) if player_commands}
+        self.alive = state.alive[game].copy()
+        self.ids = state.ids[game].copy()
+        self.next_id = state.next_id[game]
+        self.num_dropoffs = len(state.dropoffs[game])
+
+    def end_turn(self):
+        state, game = self.state, self.game
+        events = []
+        # Ships constructing a dropoff are removed without moving, the other ships gone collided
+        constructed = set()
+        for dropoff_id, owner, x, y in state.dropoffs[game][self.num_dropoffs:]:
+            events.append(replay.construct_event(dropoff_id, owner, x, y))
+            constructed.add((x, y))
+        wrecks = {}
+        for slot in range(state.num_slots):
+            ship_id = state.ids[game, slot]
+            position = (state.x[game, slot], state.y[game, slot])
+            spawned = ship_id >= self.next_id
+            if spawned:
+                events.append(replay.spawn_event(ship_id, state.owner[game, slot], *state.shipyards[game, state.owner[game, slot]]))
+            # Slots added by _free_slot this turn can only hold ships spawned this turn
+            was_alive = slot < len(self.alive) and self.alive[slot] and self.ids[slot] == ship_id
+            if not state.alive[game, slot] and (spawned or was_alive) and position not in constructed:
+                wrecks.setdefault(position, []).append(ship_id)
+        events.extend(replay.shipwreck_event(ship_ids, x, y) for (x, y), ship_ids in wrecks.items())
+        ys, xs = np.nonzero(state.changed[game])
+        cells = [{"production": int(state.halite[game, y, x]), "x": int(x), "y": int(y)} for y, x in zip(ys, xs)]
+        self.writer.write_frame(self.entities, self.moves, events, cells,
+                                {str(player): energy for player, energy in enumerate(state.energy[game])},
+                                {str(player): int(halite) for player, halite in enumerate(state.deposited[game])})
+        if state.done[game]:
+            self.writer.close(state.ranks()[game])
+
+
+class LocalGames:
+    """
+    num_games games between the same bots, played in lockstep
+    Usage:
+        games = LocalGames([MyBot, MyBot], num_games=16, width=32, height=32, seed=0)
+        games.play()
+        games.state.ranks()
+    """
+    def __init__(self, bot_factories, num_games=1, width=32, height=32, seed=None, constants=None, replay_dir=None):
+        """
+        :param bot_factories: One callable per player, returning a new Bot for each game
+        :param num_games: Number of games to play
+        :param width: Map width
+        :param height: Map height
+        :param seed: Seed of the first map, the others using the following seeds
+        :param constants: Engine constants, rules.game_constants(width, height) by default
+        :param replay_dir: Where to write a replay of each game (see hlt.replay), None for no replays
+        """
+        num_players = len(bot_factories)
+        seeds = [None if seed is None else seed + game for game in range(num_games)]
+        maps = [generate_map(width, height, num_players, game_seed) for game_seed in seeds]
+        self.seeds = seeds
+        self.state = rules.BatchState(np.stack([halite for halite, _ in maps]), np.array([shipyards for _, shipyards in maps]),
+                                      constants or rules.game_constants(width, height))
+
+        # Game sets up logging to a bot-<id>.log file unless logging is configured already
+        if not logging.getLogger().handlers:
+            logging.getLogger().addHandler(logging.NullHandler())
+
+        self.bots = []
+        self.games = []
+        for game in range(num_games):
+            bots, games = [], []
+            for player, factory in enumerate(bot_factories):
+                bot = factory()
+                hlt_game = _feed(initial_lines(self.state, game, player), Game)
+                bot.setup(hlt_game)
+                bots.append(bot)
+                games.append(hlt_game)
+            self.bots.append(bots)
+            self.games.append(games)
+
+        self.replays = []
+        if replay_dir is not None:
+            os.makedirs(replay_dir, exist_ok=True)
+            # Compressed like the engine's replays when zstandard is available
+            extension = ".hlt" if replay.has_zstandard() else ".json"
+            names = [getattr(bot, "name", "Bot") for bot in self.bots[0]] if self.bots else []
+            for game in range(num_games):
+                path = os.path.join(replay_dir, "replay-{}-{}{}".format(game, seeds[game], extension))
+                self.replays.append(_GameReplay(self.state, game, path, names, seeds[game]))
+
+    @property
+    def done(self):
+        return bool(self.state.done.all())
+
+    def play_turn(self):
+        """
+        Plays a turn of every game that isn't over
+        """
+        state = self.state
+        actions = np.full((state.num_games, state.num_slots), rules.STAY, dtype=np.int64)
+        spawn = np.zeros((state.num_games, state.num_players), dtype=bool)
+        playing = np.flatnonzero(~state.done)
+        for game in playing:
+            lines = frame_lines(state, game)
+            issued = []
+            for player, (bot, hlt_game) in enumerate(zip(self.bots[game], self.games[game])):
+                _feed(lines, hlt_game.update_frame)
+                issued.append(bot.play_turn(hlt_game))
+                parse_commands(state, game, player, issued[-1], actions, spawn)
+            if self.replays:
+                self.replays[game].start_turn(issued)
+        rules.step(state, actions, spawn)
+        for game in playing if self.replays else ():
+            self.replays[game].end_turn()
+
+    def play(self):
+        """
+        Plays every game to the end
+        :return: The final rank of each player, (num_games, num_players)
+        """
+        while not self.done:
+            self.play_turn()
+        return self.state.ranks()
@@ -0,0 +1,72 @@
+"""
+Symmetric map generation for local games.
+
+Maps are built from a tile of smoothed multi-scale noise mirrored across the map (horizontally for
+2 players, both ways for 4) so every player starts from an equivalent position, like the maps of
+the official engine. The halite distribution is an approximation, not a bit-for-bit reproduction.
+"""
+
+import numpy as np
+
+from .rules import DEFAULT_CONSTANTS
+
+MIN_MEAN_HALITE = 80
+MAX_MEAN_HALITE = 250
+OCTAVES = (1, 2, 4, 8)
+
+
+def _smooth(noise, passes):
+    for _ in range(passes):
+        noise = (noise + np.roll(noise, 1, axis=0) + np.roll(noise, -1, axis=0)
+                 + np.roll(noise, 1, axis=1) + np.roll(noise, -1, axis=1)) / 5.0
+    return noise
+
+
+def _tile(rng, width, height):
+    tile = np.zeros((height, width))
+    for octave in OCTAVES:
+        cells = rng.rand((height + octave - 1) // octave, (width + octave - 1) // octave)
+        tile += np.kron(cells, np.ones((octave, octave)))[:height, :width] * octave
+    tile = _smooth(tile / sum(OCTAVES), 2)
+    # Sharpen into a few rich patches over mostly poor ground
+    tile = (tile - tile.min()) / max(tile.max() - tile.min(), 1e-9)
+    return tile ** 3 + 0.05 * rng.rand(height, width)
+
+
+def shipyard_positions(width, height, num_players):
+    """
+    :return: The (x, y) of each player's shipyard, in player id order
+    """
+    x, y = width // 4, height // 4
+    if num_players == 2:
+        return [(x, height // 2), (width - 1 - x, height // 2)]
+    if num_players == 4:
+        return [(x, y), (width - 1 - x, y), (x, height - 1 - y), (width - 1 - x, height - 1 - y)]
+    raise ValueError("Maps are generated for 2 or 4 players, not {}".format(num_players))
+
+
+def generate_map(width, height, num_players, seed=None, max_cell_production=None):
+    """
+    Generates the initial halite of a map
+    :param width: Map width, even
+    :param height: Map height, even
+    :param num_players: 2 or 4
+    :param seed: Seed of the map, None for a random one
+    :param max_cell_production: Maximum halite of a cell, MAX_CELL_PRODUCTION by default
+    :return: (halite, shipyards) with halite an int64 array of shape (height, width) and shipyards as in shipyard_positions
+    """
+    rng = np.random.RandomState(seed)
+    max_cell_production = max_cell_production or DEFAULT_CONSTANTS["MAX_CELL_PRODUCTION"]
+    shipyards = shipyard_positions(width, height, num_players)
+
+    tile_width = width // 2
+    tile_height = height // 2 if num_players == 4 else height
+    tile = _tile(rng, tile_width, tile_height)
+    halves = np.concatenate([tile, tile[:, ::-1]], axis=1)
+    noise = np.concatenate([halves, halves[::-1]], axis=0) if num_players == 4 else halves
+
+    mean = rng.uniform(MIN_MEAN_HALITE, MAX_MEAN_HALITE)
+    halite = np.minimum(noise * (mean / noise.mean()), max_cell_production).astype(np.int64)
+    for x, y in shipyards:
+        halite[y, x] = 0
+    return halite, shipyards
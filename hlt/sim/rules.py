@@ -0,0 +1,315 @@
+"""
+Batched Halite III rules.
+
+The state of many games of the same map size and number of players is kept in NumPy arrays with a
+leading game axis, and step advances all of them by one turn at once. A turn resolves, in order:
+    1. dropoff construction (cost DROPOFF_COST minus the ship's cargo and the cell's halite)
+    2. spawns at the shipyards (cost NEW_ENTITY_ENERGY_COST)
+    3. moves, paying 1/MOVE_COST_RATIO (truncated) of the halite of the cell left; ships that can't pay stay
+    4. collisions: every ship on a cell shared by more than one ship is destroyed, the cargo is dropped on
+       the cell, or given to the owner of the structure on the cell
+    5. deposits of the cargo of ships on one of their player's structures
+    6. inspiration: ships with at least INSPIRATION_SHIP_COUNT opponent ships within INSPIRATION_RADIUS
+    7. mining by ships that stayed still: 1/EXTRACT_RATIO (rounded up) of the cell's halite, plus
+       INSPIRED_BONUS_MULTIPLIER times that for inspired ships, up to MAX_ENERGY
+"""
+
+import numpy as np
+
+# Constants sent by the engine, MAX_TURNS depends on the map size (see max_turns)
+DEFAULT_CONSTANTS = {
+    "CAPTURE_ENABLED": False,
+    "CAPTURE_RADIUS": 3,
+    "DEFAULT_MAP_HEIGHT": 48,
+    "DEFAULT_MAP_WIDTH": 48,
+    "DROPOFF_COST": 4000,
+    "DROPOFF_PENALTY_RATIO": 4,
+    "EXTRACT_RATIO": 4,
+    "FACTOR_EXP_1": 2.0,
+    "FACTOR_EXP_2": 2.0,
+    "INITIAL_ENERGY": 5000,
+    "INSPIRATION_ENABLED": True,
+    "INSPIRATION_RADIUS": 4,
+    "INSPIRATION_SHIP_COUNT": 2,
+    "INSPIRED_BONUS_MULTIPLIER": 2.0,
+    "INSPIRED_EXTRACT_RATIO": 4,
+    "INSPIRED_MOVE_COST_RATIO": 10,
+    "MAX_CELL_PRODUCTION": 1000,
+    "MAX_ENERGY": 1000,
+    "MAX_PLAYERS": 16,
+    "MAX_TURNS": 400,
+    "MAX_TURN_THRESHOLD": 64,
+    "MIN_CELL_PRODUCTION": 900,
+    "MIN_TURNS": 400,
+    "MIN_TURN_THRESHOLD": 32,
+    "MOVE_COST_RATIO": 10,
+    "NEW_ENTITY_ENERGY_COST": 1000,
+    "PERSISTENCE": 0.7,
+    "SHIPS_ABOVE_FOR_CAPTURE": 3,
+    "STRICT_ERRORS": False,
+}
+
+# Ship actions
+STAY, NORTH, SOUTH, EAST, WEST, CONSTRUCT = range(6)
+ACTIONS = {"o": STAY, "n": NORTH, "s": SOUTH, "e": EAST, "w": WEST}
+DX = np.array([0, 0, 0, 1, -1, 0])
+DY = np.array([0, -1, 1, 0, 0, 0])
+
+INITIAL_SHIP_SLOTS = 64
+# Number of turns on the largest maps, MIN_TURNS being the number of turns on the smallest ones
+MAX_TURNS_LIMIT = 500
+
+
+def max_turns(width, height, constants=DEFAULT_CONSTANTS):
+    """
+    :return: The number of turns of a game on a map of the given size (400 on 32x32 up to 500 on 64x64)
+    """
+    size = max(width, height)
+    low, high = constants["MIN_TURN_THRESHOLD"], constants["MAX_TURN_THRESHOLD"]
+    fraction = min(max(size - low, 0), high - low) / float(high - low)
+    return int(constants["MIN_TURNS"] + fraction * (MAX_TURNS_LIMIT - constants["MIN_TURNS"]))
+
+
+def game_constants(width, height, **overrides):
+    """
+    :return: The engine constants of a game on a map of the given size, with overrides
+    """
+    constants = dict(DEFAULT_CONSTANTS, DEFAULT_MAP_WIDTH=width, DEFAULT_MAP_HEIGHT=height)
+    constants["MAX_TURNS"] = max_turns(width, height, constants)
+    constants.update(overrides)
+    return constants
+
+
+class BatchState:
+    """
+    State of num_games games with the same map size and number of players:
+        halite:     halite on each cell, (num_games, height, width)
+        energy:     halite banked by each player, (num_games, num_players)
+        deposited:  halite deposited by each player's ships so far, (num_games, num_players)
+        structures: player owning the shipyard or dropoff on each cell, -1 for none, (num_games, height, width)
+        shipyards:  (x, y) of each player's shipyard, (num_games, num_players, 2)
+        dropoffs:   per game, a list of (id, owner, x, y)
+        ships:      alive, owner, ids, x, y, cargo and inspired, (num_games, ship slots); dead slots are reused
+        changed:    cells whose halite changed during the last turn, (num_games, height, width)
+        turns:      number of turns played by each game, (num_games,)
+        done:       games that are over, (num_games,)
+    """
+    def __init__(self, halite, shipyards, constants):
+        halite = np.asarray(halite, dtype=np.int64)
+        self.shipyards = np.asarray(shipyards, dtype=np.int64)
+        self.constants = constants
+        self.num_games, self.height, self.width = halite.shape
+        self.num_players = self.shipyards.shape[1]
+        self.max_turns = constants["MAX_TURNS"]
+
+        self.halite = halite.copy()
+        self.energy = np.full((self.num_games, self.num_players), constants["INITIAL_ENERGY"], dtype=np.int64)
+        self.deposited = np.zeros((self.num_games, self.num_players), dtype=np.int64)
+        self.structures = np.full(halite.shape, -1, dtype=np.int64)
+        games = np.arange(self.num_games)[:, None]
+        self.structures[games, self.shipyards[..., 1], self.shipyards[..., 0]] = np.arange(self.num_players)
+        self.dropoffs = [[] for _ in range(self.num_games)]
+
+        slots = (self.num_games, INITIAL_SHIP_SLOTS)
+        self.alive = np.zeros(slots, dtype=bool)
+        self.owner = np.zeros(slots, dtype=np.int64)
+        # -1 for slots that never held a ship
+        self.ids = np.full(slots, -1, dtype=np.int64)
+        self.x = np.zeros(slots, dtype=np.int64)
+        self.y = np.zeros(slots, dtype=np.int64)
+        self.cargo = np.zeros(slots, dtype=np.int64)
+        self.inspired = np.zeros(slots, dtype=bool)
+        self.next_id = np.zeros(self.num_games, dtype=np.int64)
+
+        self.changed = np.zeros(halite.shape, dtype=bool)
+        self.turns = np.zeros(self.num_games, dtype=np.int64)
+        self.done = np.zeros(self.num_games, dtype=bool)
+
+    def reset_games(self, games, halite, shipyards):
+        """
+        Starts new games in place of some of the games
+        :param games: Indices of the games to replace
+        :param halite: Initial halite of the new games, (len(games), height, width)
+        :param shipyards: Shipyards of the new games, (len(games), num_players, 2)
+        """
+        games = np.asarray(games, dtype=np.int64)
+        shipyards = np.asarray(shipyards, dtype=np.int64)
+        self.halite[games] = halite
+        self.shipyards[games] = shipyards
+        self.energy[games] = self.constants["INITIAL_ENERGY"]
+        self.deposited[games] = 0
+        self.structures[games] = -1
+        self.structures[games[:, None], shipyards[..., 1], shipyards[..., 0]] = np.arange(self.num_players)
+        for game in games:
+            self.dropoffs[game] = []
+        self.alive[games] = False
+        self.ids[games] = -1
+        self.inspired[games] = False
+        self.cargo[games] = 0
+        self.next_id[games] = 0
+        self.changed[games] = False
+        self.turns[games] = 0
+        self.done[games] = False
+
+    @property
+    def num_slots(self):
+        return self.alive.shape[1]
+
+    def _free_slot(self, game):
+        free = np.flatnonzero(~self.alive[game])
+        if len(free):
+            return free[0]
+        slot = self.num_slots
+        for name in ("alive", "owner", "ids", "x", "y", "cargo", "inspired"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.full_like(array, -1 if name == "ids" else 0)], axis=1))
+        return slot
+
+    def ship_counts(self):
+        """
+        :return: Number of ships of each player, (num_games, num_players)
+        """
+        counts = np.zeros((self.num_games, self.num_players), dtype=np.int64)
+        games = np.broadcast_to(np.arange(self.num_games)[:, None], self.alive.shape)
+        np.add.at(counts, (games[self.alive], self.owner[self.alive]), 1)
+        return counts
+
+    def ranks(self):
+        """
+        :return: 1-based rank of each player by banked halite, ties going to the lower player id, (num_games, num_players)
+        """
+        # argsort is stable, so equal energies keep the player id order
+        order = np.argsort(-self.energy, axis=1, kind="stable")
+        return np.argsort(order, axis=1) + 1
+
+
+def _construct(state, construct):
+    constants = state.constants
+    for game, slot in zip(*np.nonzero(construct)):
+        x, y, owner = state.x[game, slot], state.y[game, slot], state.owner[game, slot]
+        if state.structures[game, y, x] >= 0:
+            continue
+        # The cargo and the halite of the cell count towards the cost, any excess is banked
+        cost = constants["DROPOFF_COST"] - state.cargo[game, slot] - state.halite[game, y, x]
+        if state.energy[game, owner] < cost:
+            continue
+        state.energy[game, owner] -= cost
+        state.halite[game, y, x] = 0
+        state.changed[game, y, x] = True
+        state.structures[game, y, x] = owner
+        state.dropoffs[game].append((int(state.next_id[game]), int(owner), int(x), int(y)))
+        state.next_id[game] += 1
+        state.alive[game, slot] = False
+
+
+def _spawn(state, spawn):
+    cost = state.constants["NEW_ENTITY_ENERGY_COST"]
+    spawned = []
+    for game, player in zip(*np.nonzero(spawn & (state.energy >= cost))):
+        state.energy[game, player] -= cost
+        slot = state._free_slot(game)
+        state.alive[game, slot] = True
+        state.owner[game, slot] = player
+        state.ids[game, slot] = state.next_id[game]
+        state.x[game, slot], state.y[game, slot] = state.shipyards[game, player]
+        state.cargo[game, slot] = 0
+        state.inspired[game, slot] = False
+        state.next_id[game] += 1
+        spawned.append((game, slot))
+    mask = np.zeros(state.alive.shape, dtype=bool)
+    if spawned:
+        mask[tuple(np.array(spawned).T)] = True
+    return mask
+
+
+def _collide(state, games):
+    cells = (games * state.height + state.y) * state.width + state.x
+    counts = np.bincount(cells[state.alive], minlength=state.num_games * state.height * state.width)
+    crashed = state.alive & (counts[cells] > 1)
+    if not crashed.any():
+        return
+    game, y, x, cargo = games[crashed], state.y[crashed], state.x[crashed], state.cargo[crashed]
+    structure = state.structures[game, y, x]
+    on_structure = structure >= 0
+    np.add.at(state.energy, (game[on_structure], structure[on_structure]), cargo[on_structure])
+    np.add.at(state.halite, (game[~on_structure], y[~on_structure], x[~on_structure]), cargo[~on_structure])
+    state.changed[game[~on_structure], y[~on_structure], x[~on_structure]] = True
+    state.alive &= ~crashed
+    state.cargo[crashed] = 0
+
+
+def _deposit(state, games):
+    home = state.alive & (state.structures[games, state.y, state.x] == state.owner)
+    np.add.at(state.energy, (games[home], state.owner[home]), state.cargo[home])
+    np.add.at(state.deposited, (games[home], state.owner[home]), state.cargo[home])
+    state.cargo[home] = 0
+
+
+def _inspire(state):
+    constants = state.constants
+    if not constants["INSPIRATION_ENABLED"]:
+        state.inspired[:] = False
+        return
+    # Ships are sparse, so pairwise distances between the ships of a game beat counting on the map planes
+    x, y = state.x.astype(np.int16), state.y.astype(np.int16)
+    dx = np.abs(x[:, :, None] - x[:, None, :])
+    dy = np.abs(y[:, :, None] - y[:, None, :])
+    distance = np.minimum(dx, state.width - dx) + np.minimum(dy, state.height - dy)
+    opponents = state.alive[:, None, :] & (state.owner[:, :, None] != state.owner[:, None, :])
+    nearby = (opponents & (distance <= constants["INSPIRATION_RADIUS"])).sum(axis=2)
+    state.inspired = state.alive & (nearby >= constants["INSPIRATION_SHIP_COUNT"])
+
+
+def _mine(state, games, miners):
+    constants = state.constants
+    game, y, x = games[miners], state.y[miners], state.x[miners]
+    inspired = state.inspired[miners]
+    halite = state.halite[game, y, x]
+    ratio = np.where(inspired, constants["INSPIRED_EXTRACT_RATIO"], constants["EXTRACT_RATIO"])
+    space = constants["MAX_ENERGY"] - state.cargo[miners]
+    extracted = np.minimum(-(-halite // ratio), space)
+    bonus = np.where(inspired, (extracted * constants["INSPIRED_BONUS_MULTIPLIER"]).astype(np.int64), 0)
+    bonus = np.minimum(bonus, space - extracted)
+    state.cargo[miners] += extracted + bonus
+    state.halite[game, y, x] = halite - extracted
+    state.changed[game, y, x] |= extracted > 0
+
+
+def step(state, actions, spawn):
+    """
+    Plays a turn of every game that isn't over
+    :param state: The BatchState, updated in place
+    :param actions: Action of each ship slot (STAY, NORTH, SOUTH, EAST, WEST or CONSTRUCT), (num_games, ship slots)
+    :param spawn: Whether each player spawns a ship, (num_games, num_players)
+    :return: The state
+    """
+    constants = state.constants
+    playing = ~state.done
+    state.changed[:] = False
+    actions = np.where(state.alive & playing[:, None], actions, STAY)
+
+    _construct(state, actions == CONSTRUCT)
+    spawned = _spawn(state, np.asarray(spawn, dtype=bool) & playing[:, None])
+    # Spawning may have added ship slots, the new ships stay still
+    actions = np.pad(actions, ((0, 0), (0, state.num_slots - actions.shape[1])), mode="constant")
+    actions = np.where(spawned | ~state.alive, STAY, actions)
+    games = np.broadcast_to(np.arange(state.num_games)[:, None], state.alive.shape)
+
+    moving = (actions >= NORTH) & (actions <= WEST)
+    ratio = np.where(state.inspired, constants["INSPIRED_MOVE_COST_RATIO"], constants["MOVE_COST_RATIO"])
+    cost = state.halite[games, state.y, state.x] // ratio
+    moving &= state.cargo >= cost
+    state.cargo -= np.where(moving, cost, 0)
+    state.x = np.where(moving, (state.x + DX[actions]) % state.width, state.x)
+    state.y = np.where(moving, (state.y + DY[actions]) % state.height, state.y)
+
+    _collide(state, games)
+    _deposit(state, games)
+    _inspire(state)
+    _mine(state, games, state.alive & ~moving & ~spawned & playing[:, None])
+
+    state.turns += playing
+    ship_counts = state.ship_counts()
+    in_game = (ship_counts > 0) | (state.energy >= constants["NEW_ENTITY_ENERGY_COST"])
+    state.done |= (state.turns >= state.max_turns) | (in_game.sum(axis=1) <= 1)
+    return state
@@ -0,0 +1,53 @@
+#test_engine.py
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from hlt.sim import rules
+from hlt.sim.engine import play, split_commands
+from hlt.timing import TIMINGS_ENV, TIMINGS_FILE, TurnTimer, read_timings, summarize_turns
+
+BOT = os.path.join(os.path.dirname(__file__), "..", "..", "MyBot.py")
+
+class EngineTestCase(unittest.TestCase):
+	""" Tests for sim.engine and the turn timings of hlt.timing """
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.folder)
+
+	def test_split_commands(self):
+		self.assertEqual(split_commands("m 3 n c 4 g m 5 o"), ["m 3 n", "c 4", "g", "m 5 o"])
+		self.assertEqual(split_commands(""), [])
+
+	def test_play_bots(self):
+		command = "{} {}".format(sys.executable, os.path.abspath(BOT))
+		env = dict(os.environ, **{TIMINGS_ENV: self.folder})
+		ranks, names = play([command, command], 32, 32, seed=1, constants=rules.game_constants(32, 32, MAX_TURNS=20), cwd=self.folder, env=env)
+		self.assertEqual(sorted(ranks), [1, 2])
+		self.assertEqual(names, ["MyPythonBot", "MyPythonBot"])
+		turns = read_timings(os.path.join(self.folder, TIMINGS_FILE.format(0)))
+		self.assertEqual([turn["turn"] for turn in turns], list(range(1, 21)))
+		summary = summarize_turns(turns)
+		self.assertLessEqual(summary["p50_ms"], summary["max_ms"])
+		self.assertGreater(summary["peak_rss_kib"], 0)
+
+	def test_timings_written_after_turn(self):
+		path = os.path.join(self.folder, TIMINGS_FILE.format(0))
+		timer = TurnTimer(path)
+		for turn in (1, 2):
+			timer.start(turn)
+			seconds = timer.stop()
+			# nothing is written until the commands are sent
+			self.assertEqual(len(read_timings(path)), turn - 1)
+			timer.write()
+			timer.write()
+			self.assertEqual(read_timings(path)[-1]["seconds"], seconds)
+		timer.close()
+		self.assertEqual([turn["turn"] for turn in read_timings(path)], [1, 2])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,60 @@
+#test_env.py
+
+import unittest
+import numpy as np
+from hlt.sim import rules
+from hlt.sim.env import Bucket, BatchEnv, player_planes
+
+class EnvTestCase(unittest.TestCase):
+	""" Tests for env """
+	def test_spawn_and_move(self):
+		bucket = Bucket(32, 32, num_games=3, seed=5)
+		observation = bucket.reset()
+		self.assertEqual(observation["halite"].shape, (3, 32, 32))
+		self.assertTrue((observation["ships"] == -1).all())
+
+		observation, rewards, done = bucket.step(np.zeros((3, 32, 32), dtype=int), np.array([[True, False]] * 3))
+		self.assertEqual((observation["ships"] == 0).sum(), 3)
+		self.assertEqual(observation["ships"][0, 16, 8], 0)
+		self.assertEqual(list(rewards[0]), [-1000, 0])
+		self.assertFalse(done.any())
+
+		actions = np.zeros((3, 32, 32), dtype=int)
+		actions[:, 16, 8] = rules.NORTH
+		observation, _, _ = bucket.step(actions, np.zeros((3, 2), dtype=bool))
+		self.assertEqual(observation["ships"][1, 15, 8], 0)
+		self.assertEqual(observation["turns"].tolist(), [2, 2, 2])
+
+	def test_seeds(self):
+		first, second = Bucket(32, 32, num_games=2, seed=7), Bucket(32, 32, num_games=2, seed=7)
+		np.testing.assert_array_equal(first.reset()["halite"], second.reset()["halite"])
+		self.assertEqual(first.seeds.tolist(), [7, 8])
+		first.reset([1])
+		self.assertEqual(first.seeds.tolist(), [7, 9])
+
+	def test_auto_reset(self):
+		bucket = Bucket(32, 32, num_games=2, constants=rules.game_constants(32, 32, MAX_TURNS=3))
+		bucket.reset()
+		no_actions = np.zeros((2, 32, 32), dtype=int), np.zeros((2, 2), dtype=bool)
+		for _ in range(2):
+			_, _, done = bucket.step(*no_actions, auto_reset=True)
+			self.assertFalse(done.any())
+		observation, _, done = bucket.step(*no_actions, auto_reset=True)
+		self.assertTrue(done.all())
+		self.assertEqual(observation["turns"].tolist(), [0, 0])
+		self.assertEqual(bucket.seeds.tolist(), [2, 3])
+
+	def test_batch_env(self):
+		env = BatchEnv(map_sizes=(32, 40), games_per_size=2, workers=2)
+		observations = env.reset()
+		self.assertEqual([obs["halite"].shape for obs in observations], [(2, 32, 32), (2, 40, 40)])
+		actions = [(np.zeros(obs["halite"].shape, dtype=int), np.ones((2, 2), dtype=bool)) for obs in observations]
+		observations, rewards, done = env.step(actions)
+		planes = player_planes(observations[1], 1)
+		self.assertEqual(planes.shape, (2, 40, 40, 4))
+		self.assertEqual(planes[..., 1].sum(), 0)
+		self.assertEqual(planes[..., 2].sum(), 0)
+		env.close()
+
+if __name__ == "__main__":
+	unittest.main()
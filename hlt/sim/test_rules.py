@@ -0,0 +1,100 @@
+#test_rules.py
+
+import unittest
+import numpy as np
+from hlt.sim import rules
+from hlt.sim.rules import BatchState, step, game_constants, STAY, NORTH, EAST, CONSTRUCT
+from hlt.sim.mapgen import generate_map
+from hlt.sim.local import LocalGames, RandomBot
+
+def make_state(halite, ships, energy=5000):
+	""" ships as (owner, x, y, cargo) in a single game with shipyards at (0, 0) and (4, 4) """
+	halite = np.array(halite)[None]
+	state = BatchState(halite, [[(0, 0), (4, 4)]], game_constants(8, 8, INITIAL_ENERGY=energy))
+	for slot, (owner, x, y, cargo) in enumerate(ships):
+		state.alive[0, slot] = True
+		state.owner[0, slot], state.x[0, slot], state.y[0, slot], state.cargo[0, slot] = owner, x, y, cargo
+		state.ids[0, slot] = slot
+	state.next_id[0] = len(ships)
+	return state
+
+def play(state, actions, spawn=((False, False),)):
+	padded = np.full((1, state.num_slots), STAY)
+	padded[0, :len(actions)] = actions
+	return step(state, padded, np.array(spawn))
+
+class RulesTestCase(unittest.TestCase):
+	""" Tests for rules """
+	def test_max_turns(self):
+		self.assertEqual([rules.max_turns(size, size) for size in (32, 40, 48, 56, 64)], [400, 425, 450, 475, 500])
+
+	def test_mining_rounds_up(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		halite[2, 2], halite[3, 3] = 101, 3
+		state = play(make_state(halite, [(0, 2, 2, 0), (0, 3, 3, 990)]), [STAY, STAY])
+		self.assertEqual(list(state.cargo[0, :2]), [26, 991])
+		self.assertEqual((state.halite[0, 2, 2], state.halite[0, 3, 3]), (75, 2))
+		self.assertTrue(state.changed[0, 2, 2])
+
+	def test_move_cost(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		halite[2, 2], halite[5, 5] = 95, 500
+		state = play(make_state(halite, [(0, 2, 2, 20), (0, 5, 5, 20)]), [EAST, NORTH])
+		# 95 / 10 truncated is paid to move, the second ship can't pay 50 and mines instead
+		self.assertEqual((state.x[0, 0], state.cargo[0, 0]), (3, 11))
+		self.assertEqual((state.y[0, 1], state.cargo[0, 1]), (5, 145))
+
+	def test_collision(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		state = play(make_state(halite, [(0, 2, 2, 100), (1, 3, 3, 50), (1, 5, 4, 70)]), [EAST, NORTH, EAST])
+		# the first two ships collide on (3, 2) and drop their cargo there, the third one just moves
+		self.assertFalse(state.alive[0, 0] or state.alive[0, 1])
+		self.assertEqual(state.halite[0, 2, 3], 150)
+		self.assertTrue(state.alive[0, 2])
+
+	def test_collision_on_structure(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		state = play(make_state(halite, [(0, 3, 4, 100), (1, 5, 4, 50)]), [EAST, rules.WEST])
+		self.assertEqual(list(state.energy[0]), [5000, 5150])
+
+	def test_deposit_and_spawn(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		state = play(make_state(halite, [(0, 1, 0, 300)]), [rules.WEST], spawn=((False, True),))
+		self.assertEqual(list(state.energy[0]), [5300, 4000])
+		self.assertEqual(state.ship_counts().tolist(), [[1, 1]])
+
+	def test_inspiration(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		halite[2, 2] = 100
+		state = play(make_state(halite, [(0, 2, 2, 0), (1, 2, 4, 0), (1, 4, 2, 0)]), [STAY, STAY, STAY])
+		self.assertTrue(state.inspired[0, 0])
+		self.assertEqual(state.cargo[0, 0], 25 + 50)
+
+	def test_construct(self):
+		halite = np.zeros((8, 8), dtype=np.int64)
+		halite[2, 2] = 300
+		state = play(make_state(halite, [(0, 2, 2, 200)]), [CONSTRUCT])
+		self.assertEqual(state.energy[0, 0], 5000 - (4000 - 200 - 300))
+		self.assertEqual(state.structures[0, 2, 2], 0)
+		self.assertEqual(state.dropoffs[0], [(1, 0, 2, 2)])
+		self.assertFalse(state.alive[0, 0])
+
+	def test_generate_map_symmetric(self):
+		halite, shipyards = generate_map(32, 32, 4, seed=1)
+		np.testing.assert_array_equal(halite, halite[:, ::-1])
+		np.testing.assert_array_equal(halite, halite[::-1])
+		self.assertEqual(shipyards[0], (8, 8))
+		halite, shipyards = generate_map(48, 48, 2, seed=1)
+		self.assertEqual(shipyards, [(12, 24), (35, 24)])
+
+	def test_local_games(self):
+		games = LocalGames([lambda: RandomBot(0), lambda: RandomBot(1)], num_games=2, width=32, height=32, seed=0)
+		ranks = games.play()
+		# games end after 400 turns on 32x32 maps, or once a player has no ships and can't spawn one
+		self.assertTrue(games.done)
+		self.assertLessEqual(games.state.turns.max(), 400)
+		self.assertEqual(sorted(ranks[0]), [1, 2])
+		self.assertEqual(games.games[0][0].turn_number, games.state.turns[0])
+
+if __name__ == "__main__":
+	unittest.main()
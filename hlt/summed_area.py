@@ -0,0 +1,198 @@
+"""
+Summed-area tables of the halite on the map, for O(1) region sums on the torus (see GameMap.halite_sums).
+
+Region sums count every cell once, even when the region wraps all the way around the map:
+    box(position, r):       the cells within r of position along both axes, a (2r + 1) square on large maps
+    diamond(position, r):   the cells within a wrap-around Manhattan distance r of position (calculate_distance)
+
+Box sums use the integral image of the map, splitting a wrapping box into at most four rectangles.
+Diamond sums use the integral image of the map padded by max_radius cells on every side and rotated by
+45 degrees, where the diamond is a square; radii over max_radius, where the diamond would overlap itself,
+fall back to summing rows (O(r)). The tables are rebuilt on the first query after the halite changed, once
+per turn at most, as a rebuild is a couple of vectorized cumulative sums while updating them in place costs
+O(width * height) per changed cell.
+"""
+
+import numpy as np
+
+
+def _integral(arr):
+    """
+    :return: The integral image of arr, with a leading row and column of zeros
+    """
+    integral = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1), dtype=np.int64)
+    np.cumsum(arr, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    return integral
+
+
+def _segments(center, radius, size):
+    """
+    :return: The [start, end) ranges covering center - radius to center + radius on an axis of size cells
+    """
+    if 2 * radius + 1 >= size:
+        return ((0, size),)
+    start = (center - radius) % size
+    end = start + 2 * radius + 1
+    if end <= size:
+        return ((start, end),)
+    return ((start, size), (0, end - size))
+
+
+def window_sums(arr, radius, axis):
+    """
+    Sum of the cells within radius of every cell along an axis, wrapping around and counting every cell once
+    :param arr: Array of shape (height, width)
+    :param radius: The window radius
+    :param axis: 0 for columns (along y), 1 for rows (along x)
+    :return: Array of shape (height, width)
+    """
+    size = arr.shape[axis]
+    if 2 * radius + 1 >= size:
+        return np.broadcast_to(arr.sum(axis=axis, keepdims=True), arr.shape).copy()
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius + 1, radius)
+    padded = np.pad(arr, pad, mode="wrap").cumsum(axis=axis)
+    upper = np.take(padded, np.arange(2 * radius + 1, size + 2 * radius + 1), axis=axis)
+    lower = np.take(padded, np.arange(size), axis=axis)
+    return upper - lower
+
+
+def box_sums(arr, radius):
+    """
+    Sum of the (2 * radius + 1) square window around every cell, wrapping around and counting every cell once
+    :param arr: Array of shape (height, width)
+    :param radius: The window radius
+    :return: Array of shape (height, width)
+    """
+    return window_sums(window_sums(arr, radius, 0), radius, 1)
+
+
+def box_size(shape, radius):
+    """
+    :return: The number of distinct cells in a box of radius on a map of shape (height, width)
+    """
+    return min(2 * radius + 1, shape[0]) * min(2 * radius + 1, shape[1])
+
+
+class HaliteSums:
+    """
+    Box and diamond halite sums of a map, see the module docstring
+    """
+    def __init__(self, halite):
+        """
+        :param halite: The halite on each cell, an array of shape (height, width)
+        """
+        self.halite = np.array(halite, dtype=np.int64)
+        self.height, self.width = self.halite.shape
+        # Diamonds up to this radius don't overlap themselves
+        self.max_radius = (min(self.width, self.height) - 1) // 2
+        self._integral = None
+        self._rotated = None
+        # Where every cell of the padded map goes in the rotated one, and its shape
+        pad = self.max_radius
+        rows = np.arange(-pad, self.height + pad) % self.height
+        columns = np.arange(-pad, self.width + pad) % self.width
+        ys, xs = np.indices((len(rows), len(columns)))
+        self._rotated_shape = (len(rows) + len(columns) - 1,) * 2
+        self._rotation = (np.ravel_multi_index((xs + ys, xs - ys + len(rows) - 1), self._rotated_shape).ravel(),
+                          np.ravel_multi_index((rows[ys], columns[xs]), self.halite.shape).ravel())
+
+    @staticmethod
+    def from_map(game_map):
+        from .precompute import halite_array
+        return HaliteSums(halite_array(game_map))
+
+    def set(self, x, y, halite):
+        """
+        Called by GameMap._update for every cell whose halite changed
+        """
+        self.halite[y, x] = halite
+        self._integral = None
+        self._rotated = None
+
+    @property
+    def total(self):
+        """
+        :return: The halite on the whole map
+        """
+        return int(self._box_integral()[-1, -1])
+
+    def _box_integral(self):
+        if self._integral is None:
+            self._integral = _integral(self.halite)
+        return self._integral
+
+    def _rotated_integral(self):
+        """
+        The map padded by max_radius, (x, y) going to (u, v) = (x + y, x - y + padded height - 1),
+        where a diamond of radius r around (u, v) is the square of the cells within r
+        """
+        if self._rotated is None:
+            targets, sources = self._rotation
+            rotated = np.zeros(self._rotated_shape, dtype=np.int64)
+            rotated.flat[targets] = self.halite.flat[sources]
+            self._rotated = _integral(rotated)
+        return self._rotated
+
+    def _rectangle(self, x_segment, y_segment):
+        integral = self._box_integral()
+        (x0, x1), (y0, y1) = x_segment, y_segment
+        return integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+
+    def box(self, position, radius):
+        """
+        :param position: The box center
+        :param radius: The box radius
+        :return: The halite in the box
+        """
+        return int(sum(self._rectangle(x_segment, y_segment)
+                       for x_segment in _segments(position.x, radius, self.width)
+                       for y_segment in _segments(position.y, radius, self.height)))
+
+    def _row(self, x, y, radius):
+        return sum(self._rectangle(x_segment, (y % self.height, y % self.height + 1))
+                   for x_segment in _segments(x, radius, self.width))
+
+    def _row_offsets(self, radius):
+        """
+        :return: (dy, distance) of the distinct rows within radius, distance being the wrap-around one
+        """
+        offsets = range(-(self.height // 2) + (1 - self.height % 2), self.height // 2 + 1)
+        return [(dy, abs(dy)) for dy in offsets if abs(dy) <= radius]
+
+    def diamond(self, position, radius):
+        """
+        :param position: The diamond center
+        :param radius: The wrap-around Manhattan distance of the cells to the center
+        :return: The halite in the diamond
+        """
+        if radius > self.max_radius:
+            return int(sum(self._row(position.x, position.y + dy, radius - distance)
+                           for dy, distance in self._row_offsets(radius)))
+        integral = self._rotated_integral()
+        x, y = position.x % self.width + self.max_radius, position.y % self.height + self.max_radius
+        u, v = x + y, x - y + self.height + 2 * self.max_radius - 1
+        return int(integral[u + radius + 1, v + radius + 1] - integral[u - radius, v + radius + 1]
+                   - integral[u + radius + 1, v - radius] + integral[u - radius, v - radius])
+
+    def box_sums(self, radius):
+        """
+        :param radius: The box radius
+        :return: box(position, radius) of every cell, an array of shape (height, width)
+        """
+        return box_sums(self.halite, radius)
+
+    def diamond_sums(self, radius):
+        """
+        :param radius: The diamond radius
+        :return: diamond(position, radius) of every cell, an array of shape (height, width)
+        """
+        if radius > self.max_radius:
+            return sum(np.roll(window_sums(self.halite, radius - distance, 1), -dy, axis=0)
+                       for dy, distance in self._row_offsets(radius))
+        integral = self._rotated_integral()
+        ys, xs = np.indices(self.halite.shape) + self.max_radius
+        u, v = xs + ys, xs - ys + self.height + 2 * self.max_radius - 1
+        return (integral[u + radius + 1, v + radius + 1] - integral[u - radius, v + radius + 1]
+                - integral[u + radius + 1, v - radius] + integral[u - radius, v - radius])
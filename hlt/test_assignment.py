@@ -0,0 +1,54 @@
+#test_assignment.py
+
+import itertools
+import random
+import unittest
+import numpy as np
+from hlt import constants
+from hlt.assignment import assign_targets, auction
+from hlt.entity import Shipyard, Ship
+from hlt.game_map import GameMap, MapCell
+from hlt.player import Player
+from hlt.positionals import Position
+from hlt.sim import rules
+from hlt.sim.mapgen import generate_map
+
+class AssignmentTestCase(unittest.TestCase):
+	""" Tests for assignment """
+	def tearDown(self):
+		constants.load_constants(rules.game_constants(32, 32))
+
+	def test_auction_optimal(self):
+		rng = np.random.RandomState(0)
+		for _ in range(20):
+			values = rng.uniform(-20, 100, size=(5, 6))
+			candidates = np.tile(np.arange(6), (5, 1))
+			assigned, complete = auction(values, candidates, 6, epsilon=1e-3)
+			self.assertTrue(complete)
+			taken = assigned[assigned >= 0]
+			self.assertEqual(len(taken), len(set(taken)))
+			total = sum(values[row, target] for row, target in enumerate(assigned) if target >= 0)
+			# every row takes an object or none (-1)
+			best = max(sum(values[row, target] for row, target in enumerate(choice) if target >= 0)
+				for choice in itertools.product(range(-1, 6), repeat=5) if len([t for t in choice if t >= 0]) == len(set(t for t in choice if t >= 0)))
+			self.assertGreaterEqual(total, best - 5 * 1e-3)
+
+	def test_assign_targets(self):
+		constants.load_constants(rules.game_constants(64, 64))
+		halite, shipyards = generate_map(64, 64, 2, 1)
+		game_map = GameMap([[MapCell(Position(x, y), int(halite[y, x])) for x in range(64)] for y in range(64)], 64, 64)
+		rng = random.Random(0)
+		players = []
+		for player, (x, y) in enumerate(shipyards):
+			players.append(Player(player, Shipyard(player, -1, Position(int(x), int(y)))))
+			for ship_id in range(player * 1000, player * 1000 + 200):
+				players[-1]._ships[ship_id] = Ship(player, ship_id, Position(rng.randrange(64), rng.randrange(64)), rng.randrange(500))
+		for capacity in (1, 2):
+			targets = assign_targets(game_map, players[0], players, budget=1.0, capacity=capacity)
+			self.assertGreater(len(targets), 100)
+			cells = [(target.x, target.y) for target in targets.values()]
+			self.assertLessEqual(max(cells.count(cell) for cell in cells), capacity)
+		self.assertTrue(assign_targets(game_map, players[0], players, budget=0.0))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,62 @@
+#test_capture.py
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from hlt import capture
+from hlt.positionals import Direction
+from hlt.sim import rules
+from hlt.sim.engine import play
+
+BOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "MyBot.py"))
+TURNS = 20
+
+class CaptureTestCase(unittest.TestCase):
+	""" Tests capturing the engine input of bots and replaying it """
+	@classmethod
+	def setUpClass(cls):
+		cls.folder = tempfile.mkdtemp()
+		command = "{} {}".format(sys.executable, BOT)
+		env = dict(os.environ, **{capture.CAPTURE_ENV: cls.folder})
+		play([command, command], 32, 32, seed=3, constants=rules.game_constants(32, 32, MAX_TURNS=TURNS), cwd=cls.folder, env=env)
+		cls.path = os.path.join(cls.folder, capture.CAPTURE_FILE.format(1))
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.folder)
+
+	def test_capture(self):
+		lines = capture.read_capture(self.path)
+		self.assertEqual(lines[1], "2 1")
+		self.assertIn(str(TURNS), lines)
+
+	def test_truncated(self):
+		truncated = os.path.join(self.folder, "truncated.input.gz")
+		with open(self.path, "rb") as f:
+			data = f.read()
+		with open(truncated, "wb") as f:
+			f.write(data[:len(data) // 2])
+		lines = capture.read_capture(truncated)
+		self.assertLess(len(lines), len(capture.read_capture(self.path)))
+		self.assertEqual(lines, capture.read_capture(self.path)[:len(lines)])
+
+	def test_replay(self):
+		cwd = os.getcwd()
+		os.chdir(self.folder)
+		try:
+			turns = []
+			def play_turn(game):
+				turns.append(game.turn_number)
+				return [ship.move(Direction.North) for ship in game.me.get_ships()] + [game.me.shipyard.spawn()]
+			game = capture.replay(self.path, play_turn)
+		finally:
+			os.chdir(cwd)
+		self.assertEqual(game.my_id, 1)
+		self.assertEqual(turns, list(range(1, TURNS + 1)))
+		self.assertEqual(len(game.timer.turn_seconds), TURNS)
+		self.assertFalse(capture._replaying)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,32 @@
+#test_dropoffs.py
+
+import unittest
+import numpy as np
+from hlt.dropoffs import DropoffScorer
+from hlt.precompute import MIN_DROPOFF_DISTANCE
+from hlt.sim.local import LocalGames, RandomBot, _feed, frame_lines, initial_lines
+from hlt.networking import Game
+
+class DropoffsTestCase(unittest.TestCase):
+	""" Tests for dropoffs """
+	def test_incremental_scores(self):
+		games = LocalGames([lambda: RandomBot(0), lambda: RandomBot(1)], width=32, height=32, seed=4)
+		game = _feed(initial_lines(games.state, 0, 0), Game)
+		for _ in range(60):
+			games.play_turn()
+			_feed(frame_lines(games.state, 0), game.update_frame)
+			scorer = game.game_map.score_dropoffs(game.me, game.players.values(), game.turn_number)
+		fresh = DropoffScorer(game.game_map)
+		fresh.score(game.me, game.players.values(), game.turn_number)
+		np.testing.assert_array_equal(scorer.halite, fresh.halite)
+		np.testing.assert_array_equal(scorer.scores, fresh.scores)
+
+		sites = scorer.best(3)
+		self.assertTrue(sites)
+		shipyard = game.me.shipyard.position
+		for x, y in sites:
+			self.assertGreaterEqual(scorer.distance_table[(y - shipyard.y) % 32, (x - shipyard.x) % 32], MIN_DROPOFF_DISTANCE)
+			self.assertGreater(scorer.scores[y, x], 0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,66 @@
+#test_fleet.py
+
+import random
+import unittest
+from hlt import constants
+from hlt.entity import Shipyard, Ship
+from hlt.fleet import inspire
+from hlt.game_map import GameMap, MapCell
+from hlt.networking import Game
+from hlt.player import Player
+from hlt.positionals import Position
+from hlt.sim import rules
+from hlt.sim.local import LocalGames, RandomBot, _feed, frame_lines, initial_lines
+
+class FleetTestCase(unittest.TestCase):
+	""" Tests for fleet, against the Ship objects """
+	def tearDown(self):
+		constants.load_constants(rules.game_constants(32, 32))
+
+	def test_update(self):
+		games = LocalGames([lambda player=player: RandomBot(player) for player in range(4)], width=32, height=32, seed=1)
+		game = _feed(initial_lines(games.state, 0, 0), Game)
+		fleet = game.me.fleet
+		first_seen = {}
+		for _ in range(80):
+			games.play_turn()
+			_feed(frame_lines(games.state, 0), game.update_frame)
+			for ship in game.me.get_ships():
+				first_seen.setdefault(ship.id, game.turn_number)
+		ships = sorted(game.me.get_ships(), key=lambda ship: ship.id)
+		self.assertGreater(len(ships), 1)
+		self.assertIs(game.me.fleet, fleet)
+		self.assertEqual(fleet.id.tolist(), [ship.id for ship in ships])
+		self.assertEqual(fleet.x.tolist(), [ship.position.x for ship in ships])
+		self.assertEqual(fleet.cargo.tolist(), [ship.halite_amount for ship in ships])
+		self.assertEqual(fleet.age.tolist(), [game.turn_number - first_seen[ship.id] for ship in ships])
+		self.assertEqual(fleet.ships(fleet.id == ships[-1].id), [ships[-1]])
+		self.assertEqual(fleet.row(ships[-1].id), len(ships) - 1)
+		self.assertIsNone(fleet.row(-5))
+
+	def test_queries(self):
+		constants.load_constants(rules.game_constants(32, 32))
+		game_map = GameMap([[MapCell(Position(x, y), 0) for x in range(32)] for y in range(32)], 32, 32)
+		rng = random.Random(0)
+		players = [Player(player, Shipyard(player, -1, Position(8 + 16 * (player % 2), 8 + 16 * (player // 2)))) for player in range(4)]
+		for player in players:
+			player._update(0, 0, 0)
+			for ship_id in range(player.id * 100, player.id * 100 + 60):
+				player._ships[ship_id] = Ship(player.id, ship_id, Position(rng.randrange(32), rng.randrange(32)), rng.randrange(1000))
+			player.fleet.update(player._ships)
+		inspire(players, game_map)
+
+		me = players[0]
+		ships = sorted(me.get_ships(), key=lambda ship: ship.id)
+		enemies = [ship for player in players[1:] for ship in player.get_ships()]
+		inspired = [sum(game_map.calculate_distance(ship.position, enemy.position) <= constants.INSPIRATION_RADIUS for enemy in enemies)
+			>= constants.INSPIRATION_SHIP_COUNT for ship in ships]
+		self.assertEqual(me.fleet.inspired.tolist(), inspired)
+		self.assertTrue(any(inspired))
+		fleet = me.fleet
+		near = (fleet.cargo > 500) & fleet.within([me.shipyard.position, Position(40, 3)], 10, game_map)
+		self.assertEqual(fleet.ids(near), [ship.id for ship in ships if ship.halite_amount > 500 and
+			min(game_map.calculate_distance(ship.position, target) for target in [me.shipyard.position, Position(40, 3)]) <= 10])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,45 @@
+#test_lazy.py
+
+import unittest
+from hlt.lazy import Preloader, import_profile, format_profile
+
+# generous upper bound on `import hlt`, which takes a few milliseconds when NumPy is kept out of it
+IMPORT_BUDGET_US = 250000
+
+class LazyTestCase(unittest.TestCase):
+	""" Tests for lazy """
+	def test_import_hlt_profile(self):
+		profile = import_profile("import hlt")
+		modules = [entry["module"] for entry in profile]
+		self.assertIn("hlt.networking", modules)
+		self.assertNotIn("numpy", modules)
+		hlt_entry = [entry for entry in profile if entry["module"] == "hlt"][0]
+		self.assertEqual(hlt_entry["depth"], 0)
+		self.assertLess(hlt_entry["cumulative_us"], IMPORT_BUDGET_US)
+		self.assertTrue(all(0 <= entry["self_us"] <= entry["cumulative_us"] for entry in profile))
+		# hlt's own modules are imported within it
+		self.assertTrue(all(entry["depth"] > 0 and entry["cumulative_us"] <= hlt_entry["cumulative_us"]
+			for entry in profile if entry["module"].startswith("hlt.")))
+		report = format_profile(profile, limit=10).splitlines()
+		self.assertEqual(len(report), 11)
+		slowest = max(profile, key=lambda entry: entry["cumulative_us"])
+		self.assertTrue(report[1].endswith("| " + slowest["module"]))
+
+	def test_import_preloader_profile(self):
+		modules = [entry["module"] for entry in import_profile("import hlt.lazy")]
+		self.assertNotIn("numpy", modules)
+		self.assertNotIn("subprocess", modules)
+
+	def test_preloader(self):
+		preloader = Preloader().add_module("json").add("answer", lambda x: x * 2, 21).start()
+		self.assertEqual(preloader["answer"], 42)
+		self.assertTrue(preloader.done)
+		self.assertIn("json", preloader.wait())
+
+	def test_preloader_error(self):
+		preloader = Preloader().add_module("not_a_module_hlt").start()
+		with self.assertRaises(ImportError):
+			preloader.wait()
+
+if __name__ == "__main__":
+	unittest.main()
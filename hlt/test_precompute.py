@@ -0,0 +1,70 @@
+#test_precompute.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from hlt.game_map import GameMap, MapCell
+from hlt.positionals import Position
+from hlt.precompute import PYRAMID_RADII, Precomputed, distances_from, distance_table
+from hlt.summed_area import box_sums
+
+class PrecomputeTestCase(unittest.TestCase):
+	""" Tests for precompute """
+	def setUp(self):
+		self.width, self.height = 16, 12
+		self.halite = np.random.RandomState(0).randint(0, 1000, size=(self.height, self.width))
+		cells = [[MapCell(Position(x, y), int(self.halite[y, x])) for x in range(self.width)] for y in range(self.height)]
+		self.game_map = GameMap(cells, self.width, self.height)
+		self.shipyards = [Position(3, 6), Position(12, 6)]
+		self.cache_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.cache_dir)
+
+	def test_box_sums(self):
+		# Up to radii where the box wraps all the way around the map, counting each cell once
+		for radius in (2, 6, 8):
+			sums = box_sums(self.halite, radius)
+			for y, x in [(0, 0), (11, 15), (5, 7)]:
+				cells = {((y + dy) % self.height, (x + dx) % self.width)
+					for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)}
+				self.assertEqual(sums[y, x], sum(self.halite[cell] for cell in cells))
+
+	def test_pyramid(self):
+		pyramid = self.game_map.precompute(self.shipyards, use_cache=False).pyramid
+		# The largest window covers the whole map, whose mean it is everywhere
+		self.assertEqual(PYRAMID_RADII[-1], 8)
+		np.testing.assert_allclose(pyramid[-1], np.full(self.halite.shape, self.halite.mean()))
+
+	def test_distances(self):
+		distances = distances_from(distance_table(self.width, self.height), self.shipyards)
+		for y in range(self.height):
+			for x in range(self.width):
+				expected = min(self.game_map.calculate_distance(Position(x, y), s) for s in self.shipyards)
+				self.assertEqual(distances[y, x], expected)
+
+	def test_cache(self):
+		computed = self.game_map.precompute(self.shipyards, cache_dir=self.cache_dir)
+		self.assertEqual([f for f in os.listdir(self.cache_dir) if not f.endswith(".npz")], [])
+		with mock.patch.object(Precomputed, "compute", side_effect=AssertionError("not loaded from the cache")):
+			cached = self.game_map.precompute(self.shipyards, cache_dir=self.cache_dir)
+		self.assertEqual(computed.key, cached.key)
+		np.testing.assert_array_equal(computed.dropoff_scores, cached.dropoff_scores)
+		np.testing.assert_array_equal(computed.dropoff_candidates, cached.dropoff_candidates)
+		# a partial or empty file, as left by a bot writing it, is a cache miss
+		path = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+		with open(path, "rb") as f:
+			partial = f.read()[:100]
+		for content in (partial, b""):
+			with open(path, "wb") as f:
+				f.write(content)
+			recomputed = self.game_map.precompute(self.shipyards, cache_dir=self.cache_dir)
+			np.testing.assert_array_equal(recomputed.dropoff_scores, computed.dropoff_scores)
+		self.game_map[Position(0, 0)].halite_amount += 1
+		self.assertNotEqual(self.game_map.precompute(self.shipyards, cache_dir=self.cache_dir).key, computed.key)
+
+if __name__ == "__main__":
+	unittest.main()
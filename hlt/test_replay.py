@@ -0,0 +1,57 @@
+#test_replay.py
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from hlt import replay
+from hlt.sim.local import LocalGames, RandomBot
+from hlt.encoders.historic import HistoricEncoder
+
+class ReplayTestCase(unittest.TestCase):
+	""" Tests for replay """
+	def play(self, directory):
+		games = LocalGames([lambda: RandomBot(0), lambda: RandomBot(1)], num_games=1, width=32, height=32, seed=3, replay_dir=directory)
+		ranks = games.play()
+		return games, ranks, os.path.join(directory, os.listdir(directory)[0])
+
+	def test_local_games_replay(self):
+		with tempfile.TemporaryDirectory() as directory:
+			games, ranks, path = self.play(directory)
+			data = replay.load_replay(path)
+		state = games.state
+		self.assertEqual(data["REPLAY_FILE_VERSION"], replay.REPLAY_FILE_VERSION)
+		self.assertEqual(len(data["full_frames"]), state.turns[0] + 1)
+		self.assertEqual(data["production_map"]["width"], 32)
+		self.assertEqual([player["rank"] for player in data["game_statistics"]["player_statistics"]], list(ranks[0]))
+		last = data["full_frames"][-1]
+		self.assertEqual(last["energy"], {str(player): int(energy) for player, energy in enumerate(state.energy[0])})
+		# the ships of each frame are those of the previous one, plus the spawned ones, minus the wrecked ones
+		frames = data["full_frames"]
+		for frame, next_frame in zip(frames[1:], frames[2:]):
+			ships = {int(ship) for ships in frame["entities"].values() for ship in ships}
+			ships |= {event["id"] for event in frame["events"] if event["type"] == "spawn"}
+			ships -= {ship for event in frame["events"] if event["type"] == "shipwreck" for ship in event["ships"]}
+			self.assertEqual(ships, {int(ship) for ships in next_frame["entities"].values() for ship in ships})
+
+	def test_encoder_reads_replay(self):
+		with tempfile.TemporaryDirectory() as directory:
+			games, _, path = self.play(directory)
+			encoded = HistoricEncoder().encode_from_dict(replay.load_replay(path))
+		state = games.state
+		self.assertEqual(encoded["num_frames"], state.turns[0] + 1)
+		np.testing.assert_array_equal(encoded["halites"][-1, :, :, 0], state.halite[0])
+		self.assertEqual(len(encoded["structures"][-1]["0"]), 1 + sum(1 for dropoff in state.dropoffs[0] if dropoff[1] == 0))
+
+	@unittest.skipUnless(replay.has_zstandard(), "zstandard is not installed")
+	def test_compressed(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "replay.hlt")
+			with replay.ReplayWriter(path, {}, [("a", 0, 0), ("b", 1, 1)], [[1, 2], [3, 4]]) as writer:
+				writer.write_frame(energy={"0": 10, "1": 20})
+			data = replay.load_replay(path)
+		self.assertEqual(len(data["full_frames"]), 2)
+		self.assertEqual([player["rank"] for player in data["game_statistics"]["player_statistics"]], [2, 1])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,86 @@
+#test_runtime.py
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from hlt import runtime
+
+def naive_conv2d(x, kernel, bias, padding):
+	kernel_height, kernel_width = kernel.shape[:2]
+	if padding == "same":
+		top, left = (kernel_height - 1) // 2, (kernel_width - 1) // 2
+		x = np.pad(x, ((0, 0), (top, kernel_height - 1 - top), (left, kernel_width - 1 - left), (0, 0)), mode="constant")
+	batch, height, width, _ = x.shape
+	out = np.zeros((batch, height - kernel_height + 1, width - kernel_width + 1, kernel.shape[-1]))
+	for r in range(out.shape[1]):
+		for c in range(out.shape[2]):
+			patch = x[:, r:r + kernel_height, c:c + kernel_width, :]
+			out[:, r, c, :] = np.tensordot(patch, kernel, axes=([1, 2, 3], [0, 1, 2])) + bias
+	return out
+
+class RuntimeTestCase(unittest.TestCase):
+	""" Tests for runtime """
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		self.x = rng.randn(3, 7, 7, 4).astype(np.float32)
+		self.kernel = rng.randn(5, 5, 4, 6).astype(np.float32)
+		self.bias = rng.randn(6).astype(np.float32)
+		self.ops = [
+			{"name": "maps", "op": "input"},
+			{"name": "conv", "op": "conv2d", "inputs": ["maps"], "padding": "same"},
+			{"name": "leaky", "op": "leaky_relu", "inputs": ["conv"], "alpha": 0.3},
+			{"name": "bn", "op": "affine", "inputs": ["leaky"]},
+			{"name": "concat", "op": "concat", "inputs": ["bn", "maps"], "axis": -1},
+			{"name": "flatten", "op": "flatten", "inputs": ["concat"]},
+			{"name": "dense", "op": "dense", "inputs": ["flatten"]},
+			{"name": "softmax", "op": "softmax", "inputs": ["dense"], "axis": -1},
+		]
+		self.weights = {
+			"conv/kernel": self.kernel,
+			"conv/bias": self.bias,
+			"bn/scale": rng.rand(6).astype(np.float32) + 0.5,
+			"bn/shift": rng.randn(6).astype(np.float32),
+			"dense/kernel": rng.randn(7 * 7 * 10, 5).astype(np.float32),
+			"dense/bias": rng.randn(5).astype(np.float32),
+		}
+
+	def test_conv2d_same(self):
+		expected = naive_conv2d(self.x, self.kernel, self.bias, "same")
+		np.testing.assert_allclose(runtime.conv2d(self.x, self.kernel, self.bias, "same"), expected, rtol=1e-4, atol=1e-4)
+
+	def test_conv2d_valid(self):
+		expected = naive_conv2d(self.x, self.kernel, self.bias, "valid")
+		np.testing.assert_allclose(runtime.conv2d(self.x, self.kernel, self.bias, "valid"), expected, rtol=1e-4, atol=1e-4)
+
+	def test_wrap_pad(self):
+		padded = runtime.wrap_pad(self.x, 2)
+		np.testing.assert_array_equal(padded[:, 0, 2:-2], self.x[:, -2])
+		np.testing.assert_array_equal(padded[:, 2:-2, 2:-2], self.x)
+
+	def test_fuse(self):
+		unfused = runtime.Model(self.ops, dict(self.weights))
+		fused_weights = dict(self.weights)
+		fused_ops = runtime.fuse(self.ops, fused_weights)
+		self.assertListEqual([op["op"] for op in fused_ops], ["input", "conv2d", "concat", "flatten", "dense", "softmax"])
+		fused = runtime.Model(fused_ops, fused_weights)
+		np.testing.assert_allclose(fused.predict(self.x), unfused.predict(self.x), rtol=1e-4, atol=1e-5)
+
+	def test_fuse_negative_scale(self):
+		self.weights["bn/scale"][0] = -1.0
+		weights = dict(self.weights)
+		ops = runtime.fuse(self.ops, weights)
+		self.assertIn("affine", [op["op"] for op in ops])
+		np.testing.assert_allclose(runtime.Model(ops, weights).predict(self.x),
+			runtime.Model(self.ops, dict(self.weights)).predict(self.x), rtol=1e-4, atol=1e-5)
+
+	def test_save_load(self):
+		model = runtime.Model(self.ops, self.weights)
+		path = os.path.join(tempfile.mkdtemp(), "model.npz")
+		model.save(path)
+		loaded = runtime.load(path)
+		np.testing.assert_allclose(loaded.predict({"maps": self.x}), model.predict(self.x), rtol=1e-4, atol=1e-5)
+		os.remove(path)
+
+if __name__ == "__main__":
+	unittest.main()
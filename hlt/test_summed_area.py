@@ -0,0 +1,57 @@
+#test_summed_area.py
+
+import unittest
+import numpy as np
+from hlt.game_map import GameMap, MapCell
+from hlt.positionals import Position
+from hlt.sim.local import LocalGames, RandomBot, _feed, frame_lines, initial_lines
+from hlt.networking import Game
+
+class SummedAreaTestCase(unittest.TestCase):
+	""" Tests for summed_area, against sums over the cells of GameMap """
+	def brute_force(self, game_map, position, radius, diamond):
+		cells = set()
+		for dy in range(-radius, radius + 1):
+			for dx in range(-radius, radius + 1):
+				cell = game_map.normalize(Position(position.x + dx, position.y + dy))
+				if not diamond or game_map.calculate_distance(position, cell) <= radius:
+					cells.add((cell.x, cell.y))
+		return sum(game_map[Position(x, y)].halite_amount for x, y in cells)
+
+	def check(self, width, height, radii):
+		halite = np.random.RandomState(width).randint(0, 1000, size=(height, width))
+		game_map = GameMap([[MapCell(Position(x, y), int(halite[y, x])) for x in range(width)] for y in range(height)], width, height)
+		sums = game_map.halite_sums()
+		self.assertEqual(sums.total, halite.sum())
+		positions = [Position(0, 0), Position(width - 1, height - 1), Position(width // 2, 1)]
+		for radius in radii:
+			box_sums, diamond_sums = sums.box_sums(radius), sums.diamond_sums(radius)
+			for position in positions:
+				box = self.brute_force(game_map, position, radius, diamond=False)
+				diamond = self.brute_force(game_map, position, radius, diamond=True)
+				self.assertEqual(sums.box(position, radius), box)
+				self.assertEqual(box_sums[position.y, position.x], box)
+				self.assertEqual(sums.diamond(position, radius), diamond)
+				self.assertEqual(diamond_sums[position.y, position.x], diamond)
+
+	def test_square(self):
+		self.check(16, 16, [0, 1, 4, 7, 8, 9, 16])
+
+	def test_odd_and_rectangular(self):
+		self.check(15, 15, [0, 3, 7, 8])
+		self.check(12, 9, [0, 2, 4, 5, 6, 11])
+
+	def test_updates(self):
+		games = LocalGames([lambda: RandomBot(0), lambda: RandomBot(1)], width=32, height=32, seed=2)
+		game = _feed(initial_lines(games.state, 0, 0), Game)
+		sums = game.game_map.halite_sums()
+		for _ in range(30):
+			games.play_turn()
+			_feed(frame_lines(games.state, 0), game.update_frame)
+			sums.diamond_sums(4)
+		halite = np.array([[cell.halite_amount for cell in row] for row in game.game_map._cells])
+		np.testing.assert_array_equal(sums.halite, halite)
+		np.testing.assert_array_equal(sums.diamond_sums(4), type(sums)(halite).diamond_sums(4))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,89 @@
+#test_warm.py
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+BOT = """
+import sys
+from hlt.lazy import Preloader
+answer = Preloader().add("answer", int, "0").start()["answer"]
+line = input()
+print(line[::-1], answer, sys.argv[1:])
+sys.exit(3)
+"""
+
+# Says it started, then plays until its input closes
+WAITING_BOT = """
+print("started", flush=True)
+import sys
+sys.stdin.read()
+"""
+
+class WarmTestCase(unittest.TestCase):
+	""" Tests for warm """
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.bot_path = os.path.join(self.directory, "bot.py")
+		with open(self.bot_path, "w") as f:
+			f.write(BOT)
+		self.socket_path = os.path.join(self.directory, "bot.sock")
+		self.root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		self.launcher = os.path.join(self.root, "hlt", "warm_launcher.py")
+		self.processes = []
+		self.server = self.serve(self.bot_path, self.socket_path)
+
+	def serve(self, bot_path, socket_path, max_games=2):
+		# the server preloads "answer" as 42, which the bot would load as 0 on its own
+		server = "from hlt import warm, lazy; warm.serve({!r}, {!r}, lazy.Preloader().add('answer', lambda _: 42, '0'), max_games={})"
+		process = subprocess.Popen([sys.executable, "-c", server.format(bot_path, socket_path, max_games)], cwd=self.root)
+		self.processes.append(process)
+		for _ in range(100):
+			if os.path.exists(socket_path):
+				break
+			time.sleep(0.05)
+		return process
+
+	def tearDown(self):
+		for process in self.processes:
+			process.kill()
+			process.wait()
+		shutil.rmtree(self.directory)
+
+	def launch(self, line):
+		return subprocess.run([sys.executable, self.launcher, self.socket_path, "--flag"], input=line,
+			stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=10)
+
+	def test_game(self):
+		for line in ("abc", "halite"):
+			completed = self.launch(line + "\n")
+			self.assertEqual(completed.returncode, 3, completed.stderr)
+			self.assertEqual(completed.stdout, "{} 42 ['--flag']\n".format(line[::-1]))
+
+	def test_server_dies(self):
+		bot_path = os.path.join(self.directory, "waiting_bot.py")
+		with open(bot_path, "w") as f:
+			f.write(WAITING_BOT)
+		socket_path = os.path.join(self.directory, "waiting_bot.sock")
+		server = self.serve(bot_path, socket_path)
+		launchers = []
+		for _ in range(2):
+			launcher = subprocess.Popen([sys.executable, self.launcher, socket_path], stdin=subprocess.PIPE,
+				stdout=subprocess.PIPE, universal_newlines=True)
+			self.processes.append(launcher)
+			self.assertEqual(launcher.stdout.readline(), "started\n")
+			launchers.append(launcher)
+		# The first game's launcher sees the server go even though the second game's bot, forked after it, runs on
+		server.kill()
+		self.assertEqual(launchers[0].wait(timeout=10), 1)
+		self.assertEqual(launchers[1].wait(timeout=10), 1)
+		for launcher in launchers:
+			launcher.stdin.close()
+			launcher.stdout.close()
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,59 @@
+#test_yields.py
+
+import unittest
+import numpy as np
+from hlt import constants
+from hlt.sim import rules
+from hlt.yields import YieldTables, yield_tables
+
+class YieldsTestCase(unittest.TestCase):
+	""" Tests for yields, against mining turn by turn like the engine """
+	def setUp(self):
+		constants.load_constants(rules.game_constants(32, 32))
+
+	def tearDown(self):
+		constants.load_constants(rules.game_constants(32, 32))
+
+	def mine(self, halite, turns, inspired):
+		collected = 0
+		for _ in range(turns):
+			ratio = constants.INSPIRED_EXTRACT_RATIO if inspired else constants.EXTRACT_RATIO
+			extracted = -(-halite // ratio)
+			collected += extracted + (int(extracted * constants.INSPIRED_BONUS_MULTIPLIER) if inspired else 0)
+			halite -= extracted
+		return collected, halite
+
+	def test_dwell(self):
+		tables = YieldTables(max_halite=64, max_turns=4)
+		halite = np.random.RandomState(0).randint(0, 3000, size=(8, 8))
+		inspired = np.random.RandomState(1).rand(8, 8) < 0.3
+		for turns in (0, 1, 5, 20):
+			collected, remaining = tables.dwell(halite, turns, inspired)
+			for y in range(8):
+				for x in range(8):
+					self.assertEqual((collected[y, x], remaining[y, x]), self.mine(int(halite[y, x]), turns, inspired[y, x]))
+		self.assertGreaterEqual(tables.max_halite, halite.max())
+		by_turns = tables.collected_by_turns(halite, 6, inspired)
+		self.assertEqual(by_turns.shape, (7, 8, 8))
+		np.testing.assert_array_equal(by_turns[3], tables.collected(halite, 3, inspired))
+
+	def test_empty_tables(self):
+		tables = YieldTables(max_halite=0, max_turns=0)
+		self.assertEqual(tables.collected(5, 1), self.mine(5, 1, False)[0])
+		self.assertEqual(tables.dwell(900, 3), self.mine(900, 3, False))
+
+	def test_negative(self):
+		tables = YieldTables()
+		for lookup in (lambda: tables.collected(-5, 1), lambda: tables.dwell(100, -1),
+				lambda: tables.dwell(np.array([[3, -1]]), 2), lambda: tables.collected_by_turns([100], -1)):
+			with self.assertRaises(ValueError):
+				lookup()
+
+	def test_constants_change(self):
+		tables = yield_tables()
+		self.assertIs(yield_tables(), tables)
+		constants.load_constants(rules.game_constants(32, 32, EXTRACT_RATIO=3))
+		self.assertEqual(yield_tables().collected(9, 1), 3)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,154 @@
+"""
+Per-turn wall time and peak memory of a bot, measured by its Game.
+
+A turn is timed from the moment its frame starts arriving (Game.update_frame read the turn number) to the
+moment its commands are sent (Game.end_turn), which is the time the engine's turn limit applies to, less
+the pipe latency. When the HLT_TIMINGS environment variable names a directory, every turn is also appended
+to <directory>/bot-<player id>.timings.jsonl once its commands are sent, so the measurements survive the engine
+killing the bot without the write counting against the turn.
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+
+TIMINGS_ENV = "HLT_TIMINGS"
+TIMINGS_FILE = "bot-{}.timings.jsonl"
+
+
+def peak_rss_kib():
+    """
+    :return: The peak resident set size of this process in KiB, None where the resource module is unavailable (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(values, fraction):
+    """
+    :param values: Sorted values
+    :param fraction: Between 0 and 1, e.g. 0.99 for the 99th percentile
+    :return: The percentile, interpolated between the closest values
+    """
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(seconds):
+    """
+    :param seconds: Turn times in seconds
+    :return: {"turns", "p50_ms", "p99_ms", "max_ms"} of the turn times
+    """
+    ordered = sorted(seconds)
+    return {
+        "turns": len(ordered),
+        "p50_ms": None if not ordered else percentile(ordered, 0.5) * 1000,
+        "p99_ms": None if not ordered else percentile(ordered, 0.99) * 1000,
+        "max_ms": None if not ordered else ordered[-1] * 1000,
+    }
+
+
+class TurnTimer:
+    """
+    Times the turns of a Game, see the module docstring
+    """
+    def __init__(self, path=None):
+        """
+        :param path: Where to append every turn's timing as a JSON line, None to only keep them in memory
+        """
+        self.path = path
+        self.turn_seconds = []
+        self._turn = None
+        self._start = None
+        self._pending = None
+        self._file = None
+
+    @staticmethod
+    def from_environment(player_id):
+        """
+        :param player_id: The bot's player id, naming its timings file
+        :return: A TurnTimer writing to the HLT_TIMINGS directory if set
+        """
+        directory = os.environ.get(TIMINGS_ENV)
+        return TurnTimer(os.path.join(directory, TIMINGS_FILE.format(player_id)) if directory else None)
+
+    def start(self, turn):
+        """
+        Called by Game.update_frame once the turn number is read
+        """
+        self._turn = turn
+        self._start = time.perf_counter()
+
+    def stop(self):
+        """
+        Called by Game.end_turn before sending the commands
+        :return: The turn's time in seconds, None if no turn was started
+        """
+        if self._start is None:
+            return None
+        seconds = time.perf_counter() - self._start
+        self._start = None
+        self.turn_seconds.append(seconds)
+        if self.path is not None:
+            self._pending = (self._turn, seconds)
+        return seconds
+
+    def write(self):
+        """
+        Called by Game.end_turn once the commands are sent, appends the stopped turn to the timings file.
+        The file stays open for the whole game and is flushed every turn.
+        """
+        if self._pending is None:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a")
+            atexit.register(self.close)
+        turn, seconds = self._pending
+        self._pending = None
+        self._file.write(json.dumps({"turn": turn, "seconds": seconds, "peak_rss_kib": peak_rss_kib()}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """
+        Closes the timings file, if open
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self):
+        """
+        :return: summarize() of the turns so far, with the peak RSS
+        """
+        return dict(summarize(self.turn_seconds), peak_rss_kib=peak_rss_kib())
+
+
+def read_timings(path):
+    """
+    :param path: A timings file written by a TurnTimer
+    :return: Its turns, [{"turn", "seconds", "peak_rss_kib"}, ...], empty if the file doesn't exist
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as timings:
+        return [json.loads(line) for line in timings if line.strip()]
+
+
+def summarize_turns(turns):
+    """
+    :param turns: Turns as returned by read_timings, of one or more games
+    :return: summarize() of their times with the highest peak RSS
+    """
+    peaks = [turn["peak_rss_kib"] for turn in turns if turn["peak_rss_kib"] is not None]
+    return dict(summarize([turn["seconds"] for turn in turns]), peak_rss_kib=max(peaks) if peaks else None)
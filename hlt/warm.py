@@ -0,0 +1,208 @@
+"""
+Warm bot server for local games.
+
+Starting a Python bot costs the interpreter, NumPy and model loading on every game. A warm bot
+server pays for those once: it imports hlt, preloads modules and models, then forks a fresh
+child for every game, which runs the bot script with the engine's stdio handed over by
+hlt/warm_launcher.py. Preloader calls made by the bot for what the server already loaded
+return immediately (see Preloader.keep_warm).
+
+    python3 -m hlt.warm MyBot.py /tmp/mybot.sock --module numpy --model policy=model.npz
+    ./halite "python3 hlt/warm_launcher.py /tmp/mybot.sock" "python3 hlt/warm_launcher.py /tmp/mybot.sock"
+
+Each game still gets its own process (forked from the same warm state), so games can run
+concurrently and a bot's state never leaks from one game into the next.
+"""
+
+import array
+import json
+import logging
+import os
+import random
+import runpy
+import select
+import signal
+import socket
+import sys
+import traceback
+
+from . import lazy
+from .warm_launcher import STATUS
+
+NUM_FDS = 3
+MAX_REQUEST_SIZE = 65536
+POLL_INTERVAL = 0.05
+
+
+def _receive_request(conn):
+    fds = array.array("i")
+    message, ancillary, _, _ = conn.recvmsg(MAX_REQUEST_SIZE, socket.CMSG_LEN(NUM_FDS * fds.itemsize))
+    for level, kind, data in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+    if len(fds) != NUM_FDS:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError("Expected {} file descriptors, got {}".format(NUM_FDS, len(fds)))
+    return json.loads(message.decode()), list(fds)
+
+
+def _exit_status(code):
+    # Same conventions as the interpreter's handling of SystemExit
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_bot(bot_path, request, fds):
+    """
+    Runs in the forked child: takes over the launcher's stdio and runs the bot script as __main__
+    """
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # Children would otherwise all share the server's random state
+    random.seed()
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed()
+
+    os.chdir(request.get("cwd", os.getcwd()))
+    sys.argv = [bot_path] + list(request.get("argv", []))
+    try:
+        runpy.run_path(bot_path, run_name="__main__")
+        status = 0
+    except SystemExit as exit:
+        status = _exit_status(exit.code)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    logging.shutdown()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+    os._exit(status)
+
+
+def _report(conn, status):
+    """
+    Sends the exit status of a bot to its launcher, and closes the connection
+    """
+    code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else 128 + os.WTERMSIG(status)
+    with conn:
+        try:
+            conn.sendall(STATUS.pack(code))
+        except OSError:
+            pass
+
+
+def serve(bot_path, socket_path, preloader=None, max_games=None):
+    """
+    Serves games of a bot script until interrupted. A single thread accepts launchers, reports the exit
+    status of every bot to its launcher and kills the bots whose launcher went away first, so nothing runs
+    alongside the forks (and a fork only has to close the connections of the other games).
+    :param bot_path: The bot script, run as __main__ in a forked child for every game
+    :param socket_path: The Unix socket to listen on, replaced if it exists
+    :param preloader: A Preloader of the modules and models to load once, in the server
+    :param max_games: Stop after serving this many games, None to serve forever
+    :return: Nothing
+    """
+    bot_path = os.path.abspath(bot_path)
+    if preloader is not None:
+        preloader.keep_warm()
+    # Make sure the bot's own imports are warm too
+    import hlt  # noqa: F401
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(16)
+    logging.getLogger(__name__).warning("Serving %s on %s", bot_path, socket_path)
+
+    games = 0
+    # The connection to the launcher of every game in progress, by bot pid
+    running = {}
+    try:
+        # Once max_games were started, lets the games in progress finish
+        while max_games is None or games < max_games or running:
+            accepting = max_games is None or games < max_games
+            readable, _, _ = select.select(([server] if accepting else []) + list(running.values()), [], [],
+                                           POLL_INTERVAL)
+            for pid, conn in list(running.items()):
+                finished, status = os.waitpid(pid, os.WNOHANG)
+                if finished:
+                    del running[pid]
+                    _report(conn, status)
+                elif conn in readable and not conn.recv(1):
+                    # The launcher went away (e.g. killed by the engine on a timeout)
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    del running[pid]
+                    conn.close()
+            if server not in readable:
+                continue
+
+            conn, _ = server.accept()
+            try:
+                request, fds = _receive_request(conn)
+            except (OSError, ValueError) as err:
+                logging.getLogger(__name__).warning("Rejected launcher: %s", err)
+                conn.close()
+                continue
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    # Other games' launchers must see the server's end close when it does
+                    for other in [server, conn] + list(running.values()):
+                        other.close()
+                    _run_bot(bot_path, request, fds)
+                finally:
+                    os._exit(1)
+            for fd in fds:
+                os.close(fd)
+            running[pid] = conn
+            games += 1
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve games of a bot from a process with hlt and models preloaded.")
+    parser.add_argument("bot_path", help="the bot script, e.g. MyBot.py")
+    parser.add_argument("socket_path", help="the Unix socket the launchers connect to")
+    parser.add_argument("--module", action="append", dest="modules", default=[], help="a module to preload")
+    parser.add_argument("--model", action="append", dest="models", default=[], metavar="NAME=PATH",
+                        help="a model to preload, as Preloader.add_model(NAME, PATH) in the bot")
+    args = parser.parse_args(argv)
+
+    preloader = lazy.Preloader()
+    for module_name in args.modules:
+        preloader.add_module(module_name)
+    for model in args.models:
+        name, _, path = model.partition("=")
+        preloader.add_model(name, path)
+    try:
+        serve(args.bot_path, args.socket_path, preloader.start())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Thin launcher for a warm bot server (see hlt.warm), used as the bot command given to the engine:
+
+    ./halite "python3 hlt/warm_launcher.py /tmp/mybot.sock" "python3 MyBot.py"
+
+Hands its stdin, stdout and stderr to the server, which forks a bot wired to them, then waits
+for that bot to finish and exits with its status. Only imports the standard library, and is
+run as a script so that the hlt package isn't imported either.
+"""
+
+import array
+import json
+import os
+import socket
+import struct
+import sys
+
+STATUS = struct.Struct("!i")
+
+
+def launch(socket_path, argv=()):
+    """
+    Plays a game through the warm bot server listening on socket_path
+    :param socket_path: The server's Unix socket
+    :param argv: Arguments of the bot (its sys.argv[1:])
+    :return: The bot's exit status
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(socket_path)
+    request = json.dumps({"argv": list(argv), "cwd": os.getcwd()}).encode()
+    fds = array.array("i", [sys.stdin.fileno(), sys.stdout.fileno(), sys.stderr.fileno()])
+    conn.sendmsg([request], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+
+    # The server closes the connection once the bot exited, after sending its status.
+    # If this process is killed instead (e.g. by the engine on a timeout), the server kills the bot.
+    reply = b""
+    while len(reply) < STATUS.size:
+        chunk = conn.recv(STATUS.size - len(reply))
+        if not chunk:
+            return 1
+        reply += chunk
+    conn.close()
+    return STATUS.unpack(reply)[0]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: warm_launcher.py SOCKET [BOT ARGS...]")
+    sys.exit(launch(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,125 @@
+"""
+Lookup tables of what a ship collects by mining a cell for several turns (see yield_tables).
+
+A ship mining a cell with h halite extracts ceil(h / EXTRACT_RATIO) of it, as the engine does (the
+constants describe it as truncated, but the engine rounds up, and so does hlt.sim.rules), and an inspired
+ship ceil(h / INSPIRED_EXTRACT_RATIO) plus INSPIRED_BONUS_MULTIPLIER times that (truncated), which doesn't
+come out of the cell. For every halite amount and number of turns, the tables hold:
+    collected:  the halite the ship collects over the turns, bonus included
+    remaining:  the halite left on the cell
+Lookups are vectorized over whole halite planes. Tables grow to the largest halite and turns asked for, and
+negative halite or turns raise a ValueError.
+"""
+
+import numpy as np
+
+from . import constants
+
+MIN_HALITE = 1024
+MIN_TURNS = 16
+
+
+def _mining_constants():
+    return (constants.EXTRACT_RATIO, constants.INSPIRED_EXTRACT_RATIO, constants.INSPIRED_BONUS_MULTIPLIER)
+
+
+class YieldTables:
+    """
+    Collected and remaining halite per (inspired, halite, turns), see the module docstring
+    """
+    def __init__(self, max_halite=MIN_HALITE, max_turns=MIN_TURNS):
+        """
+        :param max_halite: The largest cell halite of the tables, they grow when needed
+        :param max_turns: The most turns of the tables, they grow when needed
+        """
+        self.key = _mining_constants()
+        self.max_halite = 0
+        self.max_turns = 0
+        self.collected_table = None
+        self.remaining_table = None
+        self._build(max_halite, max_turns)
+
+    def _build(self, max_halite, max_turns):
+        extract_ratio, inspired_ratio, multiplier = self.key
+        shape = (2, max_halite + 1, max_turns + 1)
+        self.collected_table = np.zeros(shape, dtype=np.int64)
+        self.remaining_table = np.zeros(shape, dtype=np.int64)
+        for inspired, ratio in enumerate((extract_ratio, inspired_ratio)):
+            remaining = np.arange(max_halite + 1, dtype=np.int64)
+            collected = np.zeros(max_halite + 1, dtype=np.int64)
+            self.remaining_table[inspired, :, 0] = remaining
+            for turn in range(1, max_turns + 1):
+                extracted = -(-remaining // ratio)
+                collected += extracted
+                if inspired:
+                    collected += (extracted * multiplier).astype(np.int64)
+                remaining -= extracted
+                self.collected_table[inspired, :, turn] = collected
+                self.remaining_table[inspired, :, turn] = remaining
+        self.max_halite, self.max_turns = max_halite, max_turns
+
+    def _grow(self, halite, turns):
+        """
+        Rebuilds the tables to cover halite and turns, doubling their size, when they don't already
+        :raise ValueError: If halite or turns are negative, which would index the tables from the end
+        """
+        if np.size(halite) and np.min(halite) < 0:
+            raise ValueError("Negative halite: {}".format(int(np.min(halite))))
+        if np.size(turns) and np.min(turns) < 0:
+            raise ValueError("Negative turns: {}".format(int(np.min(turns))))
+        max_halite = int(np.max(halite)) if np.size(halite) else 0
+        max_turns = int(np.max(turns)) if np.size(turns) else 0
+        if max_halite > self.max_halite or max_turns > self.max_turns:
+            new_halite, new_turns = max(self.max_halite, 1), max(self.max_turns, 1)
+            while max_halite > new_halite:
+                new_halite *= 2
+            while max_turns > new_turns:
+                new_turns *= 2
+            self._build(new_halite, new_turns)
+
+    def dwell(self, halite, turns, inspired=False):
+        """
+        :param halite: Cell halite, an int array (e.g. the halite plane) or an int
+        :param turns: Turns spent mining, an int array broadcasting with halite or an int
+        :param inspired: Whether the ship is inspired, a bool array broadcasting with halite or a bool
+        :return: (collected, remaining) int arrays, the halite collected by the ship and left on the cell
+        """
+        halite = np.asarray(halite, dtype=np.int64)
+        turns = np.asarray(turns, dtype=np.int64)
+        self._grow(halite, turns)
+        index = (np.asarray(inspired, dtype=np.int64), halite, turns)
+        return self.collected_table[index], self.remaining_table[index]
+
+    def collected(self, halite, turns, inspired=False):
+        """
+        :return: The halite collected by a ship mining each cell for turns, see dwell
+        """
+        halite = np.asarray(halite, dtype=np.int64)
+        turns = np.asarray(turns, dtype=np.int64)
+        self._grow(halite, turns)
+        return self.collected_table[np.asarray(inspired, dtype=np.int64), halite, turns]
+
+    def collected_by_turns(self, halite, max_turns, inspired=False):
+        """
+        :param halite: Cell halite, an int array of any shape
+        :param max_turns: The most turns
+        :param inspired: Whether the ship is inspired, a bool array broadcasting with halite or a bool
+        :return: The halite collected for 0 to max_turns turns on every cell, an array of shape (max_turns + 1,) + shape
+        """
+        halite = np.asarray(halite, dtype=np.int64)
+        self._grow(halite, max_turns)
+        inspired = np.broadcast_to(np.asarray(inspired, dtype=np.int64), halite.shape)
+        return np.moveaxis(self.collected_table[inspired, halite, :max_turns + 1], -1, 0)
+
+
+_tables = None
+
+
+def yield_tables():
+    """
+    :return: The YieldTables of the game's constants, built on the first call and rebuilt if the constants change
+    """
+    global _tables
+    if _tables is None or _tables.key != _mining_constants():
+        _tables = YieldTables()
+    return _tables
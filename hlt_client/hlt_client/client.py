@@ -196,6 +196,9 @@ def _parse_arguments():
                                     help='Number of replays to fetch')
     replay_user_parser.add_argument('-d', '--destination', dest='destination', action='store', type=str, required=True,
                                     help="In which folder to store all resulting replay files.")
+    replay_user_parser.add_argument('-w', '--workers', dest='workers', action='store', type=int,
+                                    default=download_game.DEFAULT_WORKERS,
+                                    help="How many replays to download at once.")
     # .Modes.Replay.Modes.Date
     replay_regex_parser = replay_subparser.add_parser(REPLAY_MODE_DATE, help='Retrieve replays based on regex')
     replay_regex_parser.add_argument('--decompress', action='store_true', dest='decompress',
@@ -207,6 +210,9 @@ def _parse_arguments():
                                      help="Whether to retrieve all files. Omit for only Gold and higher.")
     replay_regex_parser.add_argument('-d', '--destination', dest='destination', action='store', type=str, required=True,
                                      help="In which folder to store all resulting replay files.")
+    replay_regex_parser.add_argument('-w', '--workers', dest='workers', action='store', type=int,
+                                     default=download_game.DEFAULT_WORKERS,
+                                     help="How many replays to download at once.")
     # .Modes.Gym
     gym.parse_arguments(subparser)
     if len(sys.argv) < 2:
@@ -262,12 +268,13 @@ def main():
             download_game.download(args.replay_mode, args.destination,
                                    getattr(args, 'date', None), getattr(args, 'all', None),
                                    Config().user_id if Config.auth_exists() else None, getattr(args, 'user_id', None),
-                                   getattr(args, 'limit', None), args.decompress)
+                                   getattr(args, 'limit', None), args.decompress, args.workers)
         elif args.mode == PLAY_MODE:
             compare_bots.play_games(args.halite_binary,
                                     args.game_output_dir,
                                     args.map_width, args.map_height,
-                                    args.run_commands, args.iterations, [])
+                                    args.run_commands, args.iterations, [],
+                                    args.workers, args.timeout)
         elif args.mode == GYM_MODE:
             gym.main(args)
     except (IndexError, TypeError, ValueError, IOError) as err:
@@ -1,6 +1,9 @@
 import json
 import os
+import signal
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from . import output
 
@@ -19,11 +22,29 @@ def _determine_winner(results):
             return player_id
 
 
-def _play_game(binary, bot_commands, flags):
+def _kill_game(process):
+    """
+    Kills the engine and the bots it started, which share its process group (see _play_game)
+    :param process: The engine's Popen
+    :return: Nothing
+    """
+    if not hasattr(os, 'killpg'):
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _play_game(binary, bot_commands, flags, timeout=None, cwd=None):
     """
     Plays one game considering the specified bots and the game and map constraints.
+    The engine runs in a session of its own, so the bots it starts are killed with it when the game times out.
     :param binary: The halite binary
     :param bot_commands: The commands to run each of the bots
+    :param timeout: Seconds after which the engine is killed (subprocess.TimeoutExpired is raised), None to wait forever
+    :param cwd: The working directory of the engine and the bots, the current one if None
     :return: The game's result string
     """
     command = [
@@ -33,19 +54,61 @@ def _play_game(binary, bot_commands, flags):
     command.extend(flags)
     for bot_command in bot_commands:
         command.append(bot_command)
-    return subprocess.check_output(command).decode()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, cwd=cwd, start_new_session=True)
+    try:
+        stdout, _ = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_game(process)
+        process.communicate()
+        raise
+    finally:
+        # Also clears up bots left behind by an engine that crashed or was interrupted
+        _kill_game(process)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, output=stdout)
+    return stdout.decode()
+
+
+def _run_game(binary, bot_commands, flags, timeout=None, cwd=None):
+    """
+    Plays one game and parses its results.
+    :return: The game's results
+    """
+    return json.loads(_play_game(binary, bot_commands, flags, timeout, cwd))
+
+
+def _run_game_in_directory(binary, bot_commands, flags, timeout, game_output_dir, game_number):
+    """
+    Plays one game in a working directory of its own, so the logs its bots write there (bot-<id>.log) aren't
+    overwritten by the games played at the same time: game-<game_number> under game_output_dir, or a
+    temporary directory removed after the game.
+    :return: The game's results
+    """
+    if game_output_dir is not None:
+        directory = os.path.join(game_output_dir, 'game-{}'.format(game_number))
+        os.makedirs(directory, exist_ok=True)
+        return _run_game(binary, bot_commands, flags, timeout, directory)
+    with tempfile.TemporaryDirectory(prefix='halite-game-') as directory:
+        return _run_game(binary, bot_commands, flags, timeout, directory)
 
 
-def play_games(binary, game_output_dir, map_width, map_height, bot_commands, number_of_runs, flags):
+def play_games(binary, game_output_dir, map_width, map_height, bot_commands, number_of_runs, flags,
+               workers=1, timeout=None):
     """
-    Runs number_of_runs games using the designated bots and binary, recording the tally of wins per player
+    Runs number_of_runs games using the designated bots and binary, recording the tally of wins per player.
+    Up to workers games run concurrently; results are reported as each game finishes. Games whose engine
+    crashes, times out or returns unreadable results are counted as failed without stopping the batch.
+    Concurrent games each run in their own working directory (see _run_game_in_directory), so their bot
+    commands must use absolute paths.
     :param binary: The Halite binary.
     :param game_output_dir: Where to put replays and log files.
     :param map_width: The map width, set to None for engine random choice
     :param map_height: The map height, set to None for engine random choice
     :param bot_commands: The commands to run each of the bots (must be either 2 or 4)
     :param number_of_runs: How many runs total
-    :return: Nothing
+    :param workers: How many games to run at the same time
+    :param timeout: Seconds after which a game's engine is killed, None to wait forever
+    :return: The tally of wins per player
     """
 
     binary = os.path.abspath(binary)
@@ -69,13 +132,39 @@ def play_games(binary, game_output_dir, map_width, map_height, bot_commands, num
     result = {}
     if not(len(bot_commands) == 4 or len(bot_commands) == 2):
         raise IndexError("The number of bots specified must be either 2 or 4.")
-    for current_run in range(0, number_of_runs):
-        match_output = _play_game(binary, bot_commands, flags)
-        results = json.loads(match_output)
-        winner = _determine_winner(results)
-        result[winner] = result.setdefault(winner, 0) + 1
-        output.output("Finished {} runs.".format(current_run + 1), games_played=current_run + 1)
-        output.output("Win Ratio: {}".format(result), stats=result, results=results)
+    games_played = 0
+    games_failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        if workers > 1:
+            futures = [executor.submit(_run_game_in_directory, binary, bot_commands, flags, timeout, game_output_dir, run)
+                       for run in range(number_of_runs)]
+        else:
+            futures = [executor.submit(_run_game, binary, bot_commands, flags, timeout) for _ in range(number_of_runs)]
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except subprocess.TimeoutExpired:
+                games_failed += 1
+                output.warning("Game timed out after {} seconds.".format(timeout), games_failed=games_failed)
+                continue
+            except subprocess.CalledProcessError as err:
+                games_failed += 1
+                output.warning("Game engine exited with code {}.".format(err.returncode), games_failed=games_failed)
+                continue
+            except ValueError as err:
+                games_failed += 1
+                output.warning("Could not read game results: {}".format(err), games_failed=games_failed)
+                continue
+            winner = _determine_winner(results)
+            result[winner] = result.setdefault(winner, 0) + 1
+            games_played += 1
+            output.output("Finished {} runs.".format(games_played), games_played=games_played)
+            output.output("Win Ratio: {}".format(result), stats=result, results=results)
+
+    if games_failed:
+        output.warning("{} of {} games failed.".format(games_failed, number_of_runs),
+                       games_failed=games_failed, games_played=games_played)
+    return result
 
 
 def parse_arguments(subparser):
@@ -112,3 +201,14 @@ def parse_arguments(subparser):
                             action='store',
                             type=int,  default=100,
                             help="Number of games to be run")
+    bot_parser.add_argument('-j', '--workers',
+                            dest='workers',
+                            action='store',
+                            type=int, default=1,
+                            help="Number of games to run in parallel, each in its own working directory (game-<n> under "
+                                 "--output-dir, else a temporary one) so use absolute paths in bot commands")
+    bot_parser.add_argument('--timeout',
+                            dest='timeout',
+                            action='store',
+                            type=float, default=None,
+                            help="Seconds after which a game is killed and counted as failed")
@@ -1,10 +1,14 @@
 import os
 import zstd
 import re
+import threading
 
 import requests
 import multiprocessing
+from concurrent.futures import as_completed
 from concurrent.futures.thread import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from . import client
 
@@ -18,31 +22,120 @@ _PREFIX_OPTION = '?prefix='
 _BUCKET_POSITION = -3
 _OBJECT_POSITION = -1
 
+_NEXT_PAGE_KEY = 'nextPageToken'
+_PAGE_TOKEN_OPTION = '&pageToken='
+
 _REPLAY_PREPEND = 'replay-'
 _PATH_DELIMITER = '/'
 
+# Downloads are network bound, so more threads than cores keep the pooled connections busy
+DEFAULT_WORKERS = 4 * multiprocessing.cpu_count()
+MAX_RETRIES = 5
+# Retries wait BACKOFF_FACTOR * 2 ** retry seconds
+BACKOFF_FACTOR = 0.5
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_MANIFEST_FILE = '.downloaded'
+
+
+def make_session(pool_size=DEFAULT_WORKERS, retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """
+    Creates a session keeping up to pool_size connections alive per host, retrying failed requests with backoff
+    :param pool_size: How many connections to keep per host, at least the number of threads using the session
+    :param retries: How many times to retry a request failing to connect or with a transient status
+    :param backoff_factor: Base of the exponential wait between retries, in seconds
+    :return: The session
+    """
+    # GET is among the methods urllib3 retries by default (the pinned 1.23 has no allowed_methods)
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=_RETRY_STATUSES)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class Manifest:
+    """
+    The replays already downloaded to a destination, one per line, so an interrupted download resumes where it stopped
+    """
+
+    def __init__(self, destination):
+        """
+        :param destination: The download folder holding the manifest
+        """
+        self.path = os.path.join(destination, _MANIFEST_FILE)
+        self._lock = threading.Lock()
+        self.finished = set()
+        if os.path.exists(self.path):
+            with open(self.path) as manifest:
+                self.finished = set(line.strip() for line in manifest if line.strip())
+
+    def __contains__(self, game_id):
+        return game_id in self.finished
+
+    def add(self, game_id):
+        """
+        Records a finished replay, written through at once so that it survives interruptions
+        :param game_id: The replay's game id
+        :return: Nothing
+        """
+        with self._lock:
+            self.finished.add(game_id)
+            with open(self.path, 'a') as manifest:
+                manifest.write(game_id + '\n')
+
 
 class GameDownloader:
     _GOLD_BUCKET_URI = 'https://www.googleapis.com/storage/v1/b/ts2018-halite-3-gold-replays/o'
     _SALT_BUCKET_URI = 'https://www.googleapis.com/storage/v1/b/ts2018-halite-3-replays/o'
     _BUCKET_URIS = [_SALT_BUCKET_URI, _GOLD_BUCKET_URI]
 
-    def __init__(self, destination, buckets, prefix, decompress):
+    def __init__(self, destination, buckets, prefix, decompress, workers=DEFAULT_WORKERS, session=None):
         """
         Download replays files
         :param destination: Where to download
         :param buckets: List of bucket(s) to fetch from
         :param prefix: What prefix to fetch from
         :param decompress: Whether to decompress replays
+        :param workers: How many replays to download at once
+        :param session: The requests session to download with, by default make_session(workers)
         """
         if not os.path.isdir(destination):
             raise FileNotFoundError("Directory path does not exist")
         self.destination = destination
+        self.workers = workers
+        self.session = session or make_session(workers)
+        self.manifest = Manifest(destination)
         self.objects = []
         for bucket in buckets:
-            self.objects += self._parse_objects(requests.get(bucket + _PREFIX_OPTION + prefix).json())
+            self.objects += self._list_bucket(bucket, prefix)
         self.decompress = decompress
 
+    def _get(self, url):
+        """
+        GET through the pooled session
+        :param url: The url to get
+        :return: The response, raising for error statuses left after the retries
+        """
+        response = self.session.get(url)
+        response.raise_for_status()
+        return response
+
+    def _list_bucket(self, bucket, prefix):
+        """
+        Lists the objects of a bucket matching a prefix, following the pages of the listing
+        :param bucket: The bucket URI
+        :param prefix: What prefix to list
+        :return: The URIs of the objects
+        """
+        url = bucket + _PREFIX_OPTION + prefix
+        bucket_json = self._get(url).json()
+        objects = self._parse_objects(bucket_json)
+        while _NEXT_PAGE_KEY in bucket_json:
+            bucket_json = self._get(url + _PAGE_TOKEN_OPTION + bucket_json[_NEXT_PAGE_KEY]).json()
+            objects += self._parse_objects(bucket_json)
+        return objects
+
     @staticmethod
     def _parse_objects(bucket_json):
         """
@@ -72,15 +165,15 @@ class GameDownloader:
         except Exception:
             raise ValueError("Could not unzip file at: {}!".format(game_id))
 
-    @staticmethod
-    def _build_object_uri(bucket_class, object_id):
+    @classmethod
+    def _build_object_uri(cls, bucket_class, object_id):
         """
         Creates a GCS URI from the bucket id and object id
         :param bucket_class: The bucket id in GCS
         :param object_id: The object id in GCS
         :return: the constructed GCS URI
         """
-        return "{}/{}".format(GameDownloader._BUCKET_URIS[bucket_class], object_id)
+        return "{}/{}".format(cls._BUCKET_URIS[bucket_class], object_id)
 
     @staticmethod
     def _parse_id_from_url(url):
@@ -92,49 +185,77 @@ class GameDownloader:
         split_url = url.split(_PATH_DELIMITER)
         return "{}_{}".format(split_url[_BUCKET_POSITION], split_url[_OBJECT_POSITION])
 
+    def fetch(self, url):
+        """
+        Download a single object from GCS without saving it (see hlt.data.pipeline to encode replays as they download)
+        :param url: The url do download from
+        :return: The zstd compressed replay
+        """
+        return self._get(url + _MEDIA_DOWNLOAD_OPTION).content
+
     def _get_object(self, url):
         """
-        Download a single object from GCS considering the designated URL and save it to de destination
+        Download a single object from GCS considering the designated URL and save it to de destination.
+        The replay is written to a temporary file renamed once complete, so interrupted downloads leave no partial replays.
         :param url: The url do download from
-        :return: Nothing
+        :return: The game id of the object
         """
         game_id = self._parse_id_from_url(url)
-        save_path = os.path.join(self.destination, game_id + '.json' if self.decompress else ".hlt")
-        if not os.path.exists(save_path):
-            try:
-                if self.decompress:
-                    with open(save_path, 'w') as fout:
-                        fout.writelines(self._unzip(game_id, requests.get(url + _MEDIA_DOWNLOAD_OPTION).content))
-                else:
-                    with open(save_path, 'wb') as fout:
-                        fout.write(requests.get(url + _MEDIA_DOWNLOAD_OPTION).content)
-            except Exception:
-                raise IOError("Could not write file {} to {}".format(game_id, self.destination))
+        save_path = os.path.join(self.destination, game_id + ('.json' if self.decompress else '.hlt'))
+        if game_id in self.manifest or os.path.exists(save_path):
+            return game_id
+        content = self.fetch(url)
+        partial_path = save_path + '.part'
+        try:
+            if self.decompress:
+                with open(partial_path, 'w') as fout:
+                    fout.write(self._unzip(game_id, content))
+            else:
+                with open(partial_path, 'wb') as fout:
+                    fout.write(content)
+            os.replace(partial_path, save_path)
+        except OSError:
+            raise IOError("Could not write file {} to {}".format(game_id, self.destination))
+        self.manifest.add(game_id)
+        return game_id
 
     def get_objects(self):
         """
-        Download all desired replays in parallel threads (up to the number of cores the machines has)
-        :return: Nothing
+        Download all desired replays in parallel threads sharing the session's connections, skipping the replays
+        downloaded already. Failed replays are reported once the others are done; running again retries them.
+        :return: The urls of the replays that failed
         """
-        with ThreadPoolExecutor(max_workers=multiprocessing.cpu_count()) as executor:
-            num_files = len(self.objects)
-            print()
-            for num_file, url in enumerate(self.objects):
-                print("\r{} / {}".format(num_file, num_files), end="")
-                executor.submit(self._get_object, url)
-            print()
+        pending = [url for url in self.objects if self._parse_id_from_url(url) not in self.manifest]
+        num_files = len(self.objects)
+        num_done = num_files - len(pending)
+        failed = []
+        print()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._get_object, url): url for url in pending}
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    failed.append(futures[future])
+                    print("\rFailed to download {}: {}".format(futures[future], future.exception()))
+                else:
+                    num_done += 1
+                print("\r{} / {}".format(num_done, num_files), end="")
+        print()
+        if failed:
+            print("{} replays failed to download, run again to retry them.".format(len(failed)))
+        return failed
 
 class DatedGameDownloader(GameDownloader):
 
-    def __init__(self, destination, date, all_bots=False, decompress=False):
+    def __init__(self, destination, date, all_bots=False, decompress=False, workers=DEFAULT_WORKERS):
         """
         Download games for a date
         :param destination: Where to download
         :param date: Which date to download
         :param all_bots: True if you wish to download silver ranked bots as well. False for only gold.
+        :param workers: How many replays to download at once
         """
         buckets = [self._GOLD_BUCKET_URI] + ([self._SALT_BUCKET_URI] if all_bots else [])
-        super(DatedGameDownloader, self).__init__(destination, buckets, _REPLAY_PREPEND + date, decompress)
+        super(DatedGameDownloader, self).__init__(destination, buckets, _REPLAY_PREPEND + date, decompress, workers)
 
 
 class UserGameDownloader(GameDownloader):
@@ -142,35 +263,38 @@ class UserGameDownloader(GameDownloader):
     _FETCH_THRESHOLD = 250
     _BUCKETS = []
 
-    def __init__(self, destination, user_id, limit, decompress=False):
+    def __init__(self, destination, user_id, limit, decompress=False, workers=DEFAULT_WORKERS, session=None):
         """
         Download games for a user
         :param destination: Where to download
         :param user_id: Which user's replays to fetch
         :param limit: How many replays to fetch (max)
+        :param workers: How many replays (and metadata pages) to download at once
+        :param session: The requests session to download with, by default make_session(workers)
         """
-        super(UserGameDownloader, self).__init__(destination, [], None, decompress)
+        super(UserGameDownloader, self).__init__(destination, [], None, decompress, workers, session)
         self.objects = self._parse_user_metadata(self._fetch_metadata(user_id, limit))
 
     def _fetch_metadata(self, user_id, limit):
         """
-        Retrieves paginated game metadata from the halite servers for a specified user up to limit items
+        Retrieves paginated game metadata from the halite servers for a specified user up to limit items,
+        fetching the pages concurrently
         :param user_id: The id of the user to fetch
         :param limit: The maximum number of items to fetch
-        :return: The full metadata of items
+        :return: The full metadata of items, in the order of the pages
         """
         print('Fetching Metadata')
-        current = 0
+        pages = [self._USER_BOT_URI.format(user_id, min(self._FETCH_THRESHOLD, limit - offset), offset)
+                 for offset in range(0, limit, self._FETCH_THRESHOLD)]
         result_set = []
-        while current <= limit:
-            current_limit = self._FETCH_THRESHOLD if ((limit - current) >= self._FETCH_THRESHOLD) else (limit - current)
-            result_set += requests.get(self._USER_BOT_URI.format(user_id, current_limit, current)).json()
-            current += self._FETCH_THRESHOLD
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for page in executor.map(lambda url: self._get(url).json(), pages):
+                result_set += page
         print('Finished metadata fetch. Found {} game files.'.format(len(result_set)))
         return result_set
 
-    @staticmethod
-    def _parse_user_metadata(user_json):
+    @classmethod
+    def _parse_user_metadata(cls, user_json):
         """
         Takes response from API server and parses to get all user replays
         :param user_json: The response from the API server
@@ -178,7 +302,7 @@ class UserGameDownloader(GameDownloader):
         """
         response = []
         for user_object in user_json:
-            response.append(GameDownloader._build_object_uri(user_object[_REPLAY_CLASS_KEY], user_object[_REPLAY_KEY]))
+            response.append(cls._build_object_uri(user_object[_REPLAY_CLASS_KEY], user_object[_REPLAY_KEY]))
         return response
 
 
@@ -192,7 +316,7 @@ def _valid_date(date):
 
 
 def download(mode, destination, date, all_bots, default_user_id, user_id,
-             limit, decompress):
+             limit, decompress, workers=DEFAULT_WORKERS):
     """
     Downloads bot replay files matching the designated requirements
     :param mode: Whether to download files matching a date or a user id
@@ -203,17 +327,22 @@ def download(mode, destination, date, all_bots, default_user_id, user_id,
     :param user_id: What is the user id desired if any
     :param limit: How many replays to download (currently only in user mode)
     :param decompress: Whether to decompress the replays.
+    :param workers: How many replays to download at once
     :return: Nothing
     """
     print('Downloading game files')
     if decompress:
         print('Decompressing replays before saving.')
+    failed = []
     if mode == client.REPLAY_MODE_DATE:
         if not _valid_date(date):
             raise ValueError("Date must match format YYYYMMDD")
-        DatedGameDownloader(destination, date, all_bots, decompress).get_objects()
+        failed = DatedGameDownloader(destination, date, all_bots, decompress, workers).get_objects()
     elif mode == client.REPLAY_MODE_USER:
         if not (default_user_id or user_id):
             raise ValueError("Cannot run default mode without authenticating .Please run `client.py --auth` first.")
-        UserGameDownloader(destination, default_user_id if not user_id else user_id, limit, decompress).get_objects()
+        failed = UserGameDownloader(destination, default_user_id if not user_id else user_id, limit, decompress,
+                                    workers).get_objects()
+    if failed:
+        raise IOError("Could not download {} replays to {}".format(len(failed), destination))
     print('Finished writing files to desired location')
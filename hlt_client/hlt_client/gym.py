@@ -5,11 +5,13 @@ import random
 import sqlite3
 import sys
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 import appdirs
 import trueskill
 
-from . import compare_bots, output, util
+from . import compare_bots, matchmaking, output, util
 
 
 APP_NAME = 'hlt_client3'
@@ -24,6 +26,13 @@ STATS_MODE = 'stats'
 BASE_MU = 25.0
 BASE_SIGMA = 8.333
 MIN_PLAYERS = 2
+TRUESKILL_TAU = 0.008
+TRUESKILL_DRAW_PROBABILITY = 0.001
+
+# Results of concurrently played games are written in batches of up to WRITE_BATCH_SIZE games,
+# or after FLUSH_INTERVAL seconds, whichever comes first
+WRITE_BATCH_SIZE = 16
+FLUSH_INTERVAL = 5.0
 
 SCHEMA = '''
 create table hlt_client_version (version INTEGER);
@@ -55,6 +64,53 @@ create table rank_history (
 )
 '''
 
+def _backfill_game_columns(conn, page_size=1000):
+    last_id = 0
+    while True:
+        games = conn.execute('select id, winner, participants, results from games where id > ? order by id limit ?',
+                             (last_id, page_size)).fetchall()
+        if not games:
+            break
+        updates = []
+        for game in games:
+            results = json.loads(game['results'])
+            winner_name = next((bot['name'] for bot in json.loads(game['participants'])
+                                if bot['id'] == game['winner']), None)
+            updates.append((results.get('map_width'), results.get('map_height'), results.get('replay'),
+                            winner_name, game['id']))
+        conn.executemany('update games set map_width=?, map_height=?, replay=?, winner_name=? where id=?', updates)
+        last_id = games[-1]['id']
+
+
+# Schema changes applied on top of SCHEMA, in order: each is a list of SQL statements or functions
+# taking the connection. hlt_client_version holds the last applied version (no row means a database
+# created from SCHEMA alone, version 0).
+MIGRATIONS = [
+    # 1: ranks are derived from an indexed conservative score (mu - 3 * sigma) instead of being
+    # rewritten for every bot after each write. bots.rank is no longer maintained, use ranked_bots.
+    [
+        'alter table bots add column score REAL',
+        'update bots set score = mu - 3 * sigma',
+        'create index bots_score on bots(score)',
+        '''create view ranked_bots as
+            select id, name, version, mu, sigma, score, path, games_played,
+                   (select count(*) from bots as better
+                    where better.score > bots.score or (better.score = bots.score and better.id < bots.id)) + 1 as rank
+            from bots''',
+    ],
+    # 2: indexes for the stats queries, and the fields listed for every game pulled out of the results blob
+    [
+        'create index rank_history_bot_id on rank_history(bot_id)',
+        'create index games_datetime on games(datetime)',
+        'alter table games add column map_width INTEGER',
+        'alter table games add column map_height INTEGER',
+        'alter table games add column replay TEXT',
+        'alter table games add column winner_name TEXT',
+        _backfill_game_columns,
+    ],
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
 def connect(db_path=None):
     if not db_path:
         db_path = os.path.join(appdirs.user_data_dir(APP_NAME, APP_AUTHOR), 'gym.db')
@@ -63,6 +119,9 @@ def connect(db_path=None):
 
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
+    # Write-ahead logging lets readers (e.g. gym stats) run while games are being recorded
+    conn.execute('pragma journal_mode=wal')
+    conn.execute('pragma synchronous=normal')
 
     # Make sure database is initialized
     try:
@@ -70,6 +129,8 @@ def connect(db_path=None):
     except sqlite3.OperationalError:
         initialize_db(conn)
 
+    migrate(conn)
+
     return conn
 
 
@@ -77,25 +138,40 @@ def initialize_db(conn):
     conn.executescript(SCHEMA)
 
 
-def rerank_bots(conn):
-    all_bots = conn.execute('select * from bots').fetchall()
-    all_bots.sort(reverse=True, key=lambda bot: bot['mu'] - 3 * bot['sigma'])
-    for index, bot in enumerate(all_bots):
-        rank = index + 1
-        conn.execute('update bots set rank = ? where id = ?', (rank, bot['id']))
+def schema_version(conn):
+    version = conn.execute('select max(version) from hlt_client_version').fetchone()[0]
+    return version or 0
+
+
+def migrate(conn):
+    """
+    Brings the database schema up to SCHEMA_VERSION by applying the pending MIGRATIONS
+    :param conn: The gym database connection
+    :return: Nothing
+    """
+    version = schema_version(conn)
+    for migration_version in range(version + 1, SCHEMA_VERSION + 1):
+        # Each migration is applied in its own transaction, together with the version bump
+        with conn:
+            conn.execute('begin')
+            for step in MIGRATIONS[migration_version - 1]:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute('delete from hlt_client_version')
+            conn.execute('insert into hlt_client_version (version) values (?)', (migration_version,))
 
 
 def register_bot(conn, name, path):
     # If bot with name exists, update bot, else insert record
     existing = conn.execute('select * from bots where name = ?', (name,)).fetchall()
     if existing:
-        query = 'update bots set games_played = 0, version = version + 1, sigma = ?, path = ? where id = ?'
-        conn.execute(query, (BASE_SIGMA, path, existing[0]['id']))
+        query = 'update bots set games_played = 0, version = version + 1, sigma = ?, score = mu - 3 * ?, path = ? where id = ?'
+        conn.execute(query, (BASE_SIGMA, BASE_SIGMA, path, existing[0]['id']))
     else:
-        query = 'insert into bots (name, version, mu, sigma, path, games_played) values (?, ?, ?, ?, ?, 0)'
-        conn.execute(query, (name, 1, BASE_MU, BASE_SIGMA, path))
-
-    rerank_bots(conn)
+        query = 'insert into bots (name, version, mu, sigma, score, path, games_played) values (?, ?, ?, ?, ?, ?, 0)'
+        conn.execute(query, (name, 1, BASE_MU, BASE_SIGMA, BASE_MU - 3 * BASE_SIGMA, path))
 
 
 def deregister_bot(conn, name):
@@ -107,55 +183,110 @@ def deregister_bot(conn, name):
     else:
         output.output("No bot to deregister.")
 
-    rerank_bots(conn)
-
 
 def list_bots(conn):
-    bots = conn.execute('select * from bots').fetchall()
+    bots = conn.execute('select * from ranked_bots order by score desc, id').fetchall()
     return [dict(bot) for bot in bots]
 
 
-def add_match(conn, bots, results):
-    winner = None
+def _determine_winner(results):
     for id_str, stats in results['stats'].items():
         if stats['rank'] == 1:
-            winner = int(id_str)
+            return int(id_str)
+    raise ValueError('Could not detect winner of game')
+
+
+def add_matches(conn, matches):
+    """
+    Records a batch of played games in a single transaction. Ratings are updated game by game in the
+    given order, each game starting from the ratings left by the previous ones (not from the ratings
+    the participants had when the game was scheduled).
+    :param conn: The gym database connection
+    :param matches: List of (bots, results, datetime) in the order the games finished
+    :return: Nothing
+    """
+    if not matches:
+        return
+
+    bot_ids = {bot['id'] for bots, _, _ in matches for bot in bots}
+    query = 'select * from ranked_bots where id in ({})'.format(','.join('?' * len(bot_ids)))
+    current = {bot['id']: dict(bot) for bot in conn.execute(query, tuple(bot_ids))}
+
+    trueskill.setup(tau=TRUESKILL_TAU, draw_probability=TRUESKILL_DRAW_PROBABILITY)
+    games = []
+    history = []
+    for bots, results, current_time in matches:
+        # Bots deregistered while the game was being played are dropped from the results
+        if any(bot['id'] not in current for bot in bots):
+            continue
+        participants = [current[bot['id']] for bot in bots]
+        winner = _determine_winner(results)
+        results.pop('final_snapshot', None)
+        games.append((current_time, participants[winner]['id'], participants[winner]['name'],
+                      results.get('map_width'), results.get('map_height'), results.get('replay'),
+                      json.dumps(participants), json.dumps(results)))
+        history.extend((bot['id'], current_time, bot['rank'], bot['mu'], bot['sigma']) for bot in participants)
+
+        teams = [[trueskill.Rating(mu=bot["mu"], sigma=bot["sigma"])] for bot in participants]
+        ranks = [results["stats"][str(b)]["rank"] - 1 for b in range(len(participants))]
+        new_ratings = trueskill.rate(teams, ranks)
+        for bot, rating in zip(participants, new_ratings):
+            bot['mu'] = rating[0].mu
+            bot['sigma'] = rating[0].sigma
+            bot['games_played'] += 1
+
+    conn.executemany('insert into games (datetime, winner, winner_name, map_width, map_height, replay, participants, results) '
+                     'values (?, ?, ?, ?, ?, ?, ?, ?)', games)
+    conn.executemany('insert into rank_history (bot_id, datetime, rank, mu, sigma) values (?, ?, ?, ?, ?)', history)
+    # Only the participants' rows change, ranks follow from the indexed score (see ranked_bots)
+    conn.executemany('update bots set mu=?, sigma=?, score=?, games_played=? where id=?',
+                     [(bot['mu'], bot['sigma'], bot['mu'] - 3 * bot['sigma'], bot['games_played'], bot['id'])
+                      for bot in current.values()])
 
-    if winner is None:
-        raise ValueError('Could not detect winner of game')
 
-    query = 'insert into games (datetime, winner, participants, results) values (?, ?, ?, ?)'
-    del results['final_snapshot']
-    current_time = datetime.datetime.now().isoformat()
-    conn.execute(query, (current_time,
-                         bots[winner]['id'],
-                         json.dumps(bots),
-                         json.dumps(results)))
-
-    for bot in bots:
-        history_query = 'insert into rank_history (bot_id, datetime, rank, mu, sigma) values (?, ?, ?, ?, ?)'
-        conn.execute(history_query, (bot['id'],
-                                     current_time,
-                                     bot['rank'],
-                                     bot['mu'],
-                                     bot['sigma']))
-        games_played_query = 'update bots set games_played=games_played + 1 where id = ?'
-        conn.execute(games_played_query, (bot['id'],))
+def add_match(conn, bots, results):
+    add_matches(conn, [(bots, results, datetime.datetime.now().isoformat())])
 
-    trueskill.setup(tau=0.008, draw_probability=0.001)
-    teams = [[trueskill.Rating(mu=bot["mu"], sigma=bot["sigma"])]
-             for bot in bots]
-    ranks = [results["stats"][str(b)]["rank"] - 1 for b in range(len(bots))]
-    new_ratings = trueskill.rate(teams, ranks)
 
-    update_query = 'update bots set mu=?, sigma=? where id=?'
-    for bot, rating in zip(bots, new_ratings):
-        conn.execute(update_query, (rating[0].mu, rating[0].sigma, bot['id']))
+def _choose_bots(conn, strategy=matchmaking.RANDOM, sigma_threshold=None, in_flight=None):
+    all_bots = list_bots(conn)
+    num_players = random.choice((2, 4))
+    if len(all_bots) < MIN_PLAYERS:
+        output.error('Need at least {} bots registered to play.'.format(MIN_PLAYERS))
+        sys.exit(1)
+    elif len(all_bots) < num_players:
+        num_players = MIN_PLAYERS
 
-    rerank_bots(conn)
+    trueskill.setup(tau=TRUESKILL_TAU, draw_probability=TRUESKILL_DRAW_PROBABILITY)
+    return matchmaking.choose_lineup(all_bots, num_players, strategy, sigma_threshold, in_flight)
 
 
-def run_matches(db_path, hlt_path, output_dir, iterations):
+def _play_match(hlt_path, flags, bots, timeout):
+    overrides = []
+    for bot in bots:
+        overrides.append('-o')
+        overrides.append(bot['name'])
+    results = compare_bots._run_game(hlt_path, [bot['path'] for bot in bots], flags + overrides, timeout)
+    _determine_winner(results)
+    return bots, results, datetime.datetime.now().isoformat()
+
+
+def run_matches(db_path, hlt_path, output_dir, iterations, workers=1, timeout=None,
+                strategy=matchmaking.QUALITY, sigma_threshold=None):
+    """
+    Plays iterations games between registered bots, up to workers at a time. Games run in worker threads
+    while this thread is the only database writer, recording finished games in batches (see add_matches).
+    Stops early once every bot's sigma is below sigma_threshold.
+    :param db_path: The gym database path
+    :param hlt_path: The halite binary
+    :param output_dir: Where to store replays and logs, if anywhere
+    :param iterations: How many games to play
+    :param workers: How many games to play at the same time
+    :param timeout: Seconds after which a game is killed and counted as failed, None to wait forever
+    :param strategy: How lineups are chosen, see matchmaking.choose_lineup
+    :param sigma_threshold: Bots whose sigma is below this are considered ranked and get no more games of their own
+    :return: Nothing
+    """
     flags = []
 
     if output_dir:
@@ -163,47 +294,79 @@ def run_matches(db_path, hlt_path, output_dir, iterations):
         os.makedirs(abs_output_dir, exist_ok=True)
         flags = ['-i', abs_output_dir]
 
-    for i in range(iterations):
-        with connect(db_path) as conn:
-            all_bots = list_bots(conn)
-            num_players = random.choice((2, 4))
-            if len(all_bots) < MIN_PLAYERS:
-                output.error('Need at least {} bots registered to play.'.format(MIN_PLAYERS))
-                sys.exit(1)
-            elif len(all_bots) < num_players:
-                num_players = MIN_PLAYERS
-
-            random.shuffle(all_bots)
-            bots = all_bots[:num_players]
-
-        overrides = []
-        for bot in bots:
-            overrides.append('-o')
-            overrides.append(bot['name'])
-        raw_results = compare_bots._play_game(hlt_path,
-                                              [bot['path'] for bot in bots],
-                                              flags + overrides)
-        results = json.loads(raw_results)
-        with connect(db_path) as conn:
-            add_match(conn, bots, results)
-
-        output.output('Played {}/{} matches...'.format(i + 1, iterations),
-                      progress=i + 1,
-                      iterations=iterations,
-                      results=results,
-                      participants=bots)
-    output.output('Done playing games.', progress=iterations, iterations=iterations)
-
-
-def list_matches(conn):
-    matches = conn.execute('select * from games').fetchall()
-    result = []
-    for match in matches:
+    start_time = time.time()
+    played = 0
+    failed = 0
+    scheduled = 0
+    batch = []
+    last_flush = time.time()
+
+    with connect(db_path) as conn, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        in_flight = {}
+        busy = {}
+        while True:
+            while scheduled < iterations and len(in_flight) < max(1, workers):
+                bots = _choose_bots(conn, strategy, sigma_threshold, busy)
+                if bots is None:
+                    break
+                in_flight[executor.submit(_play_match, hlt_path, flags, bots, timeout)] = bots
+                for bot in bots:
+                    busy[bot['id']] = busy.get(bot['id'], 0) + 1
+                scheduled += 1
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, timeout=FLUSH_INTERVAL, return_when=FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                for bot in in_flight.pop(future):
+                    busy[bot['id']] -= 1
+                try:
+                    finished.append(future.result())
+                except (subprocess.TimeoutExpired, subprocess.CalledProcessError, ValueError) as err:
+                    failed += 1
+                    output.warning('Game failed: {}'.format(err), games_failed=failed)
+            # Rate games in the order they finished
+            batch.extend(sorted(finished, key=lambda match: match[2]))
+
+            if batch and (len(batch) >= WRITE_BATCH_SIZE or time.time() - last_flush >= FLUSH_INTERVAL
+                          or not in_flight):
+                with conn:
+                    add_matches(conn, batch)
+                for bots, results, _ in batch:
+                    played += 1
+                    output.output('Played {}/{} matches...'.format(played, iterations),
+                                  progress=played,
+                                  iterations=iterations,
+                                  results=results,
+                                  participants=bots)
+                batch = []
+                last_flush = time.time()
+
+    if scheduled < iterations:
+        output.output('All bots have a sigma below {}, stopping after {} matches.'.format(sigma_threshold, played),
+                      progress=played, iterations=iterations)
+
+    elapsed = time.time() - start_time
+    games_per_hour = played / elapsed * 3600 if elapsed > 0 else 0.0
+    output.output('Done playing games ({:.1f} games/hour).'.format(games_per_hour),
+                  progress=iterations, iterations=iterations, failed=failed, games_per_hour=games_per_hour)
+
+
+def list_matches(conn, limit=None, offset=0):
+    """
+    Lists played games, most recent first, without loading their results (query games.results for those)
+    :param conn: The gym database connection
+    :param limit: Maximum number of games to list, None for all of them
+    :param offset: Number of games to skip
+    :return: A generator of game dicts, reading rows from the database as it is consumed
+    """
+    query = ('select id, datetime, winner, winner_name, map_width, map_height, replay, participants from games '
+             'order by datetime desc, id desc limit ? offset ?')
+    for match in conn.execute(query, (-1 if limit is None else limit, offset)):
         match = dict(match)
         match['participants'] = json.loads(match['participants'])
-        match['results'] = json.loads(match['results'])
-        result.append(match)
-    return result
+        yield match
 
 
 def get_rank_history(conn, bot_id):
@@ -262,20 +425,19 @@ def main(args):
             return
 
         def _prettyprint_match(match):
-            winner = [p for p in match['participants'] if p['id'] == match['winner']][0]
             return 'Match #{}: "{}" beat {}\nMap Size: {}x{}\nReplay: {}'.format(
                 match['id'],
-                winner['name'],
+                match['winner_name'],
                 ' '.join([ '"{}"'.format(bot['name'])
                            for bot in match['participants']
-                           if bot['id'] != winner['id'] ]),
-                match['results']['map_width'],
-                match['results']['map_height'],
-                match['results']['replay'],
+                           if bot['id'] != match['winner'] ]),
+                match['map_width'],
+                match['map_height'],
+                match['replay'],
             )
 
         with connect(args.db_path) as conn:
-            matches = list_matches(conn)
+            matches = list_matches(conn, args.limit, args.offset)
             output.print_list("Games Played:", matches, formatter=_prettyprint_match)
     elif args.gym_mode == REGISTER_MODE:
         with connect(args.db_path) as conn:
@@ -288,7 +450,8 @@ def main(args):
         output_dir = args.game_output_dir
         iterations = args.iterations
 
-        run_matches(args.db_path, hlt_path, output_dir, iterations)
+        run_matches(args.db_path, hlt_path, output_dir, iterations, args.workers, args.timeout,
+                    args.matchmaking, args.sigma_threshold)
 
 
 def parse_arguments(subparser):
@@ -329,10 +492,47 @@ def parse_arguments(subparser):
                                  type=int, required=False,
                                  default=10,
                                  help="Number of games to play.")
+    evaluate_parser.add_argument('-j', '--workers',
+                                 dest='workers',
+                                 action='store',
+                                 type=int, required=False,
+                                 default=1,
+                                 help="Number of games to play in parallel.")
+    evaluate_parser.add_argument('--timeout',
+                                 dest='timeout',
+                                 action='store',
+                                 type=float, required=False,
+                                 default=None,
+                                 help="Seconds after which a game is killed and counted as failed.")
+    evaluate_parser.add_argument('--matchmaking',
+                                 dest='matchmaking',
+                                 action='store',
+                                 type=str, required=False,
+                                 choices=matchmaking.STRATEGIES,
+                                 default=matchmaking.QUALITY,
+                                 help="How lineups are chosen: around the least certain bot, maximizing match quality, or at random.")
+    evaluate_parser.add_argument('--sigma-threshold',
+                                 dest='sigma_threshold',
+                                 action='store',
+                                 type=float, required=False,
+                                 default=None,
+                                 help="Stop scheduling games for a bot once its sigma is below this value.")
 
     stats_parser = gym_subparser.add_parser(STATS_MODE, help='Get stats from the gym.')
     stats_parser.add_argument('query', nargs='?', type=str,
                               help="An SQL query to run (this is NOT SANITIZED in any way!)")
+    stats_parser.add_argument('--limit',
+                              dest='limit',
+                              action='store',
+                              type=int, required=False,
+                              default=None,
+                              help="Number of games to list, most recent first.")
+    stats_parser.add_argument('--offset',
+                              dest='offset',
+                              action='store',
+                              type=int, required=False,
+                              default=0,
+                              help="Number of most recent games to skip.")
 
     bots_parser = gym_subparser.add_parser(BOTS_MODE, help='List registered bots.')
     bots_parser.add_argument('bot_name', type=str,
@@ -0,0 +1,80 @@
+"""
+Lineup selection for the gym.
+
+Rather than random lineups, each game is built around the bot whose rating is the most uncertain
+(highest sigma), completed with the opponents that maximize the TrueSkill match quality, i.e. the
+lineup whose outcome is the least predictable and so the most informative. Bots whose sigma fell
+below a threshold are considered ranked: they still play as opponents, but no game is scheduled for them.
+"""
+
+import random
+
+import trueskill
+
+
+RANDOM = 'random'
+QUALITY = 'quality'
+STRATEGIES = (RANDOM, QUALITY)
+
+
+def is_converged(bot, sigma_threshold):
+    return sigma_threshold is not None and bot['sigma'] < sigma_threshold
+
+
+def random_lineup(bots, num_players):
+    bots = list(bots)
+    random.shuffle(bots)
+    return bots[:num_players]
+
+
+def quality(bots):
+    """
+    :param bots: Bot dicts with mu and sigma
+    :return: The TrueSkill match quality of a free-for-all between the bots (the draw probability, in [0, 1])
+    """
+    return trueskill.quality([[trueskill.Rating(mu=bot['mu'], sigma=bot['sigma'])] for bot in bots])
+
+
+def quality_lineup(bots, num_players, sigma_threshold=None, in_flight=None):
+    """
+    Builds a lineup around the least certain bot, adding one opponent at a time to maximize the match quality
+    :param bots: Registered bot dicts (id, mu, sigma)
+    :param num_players: Number of bots in the lineup
+    :param sigma_threshold: Bots with a sigma below this are not picked as the focus of a game
+    :param in_flight: Dict of bot id to number of games being played, spreads concurrent games across bots
+    :return: A list of bot dicts, None if every bot is converged
+    """
+    in_flight = in_flight or {}
+    candidates = [bot for bot in bots if not is_converged(bot, sigma_threshold)]
+    if not candidates:
+        return None
+
+    # Ties (e.g. freshly registered bots) are broken randomly so they get games in turn
+    anchor = min(candidates, key=lambda bot: (in_flight.get(bot['id'], 0), -bot['sigma'], random.random()))
+    lineup = [anchor]
+    remaining = [bot for bot in bots if bot['id'] != anchor['id']]
+    while len(lineup) < num_players and remaining:
+        best = max(remaining, key=lambda bot: (quality(lineup + [bot]), random.random()))
+        lineup.append(best)
+        remaining.remove(best)
+
+    random.shuffle(lineup)
+    return lineup
+
+
+def choose_lineup(bots, num_players, strategy=QUALITY, sigma_threshold=None, in_flight=None):
+    """
+    :param bots: Registered bot dicts
+    :param num_players: Number of bots in the lineup
+    :param strategy: RANDOM or QUALITY
+    :param sigma_threshold: Stop scheduling games for bots whose sigma fell below this, None to never stop
+    :param in_flight: Dict of bot id to number of games being played
+    :return: A list of bot dicts, None if every bot is converged
+    """
+    if strategy == RANDOM:
+        if all(is_converged(bot, sigma_threshold) for bot in bots):
+            return None
+        return random_lineup(bots, num_players)
+    elif strategy == QUALITY:
+        return quality_lineup(bots, num_players, sigma_threshold, in_flight)
+    raise ValueError('Unknown matchmaking strategy {}'.format(strategy))
@@ -60,7 +60,7 @@ def warning(message, **fields):
 
 def print_list(title, items, formatter=lambda x: str(x)):
     if mode() == JSON:
-        output(title, items=items)
+        output(title, items=list(items))
     else:
         print(title)
         for item in items:
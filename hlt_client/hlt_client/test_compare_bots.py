@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from hlt_client import compare_bots
+
+# Stands in for the halite binary: started as `engine --results-as-json [flags] bot...`, it starts every
+# bot (the last arguments) in its working directory, and then acts as the first bot's name says
+_FAKE_ENGINE = '''#!{python}
+import json, os, subprocess, sys, time
+bots = [arg for arg in sys.argv[1:] if arg.startswith("bot:")]
+pids = []
+for index, bot in enumerate(bots):
+    with open("bot-{{}}.log".format(index), "w") as log:
+        log.write(bot)
+    # Like the engine's, the bots talk over pipes of their own rather than the engine's output
+    pids.append(subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"],
+                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE).pid)
+with open("bots.pids", "w") as f:
+    f.write(" ".join(map(str, pids)))
+behavior = bots[0].split(":")[1]
+if behavior == "hang":
+    time.sleep(60)
+elif behavior == "crash":
+    sys.exit(3)
+elif behavior == "garbage":
+    print("not json")
+else:
+    print(json.dumps({{"stats": {{str(index): {{"rank": 1 if index == int(behavior) else 2}}
+                                 for index in range(len(bots))}}}}))
+'''
+
+
+def _alive(pid):
+    """
+    Whether a process is running, not counting the zombies nobody reaps in containers
+    """
+    try:
+        with open('/proc/{}/stat'.format(pid)) as stat:
+            return stat.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+class CompareBotsTestCase(unittest.TestCase):
+    """ Tests for compare_bots against a fake engine script """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.engine = os.path.join(self.folder, 'engine')
+        with open(self.engine, 'w') as f:
+            f.write(_FAKE_ENGINE.format(python=sys.executable))
+        os.chmod(self.engine, 0o755)
+        self.cwd = os.path.join(self.folder, 'cwd')
+        os.mkdir(self.cwd)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _bot_pids(self, directory):
+        with open(os.path.join(directory, 'bots.pids')) as f:
+            return [int(pid) for pid in f.read().split()]
+
+    def _wait_dead(self, pids, timeout=5.0):
+        deadline = time.time() + timeout
+        while any(_alive(pid) for pid in pids) and time.time() < deadline:
+            time.sleep(0.05)
+        return not any(_alive(pid) for pid in pids)
+
+    def test_results(self):
+        results = compare_bots._run_game(self.engine, ['bot:1', 'bot:b'], [], timeout=10, cwd=self.cwd)
+        self.assertEqual(compare_bots._determine_winner(results), '1')
+        self.assertTrue(self._wait_dead(self._bot_pids(self.cwd)))
+
+    def test_timeout_kills_bots(self):
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            compare_bots._run_game(self.engine, ['bot:hang', 'bot:b'], [], timeout=1, cwd=self.cwd)
+        self.assertLess(time.time() - start, 10)
+        pids = self._bot_pids(self.cwd)
+        self.assertEqual(len(pids), 2)
+        self.assertTrue(self._wait_dead(pids))
+
+    def test_crash(self):
+        with self.assertRaises(subprocess.CalledProcessError) as raised:
+            compare_bots._run_game(self.engine, ['bot:crash', 'bot:b'], [], timeout=10, cwd=self.cwd)
+        self.assertEqual(raised.exception.returncode, 3)
+        self.assertTrue(self._wait_dead(self._bot_pids(self.cwd)))
+
+    def test_unreadable_results(self):
+        with self.assertRaises(ValueError):
+            compare_bots._run_game(self.engine, ['bot:garbage', 'bot:b'], [], timeout=10, cwd=self.cwd)
+
+    def test_failures_counted(self):
+        for behavior in ('hang', 'crash', 'garbage'):
+            tally = compare_bots.play_games(self.engine, None, None, None, ['bot:' + behavior, 'bot:b'], 2, [],
+                                            workers=2, timeout=1)
+            self.assertEqual(tally, {})
+
+    def test_parallel_games_have_own_directories(self):
+        output_dir = os.path.join(self.folder, 'games')
+        tally = compare_bots.play_games(self.engine, output_dir, None, None, ['bot:0', 'bot:b'], 4, [], workers=2,
+                                        timeout=10)
+        self.assertEqual(tally, {'0': 4})
+        self.assertEqual(sorted(os.listdir(output_dir)), ['game-{}'.format(run) for run in range(4)])
+        for run in range(4):
+            directory = os.path.join(output_dir, 'game-{}'.format(run))
+            self.assertEqual(sorted(name for name in os.listdir(directory) if name.endswith('.log')),
+                             ['bot-0.log', 'bot-1.log'])
+            self.assertTrue(self._wait_dead(self._bot_pids(directory)))
+
+
+if __name__ == '__main__':
+    unittest.main()
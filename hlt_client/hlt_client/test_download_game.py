@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import zstd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from hlt_client import download_game
+
+_BUCKET_PATH = '/storage/v1/b/bucket/o'
+_NUM_REPLAYS = 7
+_PAGE_SIZE = 3
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """
+    Serves a paged bucket listing, the user match API and compressed replays, failing the first request for each
+    replay with a 503
+    """
+    requests = []
+    failed = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        with self.lock:
+            self.requests.append(self.path)
+        if url.path == _BUCKET_PATH:
+            start = int(query.get('pageToken', ['0'])[0])
+            names = ['replay-{}'.format(index) for index in range(_NUM_REPLAYS)][start:start + _PAGE_SIZE]
+            listing = {'items': [{'selfLink': self._base() + _BUCKET_PATH + '/' + name} for name in names]}
+            if start + _PAGE_SIZE < _NUM_REPLAYS:
+                listing['nextPageToken'] = str(start + _PAGE_SIZE)
+            return self._send(json.dumps(listing).encode())
+        if url.path == '/user':
+            offset, limit = int(query['offset'][0]), int(query['limit'][0])
+            matches = [{'replay_class': 0, 'replay': 'replay-{}'.format(index)}
+                       for index in range(offset, min(offset + limit, _NUM_REPLAYS))]
+            return self._send(json.dumps(matches).encode())
+        with self.lock:
+            fail = url.path not in self.failed
+            self.failed.add(url.path)
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        self._send(zstd.dumps(json.dumps({'replay': url.path}).encode()))
+
+    def _base(self):
+        return 'http://{}:{}'.format(*self.server.server_address)
+
+    def _send(self, body):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadGameTestCase(unittest.TestCase):
+    """ Tests for download_game against a local stand-in for the bucket and the API """
+
+    def setUp(self):
+        _StandIn.requests = []
+        _StandIn.failed = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StandIn)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = 'http://{}:{}'.format(*self.server.server_address)
+        self.destination = tempfile.mkdtemp()
+        self.session = download_game.make_session(4, backoff_factor=0)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_download_retries_and_resumes(self):
+        downloader = download_game.GameDownloader(self.destination, [self.base + _BUCKET_PATH], 'replay-', True,
+                                                  workers=4, session=self.session)
+        self.assertEqual(len(downloader.objects), _NUM_REPLAYS)
+        self.assertEqual(downloader.get_objects(), [])
+        files = sorted(name for name in os.listdir(self.destination) if name.endswith('.json'))
+        self.assertEqual(files, ['bucket_replay-{}.json'.format(index) for index in range(_NUM_REPLAYS)])
+        with open(os.path.join(self.destination, files[0])) as replay:
+            self.assertEqual(json.load(replay), {'replay': _BUCKET_PATH + '/replay-0'})
+
+        # Downloading again only lists the bucket, the manifest has every replay
+        _StandIn.requests = []
+        downloader = download_game.GameDownloader(self.destination, [self.base + _BUCKET_PATH], 'replay-', True,
+                                                  workers=4, session=self.session)
+        self.assertEqual(downloader.get_objects(), [])
+        self.assertTrue(all(request.startswith(_BUCKET_PATH + '?') for request in _StandIn.requests))
+
+    def test_failures_are_reported(self):
+        session = download_game.make_session(4, retries=0)
+        downloader = download_game.GameDownloader(self.destination, [self.base + _BUCKET_PATH], 'replay-', False,
+                                                  workers=4, session=session)
+        self.assertEqual(len(downloader.get_objects()), _NUM_REPLAYS)
+        self.assertEqual(downloader.manifest.finished, set())
+        self.assertEqual(len(downloader.get_objects()), 0)
+        self.assertEqual(len(os.listdir(self.destination)), _NUM_REPLAYS + 1)
+
+    def test_user_metadata_pages(self):
+        class StandInUserGameDownloader(download_game.UserGameDownloader):
+            _USER_BOT_URI = self.base + '/user?user={}&limit={}&offset={}'
+            _BUCKET_URIS = [self.base + _BUCKET_PATH]
+            _FETCH_THRESHOLD = 2
+
+        downloader = StandInUserGameDownloader(self.destination, 1, 5, workers=4, session=self.session)
+        self.assertEqual([url.split('/')[-1] for url in downloader.objects],
+                         ['replay-{}'.format(index) for index in range(5)])
+        self.assertEqual(downloader.get_objects(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
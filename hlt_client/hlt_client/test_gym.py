@@ -0,0 +1,245 @@
+import datetime
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import trueskill
+
+from hlt_client import gym
+
+_NAMES = ['ada', 'bob', 'cy', 'dee', 'eve', 'fay']
+
+
+def _results(bots, number):
+    """
+    Results of a game won by the bots in alphabetical order
+    """
+    order = sorted(range(len(bots)), key=lambda index: bots[index]['name'])
+    return {'stats': {str(index): {'rank': order.index(index) + 1} for index in range(len(bots))},
+            'map_width': 32, 'map_height': 40, 'replay': 'replay-{}.hlt'.format(number)}
+
+
+class GymTestCase(unittest.TestCase):
+    """ Tests for gym on a temporary database, with stand-ins for the games """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.folder, 'gym.db')
+        self.conn = gym.connect(self.db_path)
+        with self.conn:
+            for name in _NAMES:
+                gym.register_bot(self.conn, name, '/bots/{}'.format(name))
+        self.ids = {bot['name']: bot['id'] for bot in gym.list_bots(self.conn)}
+        random.seed(0)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.folder)
+
+    def _replay_ratings(self):
+        """
+        Rates the recorded games again in the order they were written
+        :return: ({bot id: (mu, sigma, games played)}, [rank_history rows expected for the games])
+        """
+        trueskill.setup(tau=gym.TRUESKILL_TAU, draw_probability=gym.TRUESKILL_DRAW_PROBABILITY)
+        ratings = {bot_id: (gym.BASE_MU, gym.BASE_SIGMA, 0) for bot_id in self.ids.values()}
+        history = []
+        for game in self.conn.execute('select * from games order by id'):
+            participants = json.loads(game['participants'])
+            results = json.loads(game['results'])
+            for bot in participants:
+                self.assertAlmostEqual(bot['mu'], ratings[bot['id']][0])
+                self.assertAlmostEqual(bot['sigma'], ratings[bot['id']][1])
+                history.append((bot['id'], game['datetime'], bot['mu'], bot['sigma']))
+            teams = [[trueskill.Rating(mu=ratings[bot['id']][0], sigma=ratings[bot['id']][1])] for bot in participants]
+            ranks = [results['stats'][str(index)]['rank'] - 1 for index in range(len(participants))]
+            for bot, (rating,) in zip(participants, trueskill.rate(teams, ranks)):
+                ratings[bot['id']] = (rating.mu, rating.sigma, ratings[bot['id']][2] + 1)
+        return ratings, history
+
+    def test_ranked_bots(self):
+        # bob and eve tie with cy, ties are broken by id
+        scores = {'ada': (30.0, 2.0), 'bob': (27.0, 3.0), 'cy': (24.0, 2.0), 'dee': (20.0, 8.0),
+                  'eve': (21.0, 1.0), 'fay': (40.0, 1.0)}
+        with self.conn:
+            for name, (mu, sigma) in scores.items():
+                self.conn.execute('update bots set mu=?, sigma=?, score=? where name=?', (mu, sigma, mu - 3 * sigma, name))
+        ranked = self.conn.execute('select name, rank from ranked_bots order by rank').fetchall()
+        self.assertEqual([tuple(bot) for bot in ranked],
+                         [('fay', 1), ('ada', 2), ('bob', 3), ('cy', 4), ('eve', 5), ('dee', 6)])
+        self.assertEqual([bot['name'] for bot in gym.list_bots(self.conn)], [name for name, _ in ranked])
+
+        # A later id with the same score ranks after, whatever the insertion order
+        with self.conn:
+            self.conn.execute('update bots set mu=?, sigma=?, score=? where name=?', (27.0, 3.0, 18.0, 'ada'))
+        ranked = {bot['name']: bot['rank'] for bot in gym.list_bots(self.conn)}
+        self.assertEqual((ranked['ada'], ranked['bob'], ranked['cy'], ranked['eve']), (2, 3, 4, 5))
+
+    def test_add_matches_writes_participants(self):
+        before = {bot['id']: bot for bot in gym.list_bots(self.conn)}
+        bots = [before[self.ids['cy']], before[self.ids['eve']]]
+        changes = self.conn.total_changes
+        with self.conn:
+            gym.add_matches(self.conn, [(bots, _results(bots, 0), '2018-11-01T00:00:00')])
+        # One game, two rank_history rows and the two participants' bots rows
+        self.assertEqual(self.conn.total_changes - changes, 5)
+        # The other bots' rows are untouched, only their derived ranks may change
+        after = {bot['id']: dict(bot) for bot in self.conn.execute('select * from bots')}
+        for bot_id, bot in before.items():
+            if bot_id in (self.ids['cy'], self.ids['eve']):
+                self.assertEqual(after[bot_id]['games_played'], 1)
+                self.assertNotEqual(after[bot_id]['sigma'], bot['sigma'])
+            else:
+                self.assertEqual({key: after[bot_id][key] for key in bot if key != 'rank'},
+                                 {key: value for key, value in bot.items() if key != 'rank'})
+        self.assertEqual(sorted(bot['rank'] for bot in gym.list_bots(self.conn)), list(range(1, len(_NAMES) + 1)))
+        # Ranks before the game, with every bot tied on the base rating
+        history = self.conn.execute('select bot_id, rank from rank_history order by rowid').fetchall()
+        self.assertEqual([tuple(row) for row in history], [(bot['id'], bot['rank']) for bot in bots])
+        self.assertEqual([row['rank'] for row in history], [3, 5])
+
+    def test_migrate_version_0(self):
+        # A database created by the original client: SCHEMA alone, no version row, ranks stored in bots
+        path = os.path.join(self.folder, 'old.db')
+        old = sqlite3.connect(path)
+        old.executescript(gym.SCHEMA)
+        names = _NAMES[:4]
+        old.executemany('insert into bots (name, version, mu, sigma, path, games_played, rank) values (?, 1, ?, ?, ?, 0, ?)',
+                        [(name, 25.0 + index, 8.0 - index, '/bots/' + name, index + 1) for index, name in enumerate(names)])
+        num_games = 2500
+        games = []
+        for number in range(num_games):
+            participants = [{'id': 1 + (number + offset) % len(names), 'name': names[(number + offset) % len(names)]}
+                            for offset in range(2)]
+            results = {'stats': {'0': {'rank': 1}, '1': {'rank': 2}}, 'replay': 'replay-{}.hlt'.format(number)}
+            # The oldest games predate map sizes in the results
+            if number >= 10:
+                results.update(map_width=32 + number % 3 * 8, map_height=32 + number % 3 * 8)
+            # Pairs of games finish in the same second
+            finished = datetime.datetime(2018, 11, 1) + datetime.timedelta(seconds=number // 2)
+            games.append((finished.isoformat(), participants[0]['id'], json.dumps(participants), json.dumps(results)))
+        old.executemany('insert into games (datetime, winner, participants, results) values (?, ?, ?, ?)', games)
+        old.commit()
+        old.close()
+
+        conn = gym.connect(path)
+        self.addCleanup(conn.close)
+        self.assertEqual(gym.schema_version(conn), gym.SCHEMA_VERSION)
+        self.assertEqual(conn.execute('select count(*) from hlt_client_version').fetchone()[0], 1)
+        for bot in gym.list_bots(conn):
+            self.assertAlmostEqual(bot['score'], bot['mu'] - 3 * bot['sigma'])
+        self.assertEqual([bot['name'] for bot in gym.list_bots(conn)], ['dee', 'cy', 'bob', 'ada'])
+        indexes = {row['name'] for row in conn.execute("select name from sqlite_master where type = 'index'")}
+        self.assertTrue({'bots_score', 'rank_history_bot_id', 'games_datetime'} <= indexes)
+
+        rows = conn.execute('select * from games order by id').fetchall()
+        self.assertEqual(len(rows), num_games)
+        for number, row in enumerate(rows):
+            participants = json.loads(row['participants'])
+            self.assertEqual(row['replay'], 'replay-{}.hlt'.format(number))
+            self.assertEqual(row['winner_name'], participants[0]['name'])
+            expected_size = None if number < 10 else 32 + number % 3 * 8
+            self.assertEqual((row['map_width'], row['map_height']), (expected_size, expected_size))
+
+        # Pages follow each other without gaps or repeats, newest first and ties by id
+        everything = list(gym.list_matches(conn))
+        self.assertEqual([match['id'] for match in everything],
+                         [row['id'] for row in sorted(rows, key=lambda row: (row['datetime'], row['id']), reverse=True)])
+        pages = []
+        for offset in range(0, num_games, 700):
+            page = list(gym.list_matches(conn, limit=700, offset=offset))
+            self.assertLessEqual(len(page), 700)
+            pages.extend(page)
+        self.assertEqual([match['id'] for match in pages], [match['id'] for match in everything])
+        self.assertEqual(list(gym.list_matches(conn, limit=5, offset=num_games)), [])
+        self.assertNotIn('results', everything[0])
+        self.assertEqual(everything[0]['participants'], json.loads(rows[everything[0]['id'] - 1]['participants']))
+
+        # Connecting again finds nothing left to migrate
+        conn.close()
+        conn = gym.connect(path)
+        self.addCleanup(conn.close)
+        self.assertEqual(gym.schema_version(conn), gym.SCHEMA_VERSION)
+
+    def test_run_matches_batches(self):
+        lock = threading.Lock()
+        played = []
+        doomed = self.ids['dee']
+
+        def play_match(hlt_path, flags, bots, timeout):
+            # dee is deregistered while playing its first game, that game and the others it's in are dropped
+            with lock:
+                number = len(played)
+                played.append([bot['id'] for bot in bots])
+                if doomed in played[-1] and sum(doomed in ids for ids in played) == 1:
+                    other = sqlite3.connect(self.db_path)
+                    with other:
+                        other.execute('delete from bots where id = ?', (doomed,))
+                    other.close()
+            time.sleep(0.01)
+            return bots, _results(bots, number), datetime.datetime.now().isoformat()
+
+        with mock.patch.object(gym, '_play_match', play_match), mock.patch.object(gym, 'WRITE_BATCH_SIZE', 4), \
+                mock.patch.object(gym, 'add_matches', wraps=gym.add_matches) as add_matches:
+            gym.run_matches(self.db_path, 'halite', None, 30, workers=3)
+
+        batches = [len(call[0][1]) for call in add_matches.call_args_list]
+        self.assertGreater(len(batches), 2)
+        self.assertTrue(all(size < gym.WRITE_BATCH_SIZE + 3 for size in batches))
+        self.assertEqual(len(played), 30)
+        self.assertTrue(any(doomed in ids for ids in played))
+
+        games = self.conn.execute('select * from games order by id').fetchall()
+        kept = [ids for ids in played if doomed not in ids]
+        self.assertEqual(sum(batches), len(played))
+        self.assertEqual(len(games), len(kept))
+        self.assertEqual(sorted(sorted(bot['id'] for bot in json.loads(game['participants'])) for game in games),
+                         sorted(sorted(ids) for ids in kept))
+        # Games are rated in the order they finished, each from the ratings the previous ones left
+        self.assertEqual([game['datetime'] for game in games], sorted(game['datetime'] for game in games))
+        for game in games:
+            participants = json.loads(game['participants'])
+            self.assertEqual(game['winner_name'], min(bot['name'] for bot in participants))
+            self.assertEqual((game['map_width'], game['map_height']), (32, 40))
+
+        ratings, history = self._replay_ratings()
+        bots = {bot['id']: bot for bot in gym.list_bots(self.conn)}
+        self.assertNotIn(doomed, bots)
+        for bot_id, bot in bots.items():
+            mu, sigma, games_played = ratings[bot_id]
+            self.assertAlmostEqual(bot['mu'], mu)
+            self.assertAlmostEqual(bot['sigma'], sigma)
+            self.assertAlmostEqual(bot['score'], mu - 3 * sigma)
+            self.assertEqual(bot['games_played'], games_played)
+        recorded = self.conn.execute('select bot_id, datetime, mu, sigma from rank_history order by rowid').fetchall()
+        self.assertEqual(len(recorded), len(history))
+        for row, expected in zip(recorded, history):
+            self.assertEqual(tuple(row)[:2], expected[:2])
+            self.assertAlmostEqual(row['mu'], expected[2])
+            self.assertAlmostEqual(row['sigma'], expected[3])
+
+    def test_run_matches_flushes_after_interval(self):
+        def play_match(hlt_path, flags, bots, timeout):
+            time.sleep(0.05)
+            return bots, _results(bots, 0), datetime.datetime.now().isoformat()
+
+        with mock.patch.object(gym, '_play_match', play_match), mock.patch.object(gym, 'FLUSH_INTERVAL', 0.1), \
+                mock.patch.object(gym, 'add_matches', wraps=gym.add_matches) as add_matches:
+            gym.run_matches(self.db_path, 'halite', None, 12, workers=1)
+
+        batches = [len(call[0][1]) for call in add_matches.call_args_list]
+        self.assertEqual(sum(batches), 12)
+        # Far fewer than WRITE_BATCH_SIZE games per batch, written as the interval passed
+        self.assertGreater(len(batches), 2)
+        self.assertEqual(self.conn.execute('select count(*) from games').fetchone()[0], 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
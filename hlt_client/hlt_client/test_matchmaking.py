@@ -0,0 +1,75 @@
+import random
+import unittest
+
+import trueskill
+
+from hlt_client import matchmaking
+
+
+class MatchmakingTestCase(unittest.TestCase):
+    """ Tests for matchmaking on fixed ratings """
+
+    def setUp(self):
+        random.seed(0)
+        trueskill.setup()
+        ratings = [(25.0, 2.0), (30.0, 6.0), (18.0, 1.0), (26.0, 3.0), (40.0, 1.5), (24.0, 2.5)]
+        self.bots = [{'id': bot_id, 'mu': mu, 'sigma': sigma} for bot_id, (mu, sigma) in enumerate(ratings, 1)]
+
+    def expected(self, anchor_id, num_players):
+        """
+        The lineup built around a bot, adding the opponent of best match quality one at a time
+        :return: The sorted bot ids
+        """
+        lineup = [bot for bot in self.bots if bot['id'] == anchor_id]
+        while len(lineup) < num_players:
+            lineup.append(max((bot for bot in self.bots if bot not in lineup),
+                              key=lambda bot: matchmaking.quality(lineup + [bot])))
+        return sorted(bot['id'] for bot in lineup)
+
+    def lineup(self, num_players, sigma_threshold=None, in_flight=None):
+        lineup = matchmaking.quality_lineup(self.bots, num_players, sigma_threshold, in_flight)
+        return sorted(bot['id'] for bot in lineup)
+
+    def test_anchor_highest_sigma(self):
+        for num_players in (2, 3, 4):
+            self.assertEqual(self.lineup(num_players), self.expected(2, num_players))
+        # Not simply the closest ratings: 2 (sigma 6) is the most uncertain
+        self.assertNotEqual(self.expected(2, 2), self.expected(1, 2))
+
+    def test_anchor_fewest_in_flight(self):
+        # Fewest games in flight first, then the highest sigma
+        self.assertEqual(self.lineup(2, in_flight={2: 1}), self.expected(4, 2))
+        self.assertEqual(self.lineup(2, in_flight={2: 1, 4: 1, 6: 1, 1: 1}), self.expected(5, 2))
+        busy = {bot['id']: 1 for bot in self.bots if bot['id'] != 3}
+        self.assertEqual(self.lineup(2, in_flight=busy), self.expected(3, 2))
+        self.assertEqual(self.lineup(2, in_flight={bot['id']: 2 for bot in self.bots}), self.expected(2, 2))
+
+    def test_sigma_threshold(self):
+        # Only 2 (sigma 6) and 4 (sigma 3) are above the threshold and anchor games
+        self.assertEqual(self.lineup(2, 2.75), self.expected(2, 2))
+        self.assertEqual(self.lineup(2, 2.75, {2: 1}), self.expected(4, 2))
+        self.assertEqual(self.lineup(2, 2.75, {2: 1, 4: 1}), self.expected(2, 2))
+        self.assertEqual(self.lineup(2, 2.75, {2: 2, 4: 1}), self.expected(4, 2))
+        # Converged bots still play as opponents
+        self.assertEqual(self.lineup(4, 2.75), self.expected(2, 4))
+
+    def test_all_converged(self):
+        self.assertIsNone(matchmaking.quality_lineup(self.bots, 2, sigma_threshold=6.5))
+        self.assertIsNone(matchmaking.choose_lineup(self.bots, 2, matchmaking.QUALITY, sigma_threshold=6.5))
+        self.assertIsNone(matchmaking.choose_lineup(self.bots, 2, matchmaking.RANDOM, sigma_threshold=6.5))
+        # A sigma equal to the threshold isn't below it
+        self.assertEqual(self.lineup(2, 6.0), self.expected(2, 2))
+        self.assertEqual(len(matchmaking.choose_lineup(self.bots, 4, matchmaking.RANDOM, sigma_threshold=6.0)), 4)
+
+    def test_ties_take_turns(self):
+        # Freshly registered bots all tie, so each of them anchors games in turn
+        self.bots = [{'id': bot_id, 'mu': 25.0, 'sigma': 8.333} for bot_id in range(1, 5)]
+        in_flight = {}
+        for _ in range(4):
+            lineup = matchmaking.quality_lineup(self.bots, 1, in_flight=in_flight)
+            in_flight[lineup[0]['id']] = 1
+        self.assertEqual(sorted(in_flight), [1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()